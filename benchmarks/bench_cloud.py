@@ -0,0 +1,249 @@
+"""Benchmark the integration end to end against a local fake of the cloud.
+
+Measures, for accounts of 1, 10 and 100 devices:
+
+- the latency of the full login flow,
+- the time and the requests to set up the config entry, login included,
+- the time to set the config entry up again from its cached devices,
+- the requests of an entity update cycle, refreshing every device once,
+- the event loop CPU time of an entity update cycle.
+
+The fake cloud runs in its own thread, so the event loop time only accounts for
+the integration. Results are saved as JSON to compare them across changes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cloud --save baseline
+    python -m benchmarks.bench_cloud --compare baseline
+"""
+
+import argparse
+import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
+import json
+import logging
+from pathlib import Path
+import statistics
+import tempfile
+import threading
+import time
+from typing import Any
+from unittest.mock import patch
+
+import aiohttp
+
+from homeassistant import loader
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.delonghi_dehumidifier_api.client import APIClient, PropertyTier
+from custom_components.delonghi_dehumidifier_api.const import CONF_RATE_LIMIT, DOMAIN
+from tests.fake_ayla_cloud import FakeAylaCloud
+from tests.test_config_flow import MOCK_BASIC_CONFIG_PAGE
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Metrics where a higher value than the compared results is a regression
+METRICS = {
+    "login_ms": "ms",
+    "setup_ms": "ms",
+    "setup_requests": "requests",
+    "restart_ms": "ms",
+    "cycle_requests": "requests",
+    "cycle_loop_ms": "ms",
+}
+
+
+@contextmanager
+def serve(cloud: FakeAylaCloud) -> Iterator[FakeAylaCloud]:
+    """Serve a fake cloud from its own thread and event loop."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="fake_ayla_cloud")
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(cloud.start(), loop).result()
+        yield cloud
+        asyncio.run_coroutine_threadsafe(cloud.stop(), loop).result()
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+@contextmanager
+def use_cloud(cloud: FakeAylaCloud, session: aiohttp.ClientSession) -> Iterator[None]:
+    """Point the integration at a fake cloud."""
+    # The shared session of Home Assistant needs the network integration
+    with (
+        patch(
+            "custom_components.delonghi_dehumidifier_api.client.DEFAULT_ENDPOINTS",
+            cloud.endpoints,
+        ),
+        patch(
+            "custom_components.delonghi_dehumidifier_api.aiohttp_client"
+            ".async_get_clientsession",
+            return_value=session,
+        ),
+    ):
+        yield
+
+
+async def measure_login(cloud: FakeAylaCloud, rounds: int) -> float:
+    """Return the median milliseconds of the full login flow."""
+    durations = []
+    async with aiohttp.ClientSession() as session:
+        for _ in range(rounds):
+            client = APIClient(
+                session,
+                "en",
+                "test_email@example.com",
+                "test_password",
+                cloud.endpoints,
+            )
+            start = time.perf_counter()
+            await client.get_new_refresh_token()
+            durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+async def measure_entry(cloud: FakeAylaCloud, rounds: int) -> dict[str, float]:
+    """Return the setup and entity update cycle metrics of a config entry."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        async with (
+            aiohttp.ClientSession() as session,
+            async_test_home_assistant(config_dir=config_dir) as hass,
+        ):
+            hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+            # Measure the integration itself rather than the waits of the limiter
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                data=MOCK_BASIC_CONFIG_PAGE,
+                options={CONF_RATE_LIMIT: 1_000_000},
+            )
+            entry.add_to_hass(hass)
+
+            cloud.requests.clear()
+            start = time.perf_counter()
+            with use_cloud(cloud, session):
+                assert await hass.config_entries.async_setup(entry.entry_id)
+                await hass.async_block_till_done()
+            setup_ms = (time.perf_counter() - start) * 1000
+            setup_requests = sum(cloud.requests.values())
+
+            client = entry.runtime_data.client
+            coordinators = entry.runtime_data.coordinators
+            cycle_requests = []
+            cycle_loop_times = []
+            for _ in range(rounds):
+                # As every device is refreshed once its fast properties expired
+                for device_dsn in coordinators:
+                    client.invalidate_properties(device_dsn, [PropertyTier.FAST])
+                cloud.requests.clear()
+                start = time.thread_time()
+                await asyncio.gather(
+                    *(
+                        coordinator.async_refresh()
+                        for coordinator in coordinators.values()
+                    )
+                )
+                await hass.async_block_till_done()
+                cycle_loop_times.append(time.thread_time() - start)
+                cycle_requests.append(sum(cloud.requests.values()))
+
+            assert await hass.config_entries.async_unload(entry.entry_id)
+
+            # Set up again from the devices cached by the first setup
+            start = time.perf_counter()
+            with use_cloud(cloud, session):
+                assert await hass.config_entries.async_setup(entry.entry_id)
+                await hass.async_block_till_done()
+            restart_ms = (time.perf_counter() - start) * 1000
+
+            assert await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_stop(force=True)
+
+    return {
+        "setup_ms": setup_ms,
+        "setup_requests": setup_requests,
+        "restart_ms": restart_ms,
+        "cycle_requests": statistics.median(cycle_requests),
+        "cycle_loop_ms": statistics.median(cycle_loop_times) * 1000,
+    }
+
+
+async def run(devices: int, latency: float, rounds: int) -> dict[str, float]:
+    """Run every measurement against an account of the given size."""
+    with serve(FakeAylaCloud(devices, latency)) as cloud:
+        return {
+            "login_ms": await measure_login(cloud, rounds),
+            **await measure_entry(cloud, rounds),
+        }
+
+
+def compare(results: dict[str, Any], previous: dict[str, Any]) -> None:
+    """Print the change of every metric against previous results."""
+    for devices, metrics in results["devices"].items():
+        previous_metrics = previous["devices"].get(devices)
+        if previous_metrics is None:
+            continue
+        for metric, unit in METRICS.items():
+            if metric not in previous_metrics:
+                # Added after the previous results were saved
+                continue
+            value = metrics[metric]
+            previous_value = previous_metrics[metric]
+            change = (
+                (value - previous_value) / previous_value * 100
+                if previous_value
+                else 0.0
+            )
+            print(
+                f"{devices:>4} devices {metric:>15}: {previous_value:10.2f} -> "
+                f"{value:10.2f} {unit:<8} ({change:+.1f}%)"
+            )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="seconds added to every request"
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--save", metavar="NAME", help="save the results as NAME")
+    parser.add_argument(
+        "--compare", metavar="NAME", help="compare with the results saved as NAME"
+    )
+    args = parser.parse_args()
+    # Silence the warning about loading a custom integration
+    logging.getLogger("homeassistant.loader").setLevel(logging.ERROR)
+
+    results: dict[str, Any] = {
+        "latency": args.latency,
+        "rounds": args.rounds,
+        "devices": {},
+    }
+    for devices in args.devices:
+        metrics = asyncio.run(run(devices, args.latency, args.rounds))
+        results["devices"][str(devices)] = metrics
+        print(
+            f"{devices:>4} devices: "
+            + ", ".join(f"{metric} {value:.2f}" for metric, value in metrics.items())
+        )
+
+    if args.compare:
+        compare(results, json.loads((RESULTS_DIR / f"{args.compare}.json").read_text()))
+
+    if args.save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        (RESULTS_DIR / f"{args.save}.json").write_text(
+            json.dumps(results, indent=2) + "\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
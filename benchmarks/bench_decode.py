@@ -0,0 +1,143 @@
+"""Benchmark decoding properties.json responses into cached device properties.
+
+Compares the previous path, decoding with the json module and keeping the raw
+"property" objects, with the current one, decoding with orjson and reducing the
+response to property records before building the snapshot.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_decode --devices 100
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+import orjson
+
+from custom_components.delonghi_dehumidifier_api.client import (
+    PROPERTY_DECODERS,
+    PropertySnapshot,
+    property_record,
+)
+
+VALUES = {
+    "appliance_model": "DDSX220WFA",
+    "firmware_version": "1.0.0",
+    "hardware_version": "1.0",
+    "current_humidity": 62,
+    "humidity_setpoint": 50,
+    "current_speed": 2,
+    "device_mode": 1,
+    "device_status": 1,
+    "filter_change_alarm": 0,
+    "filter_life": 120,
+    "filter_status": 1,
+    "heat_exchanger_temp": 70,
+    "room_temp": 68,
+    "rotation_speed": 1,
+    "set_eco": 0,
+    "swing": 1,
+}
+
+# Properties the integration does not read, but the cloud still returns
+UNUSED_PROPERTIES = 24
+
+
+def properties_response(device_index: int) -> bytes:
+    """Build a properties.json response with the metadata the cloud returns."""
+    names = list(PROPERTY_DECODERS) + [
+        f"unused_property_{index}" for index in range(UNUSED_PROPERTIES)
+    ]
+    return orjson.dumps(
+        [
+            {
+                "property": {
+                    "type": "Property",
+                    "name": name,
+                    "base_type": "integer",
+                    "read_only": False,
+                    "direction": "input",
+                    "scope": "user",
+                    "data_updated_at": "2025-01-01T00:00:00Z",
+                    "key": device_index * 1000 + index,
+                    "device_key": device_index,
+                    "product_name": "Dehumidifier",
+                    "track_only": False,
+                    "display_name": name.replace("_", " ").title(),
+                    "host_sw_version": False,
+                    "time_series": False,
+                    "derived": False,
+                    "app_type": None,
+                    "recipe": None,
+                    "value": VALUES.get(name, index),
+                    "generated_from": None,
+                    "generated_at": None,
+                    "denied_roles": [],
+                    "ack_enabled": False,
+                    "retention_days": 30,
+                    "ack_status": None,
+                    "ack_message": None,
+                    "acked_at": None,
+                }
+            }
+            for index, name in enumerate(names)
+        ]
+    )
+
+
+def decode_previous(body: bytes) -> tuple[list[dict], PropertySnapshot]:
+    """Decode a response the previous way, keeping the raw property objects."""
+    device_properties = [item.get("property") for item in json.loads(body.decode())]
+    records = [
+        property_record(device_property) for device_property in device_properties
+    ]
+    return device_properties, PropertySnapshot.from_properties(records)
+
+
+def decode_current(body: bytes) -> PropertySnapshot:
+    """Decode a response the current way, keeping only the snapshot."""
+    records = [property_record(item["property"]) for item in orjson.loads(body)]
+    return PropertySnapshot.from_properties(
+        record for record in records if record.name in PROPERTY_DECODERS
+    )
+
+
+def measure(name: str, decode, bodies: list[bytes], rounds: int) -> None:
+    """Print the time per refresh and the memory retained per device."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for body in bodies:
+            decode(body)
+    elapsed = (time.perf_counter() - start) / rounds
+
+    gc.collect()
+    tracemalloc.start()
+    cache = [decode(body) for body in bodies]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cache
+
+    print(
+        f"{name:>9}: {elapsed * 1000:8.2f} ms per refresh, "
+        f"{retained / len(bodies) / 1024:7.1f} KiB retained per device"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    bodies = [properties_response(index) for index in range(args.devices)]
+    print(f"{args.devices} devices, {len(bodies[0])} bytes per response")
+    measure("previous", decode_previous, bodies, args.rounds)
+    measure("current", decode_current, bodies, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
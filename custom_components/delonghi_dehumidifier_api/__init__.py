@@ -2,12 +2,52 @@
 
 from __future__ import annotations
 
-from homeassistant.config_entries import ConfigEntry
+import asyncio
+import logging
+from typing import Any
+
+import aiohttp
+
 from homeassistant.const import CONF_EMAIL, CONF_LANGUAGE, CONF_PASSWORD, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import aiohttp_client
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import aiohttp_client, device_registry as dr
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
+from homeassistant.util.hass_dict import HassKey
+
+from .client import APIClient, PropertySnapshot
+from .const import (
+    CONF_DAILY_REQUEST_BUDGET,
+    CONF_DATASTREAM,
+    CONF_LAN_PORT,
+    CONF_LOCAL_LAN,
+    CONF_RATE_LIMIT,
+    DEFAULT_DAILY_REQUEST_BUDGET,
+    DEFAULT_LAN_PORT,
+    DEFAULT_RATE_LIMIT,
+    DEVICES_STORAGE_KEY,
+    DOMAIN,
+    PROPERTIES_SAVE_INTERVAL,
+    PROPERTIES_STORAGE_KEY,
+    STARTUP_RETRY_INTERVAL,
+    STARTUP_RETRY_MAX_INTERVAL,
+    STORAGE_VERSION,
+    TOKENS_SAVE_DELAY,
+    TOKENS_STORAGE_KEY,
+    UPDATE_TIMEOUT,
+)
+from .coordinator import (
+    DeLonghiDehumidifierConfigEntry,
+    DeLonghiDehumidifierCoordinator,
+    DeLonghiDehumidifierData,
+)
+from .ratelimit import RateLimiters
+from .registry import account_key, async_get_clients
+from .scheduler import PollSchedulers
+from .utils import build_device_info, static_properties
 
-from .client import APIClient
+_LOGGER = logging.getLogger(__name__)
 
 _PLATFORMS: list[Platform] = [
     Platform.HUMIDIFIER,
@@ -15,7 +55,8 @@ _PLATFORMS: list[Platform] = [
     Platform.SWITCH,
 ]
 
-type DeLonghiDehumidifierConfigEntry = ConfigEntry[APIClient]
+DATA_RATE_LIMITERS: HassKey[RateLimiters] = HassKey(f"{DOMAIN}_rate_limiters")
+DATA_POLL_SCHEDULERS: HassKey[PollSchedulers] = HassKey(f"{DOMAIN}_poll_schedulers")
 
 
 async def async_setup_entry(
@@ -27,16 +68,268 @@ async def async_setup_entry(
     email = entry.data[CONF_EMAIL]
     password = entry.data[CONF_PASSWORD]
 
+    # Config entries of the same account share its client
+    clients = async_get_clients(hass)
+    key = account_key(email)
     session = aiohttp_client.async_get_clientsession(hass)
-    entry.runtime_data = APIClient(session, language, email, password)
+    client = clients.acquire(
+        key,
+        entry.entry_id,
+        password,
+        lambda: APIClient(session, language, email, password),
+    )
+    entry.async_on_unload(lambda: clients.async_release(key, entry.entry_id))
+
+    # And its rate limit
+    rate_limiters = hass.data.setdefault(DATA_RATE_LIMITERS, RateLimiters())
+    client.rate_limiter = rate_limiters.acquire(
+        key,
+        entry.entry_id,
+        entry.options.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+    )
+    entry.async_on_unload(lambda: rate_limiters.release(key, entry.entry_id))
+
+    tokens_store = _tokens_store(hass, entry)
+    if client.refresh_token is not None:
+        # Persist the tokens of a client already logged in
+        tokens_store.async_delay_save(client.export_tokens, TOKENS_SAVE_DELAY)
+    elif (tokens := await tokens_store.async_load()) is not None:
+        client.restore_tokens(tokens)
+
+    @callback
+    def _save_tokens() -> None:
+        tokens_store.async_delay_save(client.export_tokens, TOKENS_SAVE_DELAY)
+
+    entry.async_on_unload(client.add_token_listener(_save_tokens))
+
+    properties_store = _properties_store(hass, entry)
+    if (properties := await properties_store.async_load()) is not None:
+        client.restore_properties(properties)
+
+    @callback
+    def _save_properties() -> None:
+        properties_store.async_delay_save(client.export_properties)
+
+    # Written at most once per interval however often the properties change, and
+    # once more when the entry unloads
+    properties_debouncer = Debouncer(
+        hass,
+        _LOGGER,
+        cooldown=PROPERTIES_SAVE_INTERVAL,
+        immediate=False,
+        function=_save_properties,
+    )
+    entry.async_on_unload(
+        client.add_snapshot_listener(properties_debouncer.async_schedule_call)
+    )
+
+    @callback
+    def _flush_properties() -> None:
+        properties_debouncer.async_cancel()
+        _save_properties()
+
+    entry.async_on_unload(_flush_properties)
+
+    # And its daily request budget
+    schedulers = hass.data.setdefault(DATA_POLL_SCHEDULERS, PollSchedulers())
+    scheduler = schedulers.acquire(
+        key,
+        entry.entry_id,
+        lambda: client.request_count,
+        entry.options.get(CONF_DAILY_REQUEST_BUDGET, DEFAULT_DAILY_REQUEST_BUDGET),
+    )
+    entry.async_on_unload(lambda: schedulers.release(key, entry.entry_id))
+
+    devices_store = _devices_store(hass, entry)
+    cached_devices = await devices_store.async_load()
+    if cached_devices is None:
+        # Nothing to create the entities from, wait for the cloud
+        try:
+            async with asyncio.timeout(UPDATE_TIMEOUT.total_seconds()):
+                devices = await _async_fetch_devices(client)
+        except (aiohttp.ClientError, TimeoutError) as err:
+            raise ConfigEntryNotReady(f"Unable to fetch the devices: {err}") from err
+        await devices_store.async_save(devices)
+    else:
+        devices = cached_devices
+
+    coordinators = {
+        device_dsn: DeLonghiDehumidifierCoordinator(
+            hass, entry, client, scheduler, device_dsn
+        )
+        for device_dsn in devices
+    }
+    device_infos = {
+        device_dsn: build_device_info(device_dsn, PropertySnapshot(**static))
+        for device_dsn, static in devices.items()
+    }
+    entry.runtime_data = DeLonghiDehumidifierData(
+        client, scheduler, coordinators, device_infos
+    )
+
+    entry.async_create_background_task(
+        hass, client.token_renewal_loop(), f"{DOMAIN}_token_renewal"
+    )
+
+    if cached_devices is None:
+        await asyncio.gather(
+            *(
+                coordinator.async_config_entry_first_refresh()
+                for coordinator in coordinators.values()
+            )
+        )
+        await _async_start_transports(entry)
+    else:
+        # The entities are created from the cached devices right away, with their
+        # restored properties, instead of holding up the startup
+        for coordinator in coordinators.values():
+            coordinator.async_set_restored()
+        entry.async_create_background_task(
+            hass,
+            _async_start_from_cache(hass, entry, devices_store, cached_devices),
+            f"{DOMAIN}_start",
+        )
+
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     await hass.config_entries.async_forward_entry_setups(entry, _PLATFORMS)
 
     return True
 
 
+async def _async_fetch_devices(client: APIClient) -> dict[str, dict[str, Any]]:
+    """Fetch the devices of the account and their properties.
+
+    Returns:
+      dict: The static properties of every device, indexed by DSN.
+
+    """
+    device_dsns = await client.get_devices()
+    snapshots = await asyncio.gather(
+        *(client.get_properties(device_dsn) for device_dsn in device_dsns)
+    )
+    return {
+        device_dsn: static_properties(snapshot)
+        for device_dsn, snapshot in zip(device_dsns, snapshots)
+    }
+
+
+async def _async_start_from_cache(
+    hass: HomeAssistant,
+    entry: DeLonghiDehumidifierConfigEntry,
+    devices_store: Store[dict[str, dict[str, Any]]],
+    cached_devices: dict[str, dict[str, Any]],
+) -> None:
+    """Refresh the entities created from the cached devices, once the cloud answers.
+
+    The devices are fetched until the cloud answers, backing off between the
+    attempts, and the entry is reloaded if they changed since they were cached.
+    """
+    await asyncio.gather(
+        *(
+            coordinator.async_refresh()
+            for coordinator in entry.runtime_data.coordinators.values()
+        )
+    )
+
+    retry_interval = STARTUP_RETRY_INTERVAL
+    while True:
+        try:
+            async with asyncio.timeout(UPDATE_TIMEOUT.total_seconds()):
+                devices = await _async_fetch_devices(entry.runtime_data.client)
+        except (aiohttp.ClientError, TimeoutError) as err:
+            _LOGGER.warning(
+                "Unable to fetch the devices, retrying in %s: %s",
+                retry_interval,
+                err,
+            )
+        except Exception:
+            # ie: a login rejected by the account service
+            _LOGGER.exception(
+                "Unexpected error fetching the devices, retrying in %s",
+                retry_interval,
+            )
+        else:
+            break
+        await asyncio.sleep(retry_interval.total_seconds())
+        retry_interval = min(retry_interval * 2, STARTUP_RETRY_MAX_INTERVAL)
+
+    if devices != cached_devices:
+        await devices_store.async_save(devices)
+    if devices.keys() != cached_devices.keys():
+        _LOGGER.info("Devices changed since the last start, reloading")
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+        return
+
+    device_registry = dr.async_get(hass)
+    for device_dsn, static in devices.items():
+        device_info = build_device_info(device_dsn, PropertySnapshot(**static))
+        entry.runtime_data.device_infos[device_dsn] = device_info
+        device_registry.async_get_or_create(
+            config_entry_id=entry.entry_id, **device_info
+        )
+
+    await _async_start_transports(entry)
+
+
+async def _async_start_transports(entry: DeLonghiDehumidifierConfigEntry) -> None:
+    """Start the LAN transport and the datastream enabled in the options.
+
+    They are stopped with the client, once the last entry of the account unloads.
+    """
+    client = entry.runtime_data.client
+    if entry.options.get(CONF_LOCAL_LAN, False) and client.lan is None:
+        try:
+            await client.async_start_lan(
+                entry.options.get(CONF_LAN_PORT, DEFAULT_LAN_PORT)
+            )
+        except (aiohttp.ClientError, OSError) as err:
+            # OSError includes the timeouts
+            _LOGGER.warning("Unable to start LAN mode, using the cloud only: %s", err)
+
+    if entry.options.get(CONF_DATASTREAM, False) and not client.datastreams:
+        await client.async_start_datastream()
+
+
 async def async_unload_entry(
     hass: HomeAssistant, entry: DeLonghiDehumidifierConfigEntry
 ) -> bool:
     """Unload a config entry."""
     return await hass.config_entries.async_unload_platforms(entry, _PLATFORMS)
+
+
+async def _async_update_listener(
+    hass: HomeAssistant, entry: DeLonghiDehumidifierConfigEntry
+) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_entry(
+    hass: HomeAssistant, entry: DeLonghiDehumidifierConfigEntry
+) -> None:
+    """Remove the persisted tokens, devices and properties of a removed entry."""
+    await _tokens_store(hass, entry).async_remove()
+    await _devices_store(hass, entry).async_remove()
+    await _properties_store(hass, entry).async_remove()
+
+
+def _tokens_store(
+    hass: HomeAssistant, entry: DeLonghiDehumidifierConfigEntry
+) -> Store[dict[str, Any]]:
+    """Return the store persisting the tokens of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{TOKENS_STORAGE_KEY}.{entry.entry_id}")
+
+
+def _devices_store(
+    hass: HomeAssistant, entry: DeLonghiDehumidifierConfigEntry
+) -> Store[dict[str, dict[str, Any]]]:
+    """Return the store caching the devices of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{DEVICES_STORAGE_KEY}.{entry.entry_id}")
+
+
+def _properties_store(
+    hass: HomeAssistant, entry: DeLonghiDehumidifierConfigEntry
+) -> Store[dict[str, Any]]:
+    """Return the store persisting the properties of the devices of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{PROPERTIES_STORAGE_KEY}.{entry.entry_id}")
@@ -0,0 +1,85 @@
+"""Module providing the registry of the objects shared by the entries of an account."""
+
+from collections.abc import Callable, Collection
+from typing import Any
+
+
+class AccountRegistry[T]:
+    """Objects shared by the config entries of the same account.
+
+    An object is created by the first entry of an account and dropped once the last
+    one released it. Every entry registers the setting it is configured with, the
+    settings of the entries still using the object being applied to it.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._shared: dict[str, T] = {}
+        self._settings: dict[str, dict[str, Any]] = {}
+
+    def _acquire(
+        self, key: str, owner: str, factory: Callable[[], T], setting: Any = None
+    ) -> T:
+        """Return the object of an account, creating it if needed.
+
+        Args:
+          key (str): The key of the account, see account_key.
+          owner (str): The identifier of the config entry using the object.
+          factory (Callable): Creates the object.
+          setting (Any): The setting the entry is configured with.
+
+        Returns:
+          T: The object of the account.
+
+        """
+        if key not in self._shared:
+            self._shared[key] = factory()
+        shared = self._shared[key]
+        settings = self._settings.setdefault(key, {})
+        settings[owner] = setting
+        self._apply(shared, settings.values())
+        return shared
+
+    def release(self, key: str, owner: str) -> None:
+        """Stop using the object of an account, dropping it once unused.
+
+        Args:
+          key (str): The key of the account, see account_key.
+          owner (str): The identifier of the config entry using the object.
+
+        """
+        settings = self._settings.get(key, {})
+        settings.pop(owner, None)
+        if settings:
+            self._apply(self._shared[key], settings.values())
+        else:
+            self._settings.pop(key, None)
+            self._shared.pop(key, None)
+
+    def _in_use(self, key: str) -> bool:
+        """Return True if a config entry uses the object of an account."""
+        return bool(self._settings.get(key))
+
+    def _apply(self, shared: T, settings: Collection[Any]) -> None:
+        """Apply the settings of the entries using an object to it.
+
+        Args:
+          shared (T): The object of the account.
+          settings (Collection): The settings of the entries using the object.
+
+        """
+
+
+class LowestSettingRegistry[T](AccountRegistry[T]):
+    """Objects shared by the entries of an account, enforcing their lowest setting.
+
+    Attributes:
+      attribute (str): The attribute of the objects holding the setting.
+
+    """
+
+    attribute: str
+
+    def _apply(self, shared: T, settings: Collection[Any]) -> None:
+        """Set the lowest setting of the entries on the object."""
+        setattr(shared, self.attribute, min(settings))
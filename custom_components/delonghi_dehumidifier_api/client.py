@@ -1,14 +1,33 @@
 """Module providing a client for interacting with the DeLonghi dehumidifier API."""
 
+import asyncio
 import base64
-from datetime import datetime
+from collections.abc import Callable, Collection, Coroutine, Iterable, Mapping
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime
 from enum import Enum
 import json
 import logging
 import time
-from typing import Final
+from types import MappingProxyType
+from typing import Any, Final, NamedTuple
 import urllib.parse
+
 import aiohttp
+import orjson
+
+from .commands import CommandQueue
+from .datastream import STREAM_URL, Datastream
+from .lan import LanError, LanTransport
+from .metrics import ClientMetrics, endpoint_name
+from .ratelimit import Priority, RateLimiter
+from .resilience import (
+    REQUEST_TIMEOUT,
+    RETRY_ATTEMPTS,
+    CircuitBreaker,
+    is_transient,
+    retry_delay,
+)
 
 # API Docs: https://docs.aylanetworks.com/reference
 
@@ -320,16 +339,279 @@ class FilterStatus(Enum):
 
 FILTER_STATUS_BY_VALUE: Final = {status.value: status for status in FilterStatus}
 
+
+@dataclass(frozen=True, slots=True)
+class Endpoints:
+    """Base URLs of the cloud services the client talks to."""
+
+    ads: str = "https://ads-eu.aylanetworks.com"
+    user_field: str = "https://user-field-eu.aylanetworks.com"
+    gigya_fidm: str = "https://fidm.eu1.gigya.com"
+    gigya_socialize: str = "https://socialize.eu1.gigya.com"
+    gigya_accounts: str = "https://accounts.eu1.gigya.com"
+    consent: str = "https://aylaopenid.delonghigroup.com"
+    stream: str = STREAM_URL
+
+
+DEFAULT_ENDPOINTS: Final = Endpoints()
+
+TOKEN_RENEWAL_MARGIN = 300
+TOKEN_RENEWAL_RETRY_INTERVAL = 60
+
 _LOGGER = logging.getLogger(__name__)
 
 
+async def read_json(response: aiohttp.ClientResponse) -> Any:
+    """Decode the JSON body of a response.
+
+    Args:
+      response (ClientResponse): The response to decode.
+
+    Returns:
+      The decoded JSON body.
+
+    """
+    return orjson.loads(await response.read())
+
+
+def _enum_decoder[E: Enum](enum_by_value: Mapping[int, E]) -> Callable[[Any], E]:
+    """Return a decoder converting a raw property value into an enum member."""
+
+    def decode(value: Any) -> E:
+        return enum_by_value[int(value)]
+
+    return decode
+
+
+PROPERTY_DECODERS: Final[dict[str, Callable[[Any], Any]]] = {
+    "appliance_model": str,
+    "firmware_version": str,
+    "hardware_version": str,
+    "current_humidity": int,
+    "humidity_setpoint": int,
+    "current_speed": int,
+    "device_mode": _enum_decoder(MODE_BY_VALUE),
+    "device_status": _enum_decoder(STATUS_BY_VALUE),
+    "filter_change_alarm": _enum_decoder(OFF_ON_STATUS_BY_VALUE),
+    "filter_life": int,
+    "filter_status": _enum_decoder(FILTER_STATUS_BY_VALUE),
+    "heat_exchanger_temp": int,
+    "room_temp": int,
+    "rotation_speed": int,
+    "swing": _enum_decoder(OFF_ON_STATUS_BY_VALUE),
+    "set_eco": _enum_decoder(OFF_ON_STATUS_BY_VALUE),
+}
+
+
+class PropertyTier(Enum):
+    """Enum representing how often the properties change.
+
+    Attributes:
+      STATIC (str): Metadata that never changes, fetched once per session.
+      SLOW (str): Filter state, slowly changing over days.
+      FAST (str): Live telemetry and settings.
+
+    """
+
+    STATIC = "static"
+    SLOW = "slow"
+    FAST = "fast"
+
+
+PROPERTY_TIERS: Final = {
+    "product_name": PropertyTier.STATIC,
+    "appliance_model": PropertyTier.STATIC,
+    "firmware_version": PropertyTier.STATIC,
+    "hardware_version": PropertyTier.STATIC,
+    "filter_change_alarm": PropertyTier.SLOW,
+    "filter_life": PropertyTier.SLOW,
+    "filter_status": PropertyTier.SLOW,
+}
+
+# Seconds the properties of each tier are cached, None to cache them for the session
+TIER_TTL: Final[dict[PropertyTier, float | None]] = {
+    PropertyTier.STATIC: None,
+    PropertyTier.SLOW: 3600,
+    PropertyTier.FAST: 10,
+}
+
+
+def property_tier(name: str) -> PropertyTier:
+    """Return the refresh tier of a property."""
+    return PROPERTY_TIERS.get(name, PropertyTier.FAST)
+
+
+REAL_FEEL_DATAPOINT: Final = ("activate_realfeel", "AQIDChIXHEY8Mig=")
+
+# Properties written to change the value of another property
+WRITTEN_PROPERTIES: Final = {"set_status": "device_status"}
+
+
+def encode_datapoint(name: str, value: Any) -> tuple[str, Any]:
+    """Encode a property value into the datapoint written to the device.
+
+    Args:
+      name (str): The name of the property.
+      value (Any): The value to set, either a raw value or an enum member.
+
+    Returns:
+      tuple: The name of the property to write and the raw value to write.
+
+    """
+    if name == "device_mode" and value == Mode.REAL_FEEL:
+        return REAL_FEEL_DATAPOINT
+    if isinstance(value, Enum):
+        return name, value.value
+    return name, value
+
+
+class PropertyRecord(NamedTuple):
+    """Compact record of a property value, as received from the device or cloud."""
+
+    name: str
+    value: Any
+    updated_at: str | None
+
+
+def _properties_key(device_dsn: str, tiers: Collection[PropertyTier]) -> str:
+    """Return the key of the single flight fetching some tiers of a device."""
+    return f"properties_{device_dsn}_{'_'.join(tier.value for tier in tiers)}"
+
+
+def _encode_value(value: Any) -> Any:
+    """Encode a decoded property value back into its raw value."""
+    return value.value if isinstance(value, Enum) else value
+
+
+def property_record(device_property: Mapping[str, Any]) -> PropertyRecord:
+    """Reduce a "property" object to the record of its value.
+
+    Args:
+      device_property (Mapping): The property, in the format of properties.json.
+
+    Returns:
+      PropertyRecord: The name, value and update time of the property.
+
+    """
+    return PropertyRecord(
+        device_property.get("name"),
+        device_property.get("value"),
+        device_property.get("data_updated_at"),
+    )
+
+
+def _decode_properties(
+    records: Iterable[PropertyRecord],
+) -> tuple[dict[str, Any], dict[str, datetime | None]]:
+    """Decode the value and update time of every known property."""
+    values: dict[str, Any] = {}
+    data_updated_at: dict[str, datetime | None] = {}
+    for name, value, updated_at in records:
+        decode = PROPERTY_DECODERS.get(name)
+        if decode is None:
+            continue
+
+        try:
+            values[name] = decode(value) if value is not None else None
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.debug("Unable to decode property %s value %s", name, value)
+            values[name] = None
+
+        data_updated_at[name] = (
+            datetime.fromisoformat(updated_at) if updated_at else None
+        )
+
+    return values, data_updated_at
+
+
+@dataclass(frozen=True, slots=True)
+class PropertySnapshot:
+    """Immutable snapshot of the decoded properties of a device.
+
+    Every known property is exposed as an attribute named after the property, with
+    its value already decoded. Properties missing from the response, or with a value
+    that cannot be decoded, are None.
+
+    """
+
+    product_name: str | None = None
+    appliance_model: str | None = None
+    firmware_version: str | None = None
+    hardware_version: str | None = None
+    current_humidity: int | None = None
+    humidity_setpoint: int | None = None
+    current_speed: int | None = None
+    device_mode: Mode | None = None
+    device_status: Status | None = None
+    filter_change_alarm: OffOnStatus | None = None
+    filter_life: int | None = None
+    filter_status: FilterStatus | None = None
+    heat_exchanger_temp: int | None = None
+    room_temp: int | None = None
+    rotation_speed: int | None = None
+    swing: OffOnStatus | None = None
+    set_eco: OffOnStatus | None = None
+    data_updated_at: Mapping[str, datetime | None] = MappingProxyType({})
+
+    @classmethod
+    def from_properties(cls, records: Iterable[PropertyRecord]) -> "PropertySnapshot":
+        """Decode property records into a snapshot.
+
+        Args:
+          records (Iterable): The records of the properties.
+
+        Returns:
+          PropertySnapshot: The decoded snapshot.
+
+        """
+        values, data_updated_at = _decode_properties(records)
+        return cls(**values, data_updated_at=MappingProxyType(data_updated_at))
+
+    def updated(self, records: Iterable[PropertyRecord]) -> "PropertySnapshot":
+        """Return a copy of the snapshot with some properties updated.
+
+        Args:
+          records (Iterable): The records of the updated properties.
+
+        Returns:
+          PropertySnapshot: The updated snapshot.
+
+        """
+        values, data_updated_at = _decode_properties(records)
+        return replace(
+            self,
+            **values,
+            data_updated_at=MappingProxyType(
+                {**self.data_updated_at, **data_updated_at}
+            ),
+        )
+
+
 class APIClient:
     """Client for interacting with the DeLonghi dehumidifier API."""
 
     def __init__(
-        self, session: aiohttp.ClientSession, language: str, email: str, password: str
+        self,
+        session: aiohttp.ClientSession,
+        language: str,
+        email: str,
+        password: str,
+        endpoints: Endpoints | None = None,
+        rate_limiter: RateLimiter | None = None,
     ) -> None:
-        """Initialize."""
+        """Initialize.
+
+        Args:
+          session (aiohttp.ClientSession): The session to send the requests with.
+          language (str): The language of the account.
+          email (str): The email of the account.
+          password (str): The password of the account.
+          endpoints (Endpoints): The URLs of the cloud services.
+          rate_limiter (RateLimiter): The limiter shared by the clients of the
+            account, a limiter of its own if omitted.
+
+        """
+        self.endpoints = endpoints or DEFAULT_ENDPOINTS
         self.language = language
         self.email = email
         self.password = password
@@ -337,9 +619,169 @@ class APIClient:
         self.refresh_token = None
         self.access_token = None
         self.token_expiry = time.time()
-        self.device_properties = None
-        self.device_properties_timestamp = 0.0
-        self.device_dsn = None
+        self.device_properties: dict[str, PropertySnapshot] = {}
+        self.device_properties_timestamp: dict[str, dict[PropertyTier, float]] = {}
+        # When the restored properties of a device were fetched, until refetched
+        self.restored_properties: dict[str, float] = {}
+        self.devices: dict[str, dict] | None = None
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._revalidations: dict[str, asyncio.Task] = {}
+        self._command_queues: dict[str, CommandQueue] = {}
+        self._token_listeners: list[Callable[[], None]] = []
+        self._properties_listeners: list[Callable[[str, PropertySnapshot], None]] = []
+        self._snapshot_listeners: list[Callable[[], None]] = []
+        self._datastream_listeners: list[Callable[[str, bool], None]] = []
+        self._auth_lock = asyncio.Lock()
+        self.batch_datapoints_supported = True
+        self.properties_filter_supported = True
+        self.required_properties: dict[str, frozenset[str]] = {}
+        self.request_count = 0
+        self.metrics = ClientMetrics()
+        self.breaker = CircuitBreaker()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.lan: LanTransport | None = None
+        self.datastreams: dict[str, Datastream] = {}
+
+    def export_tokens(self) -> dict[str, Any]:
+        """Export the current tokens so they can be persisted.
+
+        Returns:
+          dict: The access token, refresh token and access token expiry timestamp.
+
+        """
+        return {
+            "access_token": self.access_token,
+            "refresh_token": self.refresh_token,
+            "token_expiry": self.token_expiry,
+        }
+
+    def restore_tokens(self, tokens: Mapping[str, Any]) -> None:
+        """Restore tokens previously returned by export_tokens.
+
+        A valid access token is used as is, an expired one is renewed with the
+        refresh token instead of performing the full login.
+
+        Args:
+          tokens (Mapping): The tokens returned by export_tokens.
+
+        """
+        self.access_token = tokens.get("access_token")
+        self.refresh_token = tokens.get("refresh_token")
+        self.token_expiry = float(tokens.get("token_expiry") or time.time())
+
+    def export_properties(self) -> dict[str, Any]:
+        """Export the cached properties of the devices so they can be persisted.
+
+        Returns:
+          dict: The raw value and update time of the properties of every device,
+            with the time they were fetched, indexed by DSN.
+
+        """
+        exported = {}
+        for device_dsn, snapshot in self.device_properties.items():
+            fetched_at = self.device_properties_timestamp.get(device_dsn)
+            exported[device_dsn] = {
+                "fetched_at": (
+                    max(fetched_at.values())
+                    if fetched_at
+                    else self.restored_properties.get(device_dsn)
+                ),
+                "product_name": snapshot.product_name,
+                "properties": [
+                    [name, _encode_value(value), updated_at.isoformat()]
+                    for name, updated_at in snapshot.data_updated_at.items()
+                    if updated_at is not None
+                    and (value := getattr(snapshot, name)) is not None
+                ],
+            }
+        return exported
+
+    def restore_properties(self, exported: Mapping[str, Any]) -> None:
+        """Restore properties previously returned by export_properties.
+
+        The restored properties are served until they are fetched again, but never
+        considered fresh: the next read of a device still fetches its properties.
+
+        Args:
+          exported (Mapping): The properties returned by export_properties.
+
+        """
+        for device_dsn, device in exported.items():
+            if device_dsn in self.device_properties or not device.get("fetched_at"):
+                continue
+            snapshot = PropertySnapshot.from_properties(
+                PropertyRecord(*record) for record in device["properties"]
+            )
+            self.device_properties[device_dsn] = replace(
+                snapshot, product_name=device.get("product_name")
+            )
+            self.restored_properties[device_dsn] = device["fetched_at"]
+
+    def add_token_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Register a listener called every time new tokens are obtained.
+
+        Args:
+          listener (Callable): The function to call.
+
+        Returns:
+          Callable: A function removing the listener.
+
+        """
+        self._token_listeners.append(listener)
+        return lambda: self._token_listeners.remove(listener)
+
+    def add_properties_listener(
+        self, listener: Callable[[str, PropertySnapshot], None]
+    ) -> Callable[[], None]:
+        """Register a listener called every time properties are pushed by a device.
+
+        Args:
+          listener (Callable): The function to call with the DSN of the device and
+            its updated properties.
+
+        Returns:
+          Callable: A function removing the listener.
+
+        """
+        self._properties_listeners.append(listener)
+        return lambda: self._properties_listeners.remove(listener)
+
+    def add_snapshot_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Register a listener called every time the cached properties change.
+
+        Args:
+          listener (Callable): The function to call.
+
+        Returns:
+          Callable: A function removing the listener.
+
+        """
+        self._snapshot_listeners.append(listener)
+        return lambda: self._snapshot_listeners.remove(listener)
+
+    def add_datastream_listener(
+        self, listener: Callable[[str, bool], None]
+    ) -> Callable[[], None]:
+        """Register a listener called every time a datastream connects or disconnects.
+
+        Args:
+          listener (Callable): The function to call with the DSN of the device and
+            whether its datastream is connected.
+
+        Returns:
+          Callable: A function removing the listener.
+
+        """
+        self._datastream_listeners.append(listener)
+        return lambda: self._datastream_listeners.remove(listener)
+
+    def _set_tokens(self, access_token: str, refresh_token: str, expires_in) -> None:
+        """Store newly obtained tokens and notify the token listeners."""
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.token_expiry = time.time() + int(expires_in)
+        for listener in self._token_listeners:
+            listener()
 
     async def authenticate(self) -> bool:
         """Authenticate with the DeLonghi service.
@@ -356,196 +798,183 @@ class APIClient:
             return False
         return True
 
-    async def get_product_name(self) -> str:
+    async def get_product_name(self, device_dsn: str) -> str:
         """Retrieve the pretty product name defined by the user when setting up the device.
 
-        This method fetches the properties of the product and returns the value
-        associated with the "product_name" key from the first property in the list.
-
         Returns:
             str: The product name.
 
         """
-        properties = await self.get_properties()
-        return properties[0].get("product_name")
+        return (
+            await self.get_properties(device_dsn, [PropertyTier.STATIC])
+        ).product_name
 
-    async def get_appliance_model(self) -> str:
+    async def get_appliance_model(self, device_dsn: str) -> str:
         """Retrieve the appliance model.
 
         Returns:
             str: The model of the appliance.
 
         """
-        return await self.get_str_property("appliance_model")
+        return (
+            await self.get_properties(device_dsn, [PropertyTier.STATIC])
+        ).appliance_model
 
-    async def get_firmware_version(self) -> str:
+    async def get_firmware_version(self, device_dsn: str) -> str:
         """Retrieve the firmware version of the device.
 
         Returns:
             str: The firmware version of the device.
 
         """
-        return await self.get_str_property("firmware_version")
+        return (
+            await self.get_properties(device_dsn, [PropertyTier.STATIC])
+        ).firmware_version
 
-    async def get_hardware_version(self) -> str:
+    async def get_hardware_version(self, device_dsn: str) -> str:
         """Retrieve the hardware version of the device.
 
         Returns:
             str: The hardware version of the device.
 
         """
-        return await self.get_str_property("hardware_version")
+        return (
+            await self.get_properties(device_dsn, [PropertyTier.STATIC])
+        ).hardware_version
 
-    async def get_current_humidity(self) -> int:
+    async def get_current_humidity(self, device_dsn: str) -> int:
         """Retrieve the current humidity property of the dehumidifier.
 
         Returns:
           int: The current humidity property value as an integer between 0 and 100.
 
         """
-        current_humidity = await self.get_int_property("current_humidity")
-        return int(current_humidity)
+        return (await self.get_properties(device_dsn)).current_humidity
 
-    async def get_humidity_setpoint(self) -> int:
+    async def get_humidity_setpoint(self, device_dsn: str) -> int:
         """Retrieve the humidity setpoint property of the dehumidifier.
 
         Returns:
           int: The humidity setpoint property value as an integer between 0 and 100.
 
         """
-        humidity_setpoint = await self.get_int_property("humidity_setpoint")
-        return int(humidity_setpoint)
+        return (await self.get_properties(device_dsn)).humidity_setpoint
 
-    async def get_current_speed(self) -> int:
+    async def get_current_speed(self, device_dsn: str) -> int:
         """Retrieve the current speed property of the dehumidifier.
 
         Returns:
           int: The current speed property value as an integer.
 
         """
-        current_speed = await self.get_int_property("current_speed")
-        return int(current_speed)
+        return (await self.get_properties(device_dsn)).current_speed
 
-    async def get_device_mode(self) -> Mode:
+    async def get_device_mode(self, device_dsn: str) -> Mode:
         """Retrieve the device mode property of the dehumidifier.
 
         Returns:
           int: The device mode property value as an integer.
 
         """
-        device_mode = await self.get_int_property("device_mode")
-        return MODE_BY_VALUE[device_mode]
+        return (await self.get_properties(device_dsn)).device_mode
 
-    async def get_device_status(self) -> Status:
+    async def get_device_status(self, device_dsn: str) -> Status:
         """Retrieve the device status property of the dehumidifier.
 
         Returns:
           int: The device status property value as an integer.
 
         """
-        device_status = await self.get_int_property("device_status")
-        return STATUS_BY_VALUE[device_status]
+        return (await self.get_properties(device_dsn)).device_status
 
-    async def get_filter_change_alarm(self) -> OffOnStatus:
+    async def get_filter_change_alarm(self, device_dsn: str) -> OffOnStatus:
         """Retrieve the filter change alarm property of the dehumidifier.
 
         Returns:
           int: The filter change alarm property value as an integer.
 
         """
-        filter_change_alarm = await self.get_int_property("filter_change_alarm")
-        return OFF_ON_STATUS_BY_VALUE[filter_change_alarm]
+        return (await self.get_properties(device_dsn)).filter_change_alarm
 
-    async def get_filter_life(self) -> int:
+    async def get_filter_life(self, device_dsn: str) -> int:
         """Retrieve the filter life property of the dehumidifier.
 
         Returns:
           int: The filter life property value as an integer.
 
         """
-        return await self.get_int_property("filter_life")
+        return (await self.get_properties(device_dsn)).filter_life
 
-    async def get_filter_status(self) -> FilterStatus:
+    async def get_filter_status(self, device_dsn: str) -> FilterStatus:
         """Retrieve the filter status property of the dehumidifier.
 
         Returns:
           int: The filter status property value as an integer.
 
         """
-        filter_status = await self.get_int_property("filter_status")
-        return FILTER_STATUS_BY_VALUE[filter_status]
+        return (await self.get_properties(device_dsn)).filter_status
 
-    async def get_heat_exchanger_temp(self) -> int:
+    async def get_heat_exchanger_temp(self, device_dsn: str) -> int:
         """Retrieve the heat exchanger temperature property of the dehumidifier.
 
         Returns:
           int: The heat exchanger temperature property value as an integer.
 
         """
-        return await self.get_int_property("heat_exchanger_temp")
+        return (await self.get_properties(device_dsn)).heat_exchanger_temp
 
-    async def get_room_temp(self) -> int:
+    async def get_room_temp(self, device_dsn: str) -> int:
         """Retrieve the room temperature property of the dehumidifier.
 
         Returns:
           int: The room temperature property value as an integer.
 
         """
-        return await self.get_int_property("room_temp")
+        return (await self.get_properties(device_dsn)).room_temp
 
-    async def get_rotation_speed(self) -> int:
+    async def get_rotation_speed(self, device_dsn: str) -> int:
         """Retrieve the rotation speed property of the dehumidifier.
 
         Returns:
           int: The rotation speed property value as an integer.
 
         """
-        return await self.get_int_property("rotation_speed")
+        return (await self.get_properties(device_dsn)).rotation_speed
 
-    async def get_swing(self) -> OffOnStatus:
+    async def get_swing(self, device_dsn: str) -> OffOnStatus:
         """Retrieve the swing property of the dehumidifier.
 
         Returns:
           int: The swing property value as an integer.
 
         """
-        swing = await self.get_int_property("swing")
-        return OFF_ON_STATUS_BY_VALUE[swing]
+        return (await self.get_properties(device_dsn)).swing
 
-    async def get_eco(self) -> OffOnStatus:
+    async def get_eco(self, device_dsn: str) -> OffOnStatus:
         """Retrieve the eco property of the dehumidifier.
 
         Returns:
           int: The eco property value as an integer.
 
         """
-        eco = await self.get_int_property("set_eco")
-        return OFF_ON_STATUS_BY_VALUE[eco]
+        return (await self.get_properties(device_dsn)).set_eco
 
-    async def set_status(self, status: Status) -> dict:
+    async def set_status(self, device_dsn: str, status: Status) -> list[dict]:
         """Set the operation status.
 
         - 1 On
         - 2 Off
         """
-        device_dsn = await self.get_first_device()
-        return await self.post_request(
-            f"apiv1/dsns/{device_dsn}/properties/set_status/datapoints.json",
-            {"datapoint": {"value": status.value}},
-        )
+        return await self.set_properties(device_dsn, {"set_status": status})
 
-    async def set_humidity(self, value: int) -> dict:
+    async def set_humidity(self, device_dsn: str, value: int) -> list[dict]:
         """Set the target humidity level.
 
         - [0,100] %
         """
-        device_dsn = await self.get_first_device()
-        return await self.post_request(
-            f"apiv1/dsns/{device_dsn}/properties/humidity_setpoint/datapoints.json",
-            {"datapoint": {"value": value}},
-        )
+        return await self.set_properties(device_dsn, {"humidity_setpoint": value})
 
-    async def set_mode(self, mode: Mode) -> dict:
+    async def set_mode(self, device_dsn: str, mode: Mode) -> list[dict]:
         """Set the operation mode.
 
         - 1   Dehumidifier
@@ -553,41 +982,184 @@ class APIClient:
         - 3   Air purifier
         - 100 Real Feel
         """
-        device_dsn = await self.get_first_device()
-
-        if mode == Mode.REAL_FEEL:
-            return await self.post_request(
-                f"apiv1/dsns/{device_dsn}/properties/activate_realfeel/datapoints.json",
-                {"datapoint": {"value": "AQIDChIXHEY8Mig="}},
-            )
+        return await self.set_properties(device_dsn, {"device_mode": mode})
 
-        return await self.post_request(
-            f"apiv1/dsns/{device_dsn}/properties/device_mode/datapoints.json",
-            {"datapoint": {"value": mode.value}},
-        )
-
-    async def set_swing(self, status: OffOnStatus) -> dict:
+    async def set_swing(self, device_dsn: str, status: OffOnStatus) -> list[dict]:
         """Set the swing operation mode.
 
         - 0 Off
         - 1 On
         """
-        device_dsn = await self.get_first_device()
-        return await self.post_request(
-            f"apiv1/dsns/{device_dsn}/properties/swing/datapoints.json",
-            {"datapoint": {"value": status.value}},
-        )
+        return await self.set_properties(device_dsn, {"swing": status})
 
-    async def set_eco(self, status: OffOnStatus) -> dict:
+    async def set_eco(self, device_dsn: str, status: OffOnStatus) -> list[dict]:
         """Set the eco operation mode.
 
         - 0 Off
         - 1 On
         """
-        device_dsn = await self.get_first_device()
-        return await self.post_request(
-            f"apiv1/dsns/{device_dsn}/properties/set_eco/datapoints.json",
-            {"datapoint": {"value": status.value}},
+        return await self.set_properties(device_dsn, {"set_eco": status})
+
+    async def set_properties(
+        self, device_dsn: str, properties: Mapping[str, Any]
+    ) -> list[dict]:
+        """Set multiple properties of the device at once.
+
+        Writes to a device are queued: writes submitted within a short window are
+        merged into a single command where the latest value of each property wins,
+        commands are sent in order, and properties whose cached value already is
+        the requested one are skipped.
+
+        A single property is written with its datapoints endpoint. Multiple
+        properties are written in a single request to the batch datapoints endpoint,
+        or concurrently with their datapoints endpoints if batch requests are
+        rejected by the server.
+
+        Once written, the values are applied to the cached properties and forwarded
+        to the properties listeners, until the next read reconciles them with the
+        device.
+
+        Args:
+          device_dsn (str): The DSN of the device.
+          properties (Mapping): The values to set, indexed by property name, in the
+            order they should be applied. Enum values are sent as their value.
+
+        Returns:
+          list: The JSON responses from the server.
+
+        """
+        queue = self._command_queues.get(device_dsn)
+        if queue is None:
+            queue = self._command_queues[device_dsn] = CommandQueue(
+                lambda properties: self._write_properties(device_dsn, properties),
+                lambda name, value: self._is_current_value(device_dsn, name, value),
+            )
+        return await queue.submit(properties)
+
+    async def _write_properties(
+        self, device_dsn: str, properties: Mapping[str, Any]
+    ) -> list[dict]:
+        """Write properties to the device and apply them to the cache."""
+        datapoints = [
+            encode_datapoint(name, value) for name, value in properties.items()
+        ]
+        try:
+            responses = await self._write_datapoints(device_dsn, datapoints)
+        finally:
+            # The next read reconciles the written values with the device
+            self.invalidate_properties(device_dsn, [PropertyTier.FAST])
+
+        self._apply_written_properties(device_dsn, properties)
+        return responses
+
+    def _is_current_value(self, device_dsn: str, name: str, value: Any) -> bool:
+        """Return True if the cached value of a property is the given value.
+
+        The cached value is only trusted while the device pushes its changes, or
+        while it is fresh: fetched, written or pushed within the TTL of its tier.
+        """
+        snapshot = self.device_properties.get(device_dsn)
+        name = WRITTEN_PROPERTIES.get(name, name)
+        decode = PROPERTY_DECODERS.get(name)
+        if snapshot is None or decode is None:
+            return False
+        if device_dsn in self.restored_properties:
+            # Restored values may have changed since they were fetched
+            return False
+        if not self._is_pushing(device_dsn) and not self._is_fresh(
+            device_dsn, snapshot, name
+        ):
+            # The value may have been changed on the device since
+            return False
+        try:
+            decoded = decode(_encode_value(value))
+        except (KeyError, TypeError, ValueError):
+            return False
+        return getattr(snapshot, name) == decoded
+
+    def _is_pushing(self, device_dsn: str) -> bool:
+        """Return True if the changes of the device are pushed as they happen."""
+        return self.is_streaming(device_dsn) or (
+            self.lan is not None and self.lan.is_connected(device_dsn)
+        )
+
+    def _is_fresh(self, device_dsn: str, snapshot: PropertySnapshot, name: str) -> bool:
+        """Return True if the cached value of a property is within its tier TTL."""
+        tier = property_tier(name)
+        if not self._stale_tiers(device_dsn, [tier]):
+            return True
+        updated_at = snapshot.data_updated_at.get(name)
+        return (
+            updated_at is not None
+            and (ttl := TIER_TTL[tier]) is not None
+            and time.time() - updated_at.timestamp() < ttl
+        )
+
+    def _apply_written_properties(
+        self, device_dsn: str, properties: Mapping[str, Any]
+    ) -> None:
+        """Apply written values to the cached properties, ahead of the next read."""
+        updated_at = datetime.now(UTC).isoformat()
+        self._apply_records(
+            device_dsn,
+            [
+                PropertyRecord(
+                    WRITTEN_PROPERTIES.get(name, name),
+                    _encode_value(value),
+                    updated_at,
+                )
+                for name, value in properties.items()
+            ],
+        )
+
+    async def _write_datapoints(
+        self, device_dsn: str, datapoints: list[tuple[str, Any]]
+    ) -> list[dict]:
+        """Write encoded datapoints over the LAN or the cloud."""
+        if self.lan is not None and self.lan.is_connected(device_dsn):
+            try:
+                await self.lan.set_properties(device_dsn, datapoints)
+            except LanError as err:
+                _LOGGER.debug(
+                    "LAN write to %s failed, using the cloud: %s", device_dsn, err
+                )
+            else:
+                return []
+
+        if len(datapoints) > 1 and self.batch_datapoints_supported:
+            try:
+                return await self.post_request(
+                    "apiv1/batch_datapoints.json",
+                    {
+                        "batch_datapoints": [
+                            {
+                                "dsn": device_dsn,
+                                "name": name,
+                                "datapoint": {"value": value},
+                            }
+                            for name, value in datapoints
+                        ]
+                    },
+                )
+            except aiohttp.ClientResponseError as err:
+                if err.status not in (400, 404, 405):
+                    raise
+                _LOGGER.debug(
+                    "Batch datapoints rejected with status %s, using datapoints",
+                    err.status,
+                )
+                self.batch_datapoints_supported = False
+
+        return list(
+            await asyncio.gather(
+                *(
+                    self.post_request(
+                        f"apiv1/dsns/{device_dsn}/properties/{name}/datapoints.json",
+                        {"datapoint": {"value": value}},
+                    )
+                    for name, value in datapoints
+                )
+            )
         )
 
     async def get_access_token(self):
@@ -600,20 +1172,63 @@ class APIClient:
           str: The access token.
 
         """
-        if (
-            self.access_token is not None
-            and self.access_token != ""
-            and self.token_expiry > time.time()
-        ):
+        if self.has_valid_access_token():
             _LOGGER.debug("Using existing access token")
             return self.access_token
 
-        return await self.get_new_access_token()
+        return await self._single_flight("access_token", self._renew_access_token)
+
+    def has_valid_access_token(self, margin: float = 0) -> bool:
+        """Check if the access token is available and does not expire soon.
+
+        Args:
+          margin (float): The number of seconds the token must still be valid for.
+
+        Returns:
+          bool: True if the access token is valid for at least the margin.
+
+        """
+        return bool(self.access_token) and self.token_expiry - margin > time.time()
+
+    async def _renew_access_token(self) -> str:
+        """Renew the access token, making sure a single refresh or login runs at a time.
+
+        Returns:
+          str: The access token.
+
+        """
+        async with self._auth_lock:
+            if self.has_valid_access_token(TOKEN_RENEWAL_MARGIN):
+                return self.access_token
+
+            return await self.get_new_access_token()
+
+    async def token_renewal_loop(self) -> None:
+        """Renew the access token in the background before it expires.
+
+        The token is renewed TOKEN_RENEWAL_MARGIN seconds before its expiry, so
+        requests never have to wait for a refresh or login in steady state.
+        Failed renewals are retried every TOKEN_RENEWAL_RETRY_INTERVAL seconds.
+
+        """
+        while True:
+            delay = self.token_expiry - TOKEN_RENEWAL_MARGIN - time.time()
+            await asyncio.sleep(max(delay, 0))
+            try:
+                await self._single_flight("access_token", self._renew_access_token)
+            except Exception:
+                _LOGGER.warning(
+                    "Failed renewing access token, retrying in %s seconds",
+                    TOKEN_RENEWAL_RETRY_INTERVAL,
+                    exc_info=True,
+                )
+                await asyncio.sleep(TOKEN_RENEWAL_RETRY_INTERVAL)
 
     async def get_new_access_token(self):
         """Retrieve a new access token using the refresh token if available.
 
-        If no refresh token is available or the refresh token fails, it falls back to performing login and token acquisition.
+        If no refresh token is available or the refresh token is rejected, it falls back to performing login and token acquisition.
+        Other failures (ie: server errors) are raised, as a login would not succeed either.
 
         Returns:
           str: The new access token.
@@ -624,30 +1239,29 @@ class APIClient:
             return await self.get_new_refresh_token()
 
         _LOGGER.debug("Getting new access token")
+        self.metrics.token_refreshes += 1
         # Attempt to use the refresh token to get a new access token
-        url = "https://user-field-eu.aylanetworks.com/users/refresh_token.json"
+        url = f"{self.endpoints.user_field}/users/refresh_token.json"
         headers = {
             "User-Agent": TOKEN_USER_AGENT,
             "Content-Type": "application/json",
         }
         body = {"user": {"refresh_token": self.refresh_token}}
         response = await self.session.post(url, headers=headers, json=body)
-        response = await response.json()
 
-        if response.status != 200:
-            _LOGGER.error(
-                "Failed retrieving new access token with response: %s", response
+        if response.status in (400, 401, 403, 404):
+            _LOGGER.warning(
+                "Refresh token rejected with status %s, falling back to login",
+                response.status,
             )
-            _LOGGER.error("Falling back to login")
             return await self.get_new_refresh_token()
 
-        data = await response.json()
-
-        self.refresh_token = data["refresh_token"]
-        self.access_token = data["access_token"]
-        self.token_expiry = time.time() + int(data["expires_in"])
+        response.raise_for_status()
+        data = await read_json(response)
 
-        _LOGGER.debug("data get_new_access_token: %s", data)
+        self._set_tokens(
+            data["access_token"], data["refresh_token"], data["expires_in"]
+        )
 
         return self.access_token
 
@@ -673,9 +1287,10 @@ class APIClient:
         """
 
         _LOGGER.debug("Getting new refresh token")
+        self.metrics.logins += 1
 
         # Step 1: Start authentication process
-        url = f"https://fidm.eu1.gigya.com/oidc/op/v1.0/{API_KEY}/authorize"
+        url = f"{self.endpoints.gigya_fidm}/oidc/op/v1.0/{API_KEY}/authorize"
         headers = {"User-Agent": BROWSER_USER_AGENT}
         params = {
             "client_id": CLIENT_ID,
@@ -691,7 +1306,7 @@ class APIClient:
         context = await self.get_query_param(location, "context")
 
         # Step 2: Fetch Gigya session data
-        url = "https://socialize.eu1.gigya.com/socialize.getIDs"
+        url = f"{self.endpoints.gigya_socialize}/socialize.getIDs"
         headers = {"User-Agent": BROWSER_USER_AGENT}
         params = {
             "APIKey": API_KEY,
@@ -702,8 +1317,7 @@ class APIClient:
             "format": "json",
         }
         response = await self.session.get(url, headers=headers, params=params)
-        response = await response.text()
-        response = json.loads(response)
+        response = await read_json(response)
 
         ucid = response["ucid"]
         gmid = response["gmid"]
@@ -754,7 +1368,7 @@ class APIClient:
             }
         )
 
-        url = "https://accounts.eu1.gigya.com/accounts.login"
+        url = f"{self.endpoints.gigya_accounts}/accounts.login"
         headers = {"User-Agent": BROWSER_USER_AGENT}
         data = {
             "loginID": self.email,
@@ -777,13 +1391,12 @@ class APIClient:
             "format": "json",
         }
         response = await self.session.post(url, headers=headers, data=data)
-        response = await response.text()
-        response = json.loads(response)
+        response = await read_json(response)
 
         login_token = response["sessionInfo"]["login_token"]
 
         # Step 4: Get user info
-        url = "https://socialize.eu1.gigya.com/socialize.getUserInfo"
+        url = f"{self.endpoints.gigya_socialize}/socialize.getUserInfo"
         headers = {"User-Agent": BROWSER_USER_AGENT}
         data = {
             "enabledProviders": "*",
@@ -798,15 +1411,14 @@ class APIClient:
             "format": "json",
         }
         response = await self.session.post(url, headers=headers, data=data)
-        response = await response.text()
-        response = json.loads(response)
+        response = await read_json(response)
 
         user_uid = response["UID"]
         user_uid_signature = response["UIDSignature"]
         user_signature_timestamp = response["signatureTimestamp"]
 
         # Step 5: Consent
-        url = "https://aylaopenid.delonghigroup.com/OIDCConsentPage.php"
+        url = f"{self.endpoints.consent}/OIDCConsentPage.php"
         headers = {"User-Agent": BROWSER_USER_AGENT}
         params = {
             "lang": self.language,
@@ -823,7 +1435,7 @@ class APIClient:
         signature = response.split("const consentObj2Sig = '")[1].split("';")[0]
 
         # Step 6: Authorization
-        url = f"https://fidm.eu1.gigya.com/oidc/op/v1.0/{API_KEY}/authorize/continue"
+        url = f"{self.endpoints.gigya_fidm}/oidc/op/v1.0/{API_KEY}/authorize/continue"
         headers = {"User-Agent": BROWSER_USER_AGENT}
         params = {
             "context": context,
@@ -848,7 +1460,7 @@ class APIClient:
         code = await self.get_query_param(location, "code")
 
         # Step 7: Get IDP access token
-        url = f"https://fidm.eu1.gigya.com/oidc/op/v1.0/{API_KEY}/token"
+        url = f"{self.endpoints.gigya_fidm}/oidc/op/v1.0/{API_KEY}/token"
         headers = {
             "User-Agent": TOKEN_USER_AGENT,
             "Authorization": AUTHORIZATION_HEADER,
@@ -860,13 +1472,12 @@ class APIClient:
             "redirect_uri": "https://google.it",
         }
         response = await self.session.post(url, headers=headers, data=data)
-        response = await response.text()
-        response = json.loads(response)
+        response = await read_json(response)
 
         idp_token = response["access_token"]
 
         # Step 8: Exchange IDP token for Ayla token
-        url = "https://user-field-eu.aylanetworks.com/api/v1/token_sign_in"
+        url = f"{self.endpoints.user_field}/api/v1/token_sign_in"
         headers = {"User-Agent": TOKEN_USER_AGENT}
         data = {
             "app_id": APP_ID,
@@ -874,18 +1485,19 @@ class APIClient:
             "token": idp_token,
         }
         response = await self.session.post(url, headers=headers, data=data)
-        response = await response.text()
-        response = json.loads(response)
+        response = await read_json(response)
 
-        self.access_token = response["access_token"]
-        self.refresh_token = response["refresh_token"]
-        self.token_expiry = time.time() + int(response["expires_in"])
+        self._set_tokens(
+            response["access_token"], response["refresh_token"], response["expires_in"]
+        )
 
         return self.access_token
 
     async def get_request(self, path: str) -> dict:
         """Send a GET request to the specified path.
 
+        Transient failures are retried with an exponential backoff, see _request.
+
         Args:
           path (str): The API endpoint path to send the GET request to.
 
@@ -893,18 +1505,14 @@ class APIClient:
           dict: The JSON response from the API.
 
         """
-        url = f"https://ads-eu.aylanetworks.com/{path}"
-        access_token = await self.get_access_token()
-        headers = {
-            "User-Agent": API_USER_AGENT,
-            "Authorization": f"auth_token {access_token}",
-        }
-        response = await self.session.get(url, headers=headers)
-        return await response.json()
+        return await self._request("GET", path, idempotent=True)
 
     async def post_request(self, path: str, body: dict) -> dict:
         """Send a POST request to the specified path with the given body.
 
+        Only requests rejected with a 429 status are retried, as the server did not
+        process them.
+
         Args:
           path (str): The API endpoint path to send the request to.
           body (dict): The JSON-serializable body to include in the request.
@@ -913,107 +1521,583 @@ class APIClient:
           dict: The JSON response from the server.
 
         """
+        return await self._request(
+            "POST",
+            path,
+            idempotent=False,
+            headers={"Content-Type": "application/json"},
+            json=body,
+        )
 
-        url = f"https://ads-eu.aylanetworks.com/{path}"
-        access_token = await self.get_access_token()
-        headers = {
-            "User-Agent": API_USER_AGENT,
-            "Authorization": f"auth_token {access_token}",
-            "Content-Type": "application/json",
-        }
-        response = await self.session.post(url, headers=headers, json=body)
-        return await response.json()
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        idempotent: bool,
+        headers: Mapping[str, str] | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Send a request to the ADS, retrying it and tracking the cloud health.
+
+        Idempotent requests failing with a connection error, a timeout or a 5xx
+        status are retried with an exponential backoff and jitter, and every request
+        rejected with a 429 status is retried once the Retry-After delay elapsed.
+        After repeated failures the circuit breaker opens and requests fail right
+        away until the cloud recovers. A request rejected with a 401 status is sent
+        once more with a renewed access token. Every attempt waits for the rate limiter of
+        the account, writes going before reads.
 
-    async def get_first_device(self) -> str:
-        """Retrieve the first device's DSN (Device Serial Number).
+        Args:
+          method (str): The HTTP method of the request.
+          path (str): The API endpoint path to send the request to.
+          idempotent (bool): True if the request can be sent again safely.
+          headers (Mapping): The headers to add to the authentication headers.
+          **kwargs: The arguments of the request, ie: json.
+
+        Returns:
+          The JSON response from the server.
+
+        Raises:
+          CircuitOpenError: The breaker is open.
+          aiohttp.ClientResponseError: The server answered with an error status.
 
-        If the device DSN is already cached in the instance, it returns the cached value.
-        Otherwise, it makes a request to fetch the list of devices,
-        caches the DSN of the first device, and returns it.
+        """
+        url = f"{self.endpoints.ads}/{path}"
+        attempt = 0
+        reauthenticated = False
+        while True:
+            attempt += 1
+            trial = self.breaker.before_request()
+            try:
+                await self.rate_limiter.acquire(
+                    Priority.COMMAND if method == "POST" else Priority.POLL
+                )
+                access_token = await self.get_access_token()
+                request_headers = {
+                    "User-Agent": API_USER_AGENT,
+                    "Authorization": f"auth_token {access_token}",
+                    **(headers or {}),
+                }
+                retry_after = None
+                try:
+                    response = await self._send(
+                        method,
+                        path,
+                        url,
+                        headers=request_headers,
+                        timeout=REQUEST_TIMEOUT,
+                        **kwargs,
+                    )
+                    retry_after = response.headers.get("Retry-After")
+                    response.raise_for_status()
+                    data = await read_json(response)
+                except (aiohttp.ClientError, TimeoutError) as err:
+                    if (
+                        isinstance(err, aiohttp.ClientResponseError)
+                        and err.status == 401
+                        and not reauthenticated
+                    ):
+                        # The access token was revoked, ie: a restored one, renew it
+                        # and send the request once more
+                        self.breaker.record_success()
+                        reauthenticated = True
+                        if self.access_token == access_token:
+                            self.access_token = None
+                        continue
+                    if not is_transient(err):
+                        # The cloud is up, the request itself is wrong
+                        self.breaker.record_success()
+                        raise
+                    self.breaker.record_failure()
+
+                    rate_limited = (
+                        isinstance(err, aiohttp.ClientResponseError)
+                        and err.status == 429
+                    )
+                    delay = (
+                        retry_delay(attempt, retry_after)
+                        if (idempotent or rate_limited) and attempt < RETRY_ATTEMPTS
+                        else None
+                    )
+                    if delay is None or self.breaker.is_open:
+                        raise
+                    _LOGGER.debug(
+                        "Request to %s failed (%s), retrying in %.1f seconds",
+                        endpoint_name(path),
+                        err,
+                        delay,
+                    )
+                    await asyncio.sleep(delay)
+                else:
+                    self.breaker.record_success()
+                    return data
+            finally:
+                if trial:
+                    # Free the trial slot of an attempt ending without an outcome
+                    self.breaker.end_trial()
+
+    async def _send(
+        self, method: str, path: str, url: str, **kwargs: Any
+    ) -> aiohttp.ClientResponse:
+        """Send a request to the cloud, recording its metrics."""
+        endpoint = endpoint_name(path)
+        self.request_count += 1
+        start = time.monotonic()
+        try:
+            response = await self.session.request(method, url, **kwargs)
+        except (aiohttp.ClientError, TimeoutError) as err:
+            self.metrics.record_request(
+                endpoint, time.monotonic() - start, type(err).__name__
+            )
+            raise
+        self.metrics.record_request(
+            endpoint,
+            time.monotonic() - start,
+            response.status if response.status >= 400 else None,
+        )
+        return response
+
+    def stats(self) -> dict[str, Any]:
+        """Return the metrics of the requests sent by the client.
 
         Returns:
-          str: The DSN of the first device.
+          dict: The request, error and latency metrics overall and per endpoint, the
+            properties cache hits and misses, the login and token refresh counts and
+            the state of the rate limiter of the account.
+
+        """
+        return self.metrics.as_dict() | {"rate_limit": self.rate_limiter.as_dict()}
+
+    async def get_devices(self) -> list[str]:
+        """Retrieve the DSNs (Device Serial Numbers) of every device in the account.
+
+        If the devices are already cached in the instance, it returns the cached DSNs.
+        Otherwise, it makes a request to fetch the list of devices and caches them.
+
+        Returns:
+          list: The DSNs of the devices.
 
         """
-        if self.device_dsn:
-            return self.device_dsn
+        if self.devices is None:
+            await self._single_flight("devices", self._fetch_devices)
+
+        return list(self.devices)
 
+    async def _fetch_devices(self) -> None:
+        """Fetch the list of devices and cache them by DSN."""
         devices = await self.get_request("apiv1/devices.json")
-        self.device_dsn = devices[0]["device"]["dsn"]
+        self.devices = {device["device"]["dsn"]: device["device"] for device in devices}
 
-        return self.device_dsn
+    async def async_start_lan(self, port: int) -> None:
+        """Start the LAN transport for every device with LAN mode enabled.
 
-    async def get_property(self, name: str):
-        """Retrieve the value of a specific property from the device.
+        The cloud is only used to fetch the LAN keys of the devices, their
+        properties are then read and written over the local network whenever the
+        device is reachable, falling back to the cloud otherwise. Devices whose LAN
+        keys cannot be fetched only use the cloud.
 
         Args:
-          name (str): The name of the property to retrieve.
+          port (int): The port of the HTTP server the devices connect to.
 
-        Returns:
-          The value of the specified property, or None if the property is not found.
+        """
+        await self.get_devices()
+        lan = LanTransport(self.session, port)
+        await lan.start()
+        self.lan = lan
+
+        for device_dsn, device in self.devices.items():
+            if not device.get("lan_enabled") or not device.get("lan_ip"):
+                continue
+            try:
+                lan_config = await self.get_request(f"apiv1/dsns/{device_dsn}/lan.json")
+                lan.add_device(device_dsn, device["lan_ip"], lan_config["lanip"])
+            except (aiohttp.ClientError, TimeoutError, KeyError, TypeError) as err:
+                _LOGGER.warning(
+                    "Unable to fetch the LAN keys of %s, using the cloud only: %r",
+                    device_dsn,
+                    err,
+                )
+
+    async def async_stop_lan(self) -> None:
+        """Stop the LAN transport."""
+        if self.lan is not None:
+            await self.lan.stop()
+            self.lan = None
+
+    async def async_stop_revalidations(self) -> None:
+        """Cancel the background refreshes of the properties."""
+        revalidations = list(self._revalidations.values())
+        self._revalidations.clear()
+        for revalidation in revalidations:
+            revalidation.cancel()
+        await asyncio.gather(*revalidations, return_exceptions=True)
+
+    async def async_start_datastream(self) -> None:
+        """Subscribe to the datapoints pushed by every device.
+
+        Pushed datapoints are applied to the cached properties as they arrive and
+        forwarded to the properties listeners.
 
         """
-        device_properties = await self.get_properties()
-        device_property = [
-            device_property
-            for device_property in device_properties
-            if device_property.get("name") == name
-        ][0]
+        for device_dsn in await self.get_devices():
+            datastream = Datastream(
+                self.session,
+                device_dsn,
+                self.get_access_token,
+                self.apply_datapoint,
+                self._datastream_connection_changed,
+                self.endpoints.stream,
+            )
+            datastream.start()
+            self.datastreams[device_dsn] = datastream
 
-        return device_property.get("value")
+    async def async_stop_datastream(self) -> None:
+        """Stop the datapoint subscriptions."""
+        datastreams = list(self.datastreams.values())
+        self.datastreams.clear()
+        await asyncio.gather(*(datastream.stop() for datastream in datastreams))
 
-    async def get_str_property(self, name: str) -> str:
-        """Retrieve the str value of a specific property from the device.
+    def is_streaming(self, device_dsn: str) -> bool:
+        """Return True if the datapoints of the device are currently pushed."""
+        datastream = self.datastreams.get(device_dsn)
+        return datastream is not None and datastream.connected
+
+    def _datastream_connection_changed(self, device_dsn: str, connected: bool):
+        """Forward a datastream connection change to the listeners."""
+        for listener in self._datastream_listeners:
+            listener(device_dsn, connected)
+
+    def apply_datapoint(self, device_dsn: str, device_property: dict[str, Any]):
+        """Apply a pushed datapoint to the cached properties of a device.
 
         Args:
-          name (str): The name of the property to retrieve.
+          device_dsn (str): The DSN of the device.
+          device_property (dict): The property, in the format of properties.json.
+
+        """
+        self._apply_records(device_dsn, [property_record(device_property)])
+
+    def _apply_records(self, device_dsn: str, records: list[PropertyRecord]) -> None:
+        """Update the cached properties of a device and notify the listeners."""
+        snapshot = self.device_properties.get(device_dsn)
+        records = [record for record in records if record.name in PROPERTY_DECODERS]
+        if snapshot is None or not records:
+            # Nothing to update until the properties are first fetched
+            return
+
+        snapshot = snapshot.updated(records)
+        self.device_properties[device_dsn] = snapshot
+        for listener in self._properties_listeners:
+            listener(device_dsn, snapshot)
+        for listener in self._snapshot_listeners:
+            listener()
+
+    async def get_first_device(self) -> str:
+        """Retrieve the first device's DSN (Device Serial Number).
 
         Returns:
-          The value of the specified property.
+          str: The DSN of the first device.
 
         """
-        return str(await self.get_property(name))
+        return (await self.get_devices())[0]
 
-    async def get_int_property(self, name: str) -> int:
-        """Retrieve the int value of a specific property from the device.
+    async def get_property(self, device_dsn: str, name: str) -> Any:
+        """Retrieve the decoded value of a specific property from the device.
 
         Args:
+          device_dsn (str): The DSN of the device.
           name (str): The name of the property to retrieve.
 
         Returns:
-          The value of the specified property.
+          The value of the specified property, or None if the property is not found.
 
         """
-        return int(await self.get_property(name))
-
-    async def get_properties(self) -> dict:
+        return getattr(await self.get_properties(device_dsn), name, None)
+
+    async def get_properties(
+        self,
+        device_dsn: str,
+        tiers: Collection[PropertyTier] = tuple(PropertyTier),
+        grace: float = 0,
+    ) -> PropertySnapshot:
         """Retrieve the properties of the device.
 
-        This method fetches the device properties from the API if they have not been
-        retrieved in the last 10 seconds. If the properties were retrieved recently,
-        it returns the cached properties.
+        Each tier of properties is cached for its own TTL: static metadata for the
+        whole session, the filter state for an hour and the live telemetry for 10
+        seconds. Only the requested tiers whose cache expired are fetched again.
+        Within the grace window past their TTL, the cached properties are returned
+        right away while a single background refresh updates them, notifying the
+        properties listeners. While the circuit breaker is open, the cached
+        properties are returned whatever their age.
+
+        Args:
+          device_dsn (str): The DSN of the device.
+          tiers (Collection): The tiers of properties that must be up to date.
+          grace (float): The seconds expired properties are still returned for
+            while they are refreshed, 0 to always wait for the refresh.
 
         Returns:
-          list: A list of device properties.
+          PropertySnapshot: The decoded device properties.
 
         """
-        now = time.time()
-        if self.device_properties_timestamp is not None and (
-            now - self.device_properties_timestamp < 10
+        stale_tiers = self._stale_tiers(device_dsn, tiers)
+        if (
+            stale_tiers
+            and grace
+            and device_dsn in self.device_properties
+            and not self._stale_tiers(device_dsn, stale_tiers, grace)
+        ):
+            # Serve the cached properties while they are refreshed
+            self._revalidate_properties(device_dsn, stale_tiers)
+            stale_tiers = []
+        if (
+            stale_tiers
+            and self.breaker.is_open
+            and device_dsn in self.device_properties
+            and not (self.lan is not None and self.lan.is_connected(device_dsn))
         ):
-            return self.device_properties
+            # Serve the last known values until the cloud recovers
+            stale_tiers = []
+        if not stale_tiers:
+            self.metrics.cache_hits += 1
+            return self.device_properties[device_dsn]
+
+        self.metrics.cache_misses += 1
+        return await self._single_flight(
+            _properties_key(device_dsn, stale_tiers),
+            lambda: self._fetch_properties(device_dsn, stale_tiers),
+        )
+
+    def _revalidate_properties(
+        self, device_dsn: str, tiers: list[PropertyTier]
+    ) -> None:
+        """Refresh expired properties of the device in the background.
+
+        Args:
+          device_dsn (str): The DSN of the device.
+          tiers (list): The tiers of properties to fetch.
+
+        """
+        if device_dsn in self._revalidations:
+            return
+
+        async def _revalidate() -> None:
+            try:
+                snapshot = await self._single_flight(
+                    _properties_key(device_dsn, tiers),
+                    lambda: self._fetch_properties(device_dsn, tiers),
+                )
+            except Exception:
+                _LOGGER.warning(
+                    "Failed refreshing the properties of %s in the background",
+                    device_dsn,
+                    exc_info=True,
+                )
+                return
+            finally:
+                self._revalidations.pop(device_dsn, None)
+            for listener in self._properties_listeners:
+                listener(device_dsn, snapshot)
+
+        self._revalidations[device_dsn] = asyncio.create_task(_revalidate())
+
+    def set_required_properties(
+        self, device_dsn: str, names: Collection[str] | None
+    ) -> None:
+        """Restrict the properties fetched for a device.
+
+        Newly required properties missing from the cache are fetched on the next
+        read, whatever their tier.
+
+        Args:
+          device_dsn (str): The DSN of the device.
+          names (Collection): The names of the properties to fetch, None to fetch
+            every property.
 
-        device_dsn = await self.get_first_device()
-        device_properties = await self.get_request(
-            f"apiv1/dsns/{device_dsn}/properties.json"
+        """
+        previous = self.required_properties.pop(device_dsn, None)
+        if names is None:
+            added = set(PROPERTY_DECODERS) - previous if previous is not None else ()
+        else:
+            self.required_properties[device_dsn] = frozenset(names)
+            added = set(names) - previous if previous is not None else ()
+        snapshot = self.device_properties.get(device_dsn)
+        fetched = snapshot.data_updated_at if snapshot is not None else {}
+        self.invalidate_properties(
+            device_dsn,
+            {property_tier(name) for name in added if fetched.get(name) is None},
         )
 
-        self.device_properties = [
-            device_property.get("property") for device_property in device_properties
+    def invalidate_properties(
+        self, device_dsn: str, tiers: Collection[PropertyTier] = tuple(PropertyTier)
+    ) -> None:
+        """Expire the cached properties of a device.
+
+        Args:
+          device_dsn (str): The DSN of the device.
+          tiers (Collection): The tiers of properties to expire.
+
+        """
+        fetched_at = self.device_properties_timestamp.get(device_dsn, {})
+        for tier in tiers:
+            fetched_at.pop(tier, None)
+
+    def _stale_tiers(
+        self, device_dsn: str, tiers: Collection[PropertyTier], grace: float = 0
+    ) -> list[PropertyTier]:
+        """Return the tiers whose cached properties expired, in definition order.
+
+        Args:
+          device_dsn (str): The DSN of the device.
+          tiers (Collection): The tiers of properties to check.
+          grace (float): The seconds added to the TTL of every tier.
+
+        Returns:
+          list: The expired tiers.
+
+        """
+        now = time.time()
+        fetched_at = self.device_properties_timestamp.get(device_dsn, {})
+        stale_tiers = []
+        for tier in PropertyTier:
+            if tier not in tiers:
+                continue
+            if tier not in fetched_at or (
+                (ttl := TIER_TTL[tier]) is not None
+                and now - fetched_at[tier] >= ttl + grace
+            ):
+                stale_tiers.append(tier)
+        return stale_tiers
+
+    async def _fetch_properties(
+        self, device_dsn: str, tiers: list[PropertyTier]
+    ) -> PropertySnapshot:
+        """Fetch the properties of some tiers of the device and cache them.
+
+        Args:
+          device_dsn (str): The DSN of the device.
+          tiers (list): The tiers of properties to fetch.
+
+        Returns:
+          PropertySnapshot: The decoded device properties.
+
+        """
+        required = self.required_properties.get(device_dsn)
+        names = [
+            name
+            for name in PROPERTY_DECODERS
+            if property_tier(name) in tiers and (required is None or name in required)
         ]
-        self.device_properties_timestamp = time.time()
+        records = None
+        if self.lan is not None and self.lan.is_connected(device_dsn):
+            try:
+                records = [
+                    property_record(device_property)
+                    for device_property in await self.lan.get_properties(
+                        device_dsn, names
+                    )
+                ]
+            except LanError as err:
+                _LOGGER.debug(
+                    "LAN read of %s failed, using the cloud: %s", device_dsn, err
+                )
+
+        if records is None and names:
+            records = await self._fetch_cloud_properties(device_dsn, names)
+        elif records is None:
+            records = []
+
+        snapshot = self.device_properties.get(device_dsn)
+        if snapshot is None:
+            snapshot = PropertySnapshot.from_properties(records)
+        else:
+            snapshot = snapshot.updated(records)
+        if PropertyTier.STATIC in tiers:
+            # The product name is the name given by the user to the device
+            await self.get_devices()
+            product_name = self.devices.get(device_dsn, {}).get("product_name")
+            snapshot = replace(snapshot, product_name=product_name)
+        self.device_properties[device_dsn] = snapshot
+
+        fetched_at = self.device_properties_timestamp.setdefault(device_dsn, {})
+        for tier in tiers:
+            fetched_at[tier] = time.time()
+        self.restored_properties.pop(device_dsn, None)
+        for listener in self._snapshot_listeners:
+            listener()
+
+        return snapshot
+
+    async def _fetch_cloud_properties(
+        self, device_dsn: str, names: list[str]
+    ) -> list[PropertyRecord]:
+        """Fetch some properties of the device from the cloud.
+
+        The response is reduced to records of the requested properties right away,
+        dropping the metadata of the "property" objects.
+
+        Args:
+          device_dsn (str): The DSN of the device.
+          names (list): The names of the properties to fetch.
+
+        Returns:
+          list: The records of the requested properties.
+
+        """
+        path = f"apiv1/dsns/{device_dsn}/properties.json"
+        filtered = len(names) < len(PROPERTY_DECODERS)
+        if filtered and self.properties_filter_supported:
+            path += "?" + urllib.parse.urlencode([("names[]", name) for name in names])
+
+        records = [
+            property_record(device_property["property"])
+            for device_property in await self.get_request(path)
+        ]
+        if not filtered:
+            return records
+
+        if self.properties_filter_supported and any(
+            record.name in PROPERTY_DECODERS and record.name not in names
+            for record in records
+        ):
+            _LOGGER.debug("Properties filter ignored, fetching every property")
+            self.properties_filter_supported = False
+
+        # Only decode the requested properties
+        return [record for record in records if record.name in names]
+
+    async def _single_flight[T](
+        self, key: str, fetch: Callable[[], Coroutine[Any, Any, T]]
+    ) -> T:
+        """Share a single in-flight call between all concurrent callers.
 
-        return self.device_properties
+        The first caller for a key starts the call, every caller arriving while it
+        is still running awaits the same result instead of issuing its own request.
+
+        Args:
+          key (str): The key identifying the call.
+          fetch (Callable): The coroutine function performing the call.
+
+        Returns:
+          The result of the shared call.
+
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fetch())
+            self._inflight[key] = task
+
+            def _done(done_task: asyncio.Task) -> None:
+                if self._inflight.get(key) is done_task:
+                    del self._inflight[key]
+                if not done_task.cancelled():
+                    # Mark the exception as retrieved when every caller went away
+                    done_task.exception()
+
+            task.add_done_callback(_done)
+
+        # Shield the shared call so a cancelled caller does not cancel the others
+        return await asyncio.shield(task)
 
     async def get_query_param(self, url: str, param: str) -> str | None:
         """Extract the value of a specified query parameter from a given URL.
@@ -0,0 +1,111 @@
+"""Module providing the per-device queue of the property writes."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Mapping
+import logging
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds writes wait for the writes following them, so only the latest is sent
+COMMAND_COALESCE_DELAY = 0.25
+
+
+class CommandQueue:
+    """Serialize and coalesce the property writes of a device.
+
+    Writes submitted within a short window are merged into a single command, the
+    latest value of a property replacing the previous ones. Commands are written
+    one at a time, in submission order, and properties already set to the requested
+    value are skipped.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[dict[str, Any]], Awaitable[list[dict]]],
+        is_current: Callable[[str, Any], bool],
+        delay: float = COMMAND_COALESCE_DELAY,
+    ) -> None:
+        """Initialize.
+
+        Args:
+          write (Callable): Writes properties to the device, returning the
+            responses of the server.
+          is_current (Callable): Returns True if a property is known to already
+            have a value.
+          delay (float): The seconds writes wait for the writes following them.
+
+        """
+        self._write = write
+        self._is_current = is_current
+        self._delay = delay
+        self._pending: dict[str, Any] = {}
+        self._waiters: list[asyncio.Future[list[dict]]] = []
+        self._task: asyncio.Task | None = None
+
+    async def submit(self, properties: Mapping[str, Any]) -> list[dict]:
+        """Queue a write and wait until it is sent.
+
+        Args:
+          properties (Mapping): The values to set, indexed by property name, in the
+            order they should be applied.
+
+        Returns:
+          list: The responses of the server to the command the write was part of.
+
+        """
+        for name, value in properties.items():
+            # A property written again is applied after the ones written before
+            self._pending.pop(name, None)
+            self._pending[name] = value
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return await waiter
+
+    async def _run(self) -> None:
+        """Send the queued writes until the queue is empty."""
+        try:
+            while self._waiters:
+                await asyncio.sleep(self._delay)
+                properties, self._pending = self._pending, {}
+                waiters, self._waiters = self._waiters, []
+                await self._send(properties, waiters)
+        finally:
+            self._task = None
+            for waiter in self._waiters:
+                waiter.cancel()
+            self._waiters.clear()
+            self._pending.clear()
+
+    async def _send(
+        self, properties: dict[str, Any], waiters: list[asyncio.Future[list[dict]]]
+    ) -> None:
+        """Send a command and resolve the writes it is made of."""
+        changed = {
+            name: value
+            for name, value in properties.items()
+            if not self._is_current(name, value)
+        }
+        if len(changed) < len(properties):
+            _LOGGER.debug(
+                "Skipping writes of %s, already set",
+                [name for name in properties if name not in changed],
+            )
+
+        try:
+            responses = await self._write(changed) if changed else []
+        except asyncio.CancelledError:
+            for waiter in waiters:
+                waiter.cancel()
+            raise
+        except Exception as err:  # noqa: BLE001
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(err)
+        else:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(responses)
@@ -12,10 +12,23 @@ from homeassistant.config_entries import ConfigEntry, ConfigFlowResult, OptionsF
 from homeassistant.const import CONF_EMAIL, CONF_LANGUAGE, CONF_PASSWORD
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers import aiohttp_client
+from homeassistant.helpers import aiohttp_client, config_validation as cv
 
 from .client import APIClient
-from .const import DOMAIN
+from .const import (
+    CONF_DAILY_REQUEST_BUDGET,
+    CONF_DATASTREAM,
+    CONF_LAN_PORT,
+    CONF_LOCAL_LAN,
+    CONF_RATE_LIMIT,
+    CONF_STALE_GRACE,
+    DEFAULT_DAILY_REQUEST_BUDGET,
+    DEFAULT_LAN_PORT,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_STALE_GRACE,
+    DOMAIN,
+)
+from .registry import account_key, async_get_clients
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -32,17 +45,26 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     """Validate the user input allows us to connect.
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
+    The client of the account is reused if it is already set up, and a new one is
+    handed to the entry about to be created.
     """
 
-    session = aiohttp_client.async_get_clientsession(hass)
-    client = APIClient(
-        session, data[CONF_LANGUAGE], data[CONF_EMAIL], data[CONF_PASSWORD]
-    )
-    authenticated = await client.authenticate()
-    if not authenticated:
-        raise InvalidAuth
+    key = account_key(data[CONF_EMAIL])
+    clients = async_get_clients(hass)
+    # Reuse the authenticated client of the account when there is one
+    client = clients.get(key, data[CONF_PASSWORD])
+    if client is None:
+        session = aiohttp_client.async_get_clientsession(hass)
+        client = APIClient(
+            session, data[CONF_LANGUAGE], data[CONF_EMAIL], data[CONF_PASSWORD]
+        )
+        authenticated = await client.authenticate()
+        if not authenticated:
+            raise InvalidAuth
+        # The entry set up next starts with this client instead of logging in
+        clients.hand_off(key, client)
 
-    product_name = await client.get_product_name()
+    product_name = await client.get_product_name(await client.get_first_device())
 
     return {"title": product_name}
 
@@ -109,6 +131,38 @@ class DeLonghiOptionsFlow(config_entries.OptionsFlow):
                     vol.Required(
                         CONF_PASSWORD, self.config_entry.data[CONF_PASSWORD]
                     ): str,
+                    vol.Optional(
+                        CONF_LOCAL_LAN,
+                        default=self.config_entry.options.get(CONF_LOCAL_LAN, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_LAN_PORT,
+                        default=self.config_entry.options.get(
+                            CONF_LAN_PORT, DEFAULT_LAN_PORT
+                        ),
+                    ): cv.port,
+                    vol.Optional(
+                        CONF_DATASTREAM,
+                        default=self.config_entry.options.get(CONF_DATASTREAM, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_DAILY_REQUEST_BUDGET,
+                        default=self.config_entry.options.get(
+                            CONF_DAILY_REQUEST_BUDGET, DEFAULT_DAILY_REQUEST_BUDGET
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=100)),
+                    vol.Optional(
+                        CONF_RATE_LIMIT,
+                        default=self.config_entry.options.get(
+                            CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Optional(
+                        CONF_STALE_GRACE,
+                        default=self.config_entry.options.get(
+                            CONF_STALE_GRACE, DEFAULT_STALE_GRACE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
                 }
             ),
             errors=errors,
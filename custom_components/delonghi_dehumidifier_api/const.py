@@ -1,3 +1,42 @@
 """Constants for the DeLonghi Dehumidifier integration."""
 
+from datetime import timedelta
+
 DOMAIN = "delonghi_dehumidifier_api"
+
+SCAN_INTERVAL = timedelta(minutes=1)
+RECONCILE_INTERVAL = timedelta(minutes=15)
+# Deadline of a refresh of a device, retries included
+UPDATE_TIMEOUT = timedelta(seconds=30)
+# Interval between the attempts to reach the cloud of an entry started from cache
+STARTUP_RETRY_INTERVAL = timedelta(minutes=1)
+STARTUP_RETRY_MAX_INTERVAL = timedelta(minutes=30)
+
+CONF_LOCAL_LAN = "local_lan"
+CONF_LAN_PORT = "lan_port"
+DEFAULT_LAN_PORT = 10280
+CONF_DATASTREAM = "datastream"
+CONF_DAILY_REQUEST_BUDGET = "daily_request_budget"
+DEFAULT_DAILY_REQUEST_BUDGET = 5000
+# Requests per minute shared by every config entry of an account
+CONF_RATE_LIMIT = "rate_limit"
+DEFAULT_RATE_LIMIT = 120
+# Seconds expired properties are still served to polls while they are refreshed
+CONF_STALE_GRACE = "stale_grace"
+DEFAULT_STALE_GRACE = 120
+
+STORAGE_VERSION = 1
+TOKENS_STORAGE_KEY = f"{DOMAIN}.tokens"
+TOKENS_SAVE_DELAY = 10
+DEVICES_STORAGE_KEY = f"{DOMAIN}.devices"
+PROPERTIES_STORAGE_KEY = f"{DOMAIN}.properties"
+# Seconds between the writes of the cached properties, however often they change
+PROPERTIES_SAVE_INTERVAL = 60
+
+SERVICE_SET_STATE = "set_state"
+ATTR_IS_ON = "is_on"
+ATTR_MODE = "mode"
+ATTR_HUMIDITY = "humidity"
+ATTR_ECO = "eco"
+ATTR_SWING = "swing"
+ATTR_FETCHED_AT = "fetched_at"
@@ -0,0 +1,175 @@
+"""Data update coordinator for the DeLonghi Dehumidifier integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+import logging
+
+import aiohttp
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .client import PROPERTY_TIERS, APIClient, PropertySnapshot, PropertyTier
+from .const import (
+    CONF_STALE_GRACE,
+    DEFAULT_STALE_GRACE,
+    DOMAIN,
+    RECONCILE_INTERVAL,
+    SCAN_INTERVAL,
+    UPDATE_TIMEOUT,
+)
+from .scheduler import SCHEDULER_PROPERTIES, PollScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class DeLonghiDehumidifierData:
+    """Runtime data shared by all platforms of a config entry."""
+
+    client: APIClient
+    scheduler: PollScheduler
+    coordinators: dict[str, DeLonghiDehumidifierCoordinator]
+    device_infos: dict[str, DeviceInfo]
+
+
+type DeLonghiDehumidifierConfigEntry = ConfigEntry[DeLonghiDehumidifierData]
+
+
+class DeLonghiDehumidifierCoordinator(DataUpdateCoordinator[PropertySnapshot]):
+    """Fetch the properties of a single device once per cycle for all its entities."""
+
+    config_entry: DeLonghiDehumidifierConfigEntry
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: DeLonghiDehumidifierConfigEntry,
+        client: APIClient,
+        scheduler: PollScheduler,
+        device_dsn: str,
+    ) -> None:
+        """Initialize."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=config_entry,
+            name=f"{DOMAIN}_{device_dsn}",
+            update_interval=SCAN_INTERVAL,
+        )
+        self.client = client
+        self.scheduler = scheduler
+        self.device_dsn = device_dsn
+        self.stale_grace = config_entry.options.get(
+            CONF_STALE_GRACE, DEFAULT_STALE_GRACE
+        )
+        self._required_properties: Counter[str] = Counter()
+        config_entry.async_on_unload(
+            client.add_properties_listener(self._handle_pushed_properties)
+        )
+        config_entry.async_on_unload(
+            client.add_datastream_listener(self._handle_datastream_connection)
+        )
+
+    async def _async_update_data(self) -> PropertySnapshot:
+        """Fetch the latest property values of the device.
+
+        Returns:
+            PropertySnapshot: The decoded device properties.
+
+        """
+        try:
+            async with asyncio.timeout(UPDATE_TIMEOUT.total_seconds()):
+                snapshot = await self.client.get_properties(
+                    self.device_dsn, grace=self.stale_grace
+                )
+        except aiohttp.ClientError as err:
+            raise UpdateFailed(f"Error fetching {self.device_dsn}: {err}") from err
+        except TimeoutError as err:
+            raise UpdateFailed(f"Timeout fetching {self.device_dsn}") from err
+
+        self._schedule_next_poll(snapshot)
+        return snapshot
+
+    @callback
+    def async_set_restored(self) -> None:
+        """Start from the restored properties of the device, until the first refresh.
+
+        Without restored properties, the entities are unavailable instead.
+        """
+        snapshot = self.client.device_properties.get(self.device_dsn)
+        self.data = snapshot or PropertySnapshot()
+        self.last_update_success = snapshot is not None
+
+    def _schedule_next_poll(self, snapshot: PropertySnapshot) -> None:
+        """Adapt the poll interval to the activity of the device."""
+        self.scheduler.observe(self.device_dsn, snapshot)
+        if self.client.is_streaming(self.device_dsn):
+            # Polling only reconciles the pushed values
+            self.update_interval = RECONCILE_INTERVAL
+        else:
+            self.update_interval = self.scheduler.interval(self.device_dsn, snapshot)
+
+    @callback
+    def async_require_properties(self, names: Iterable[str]) -> CALLBACK_TYPE:
+        """Fetch properties for an entity until the returned callback is called.
+
+        Once any entity required its properties, only the properties required by
+        the entities, the device info and the poll scheduler are fetched.
+
+        Args:
+          names (Iterable): The names of the properties read by the entity.
+
+        Returns:
+          Callable: A function releasing the properties.
+
+        """
+        names = tuple(names)
+        self._required_properties.update(names)
+        self._update_required_properties()
+
+        @callback
+        def _release() -> None:
+            self._required_properties.subtract(names)
+            self._update_required_properties()
+
+        return _release
+
+    def _update_required_properties(self) -> None:
+        """Forward the properties required by the entities to the client."""
+        required = {name for name, count in self._required_properties.items() if count}
+        static = {
+            name for name, tier in PROPERTY_TIERS.items() if tier is PropertyTier.STATIC
+        }
+        self.client.set_required_properties(
+            self.device_dsn, required | static | SCHEDULER_PROPERTIES
+        )
+
+    @callback
+    def _handle_pushed_properties(
+        self, device_dsn: str, snapshot: PropertySnapshot
+    ) -> None:
+        """Update the entities with the pushed or background refreshed properties."""
+        if device_dsn == self.device_dsn:
+            self._schedule_next_poll(snapshot)
+            self.async_set_updated_data(snapshot)
+
+    @callback
+    def _handle_datastream_connection(self, device_dsn: str, connected: bool) -> None:
+        """Poll slowly while the device pushes its datapoints, as usual otherwise."""
+        if device_dsn != self.device_dsn:
+            return
+
+        if connected:
+            # Polling only reconciles the pushed values
+            self.update_interval = RECONCILE_INTERVAL
+        else:
+            # Catch up with the datapoints missed while disconnected
+            self.update_interval = self.scheduler.interval(self.device_dsn, self.data)
+            self.hass.async_create_task(self.async_request_refresh())
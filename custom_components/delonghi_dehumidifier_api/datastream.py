@@ -0,0 +1,217 @@
+"""Module providing a push subscription to the Ayla datastream service.
+
+The datastream service pushes every new datapoint of the subscribed devices over a
+websocket, instead of the properties being polled:
+
+1. A subscription is created for each device (subscriptions.json), returning the
+   stream key identifying it.
+2. A websocket is opened with the stream key. Every message is framed as
+   "<length>|<payload>", the payload being either a heartbeat ("Z"), which must be
+   echoed back, or a JSON datapoint event.
+
+The connection is reopened with an exponential backoff whenever it is lost.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+import random
+from typing import Any
+
+import aiohttp
+import orjson
+
+from .resilience import REQUEST_TIMEOUT
+
+STREAM_URL = "https://mstream-field-eu.aylanetworks.com"
+STREAM_HEARTBEAT = "Z"
+STREAM_BACKOFF_MIN = 1
+STREAM_BACKOFF_MAX = 300
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DatastreamError(ValueError):
+    """Error to indicate the datastream subscription failed."""
+
+
+def parse_message(message: str) -> str:
+    """Return the payload of a framed datastream message.
+
+    Args:
+      message (str): The message as received from the websocket.
+
+    Returns:
+      str: The payload of the message.
+
+    """
+    length, separator, payload = message.partition("|")
+    if not separator or not length.isdigit() or int(length) != len(payload):
+        raise DatastreamError(f"Invalid datastream message {message!r}")
+    return payload
+
+
+class Datastream:
+    """Subscription to the datapoints of a single device."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        device_dsn: str,
+        get_access_token: Callable[[], Awaitable[str]],
+        on_datapoint: Callable[[str, dict[str, Any]], None],
+        on_connection_change: Callable[[str, bool], None],
+        url: str = STREAM_URL,
+    ) -> None:
+        """Initialize.
+
+        Args:
+          session (ClientSession): The session used for the requests.
+          device_dsn (str): The DSN of the device to subscribe to.
+          get_access_token (Callable): Returns a valid access token.
+          on_datapoint (Callable): Called with the DSN and the property of every
+            datapoint received, in the format of a properties.json property.
+          on_connection_change (Callable): Called with the DSN and the new state
+            every time the websocket connects or disconnects.
+          url (str): The base URL of the datastream service.
+
+        """
+        self.session = session
+        self.device_dsn = device_dsn
+        self.url = url
+        self.connected = False
+        self._get_access_token = get_access_token
+        self._on_datapoint = on_datapoint
+        self._on_connection_change = on_connection_change
+        self._subscription_id: int | None = None
+        self._stream_key: str | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start receiving datapoints in the background."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop receiving datapoints and remove the subscription."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self.connected = False
+
+        if self._subscription_id is not None:
+            try:
+                await self._request(
+                    "DELETE", f"api/v1/subscriptions/{self._subscription_id}.json"
+                )
+            except (aiohttp.ClientError, TimeoutError) as err:
+                _LOGGER.debug("Unable to remove datastream subscription: %s", err)
+            self._subscription_id = None
+            self._stream_key = None
+
+    async def _run(self) -> None:
+        """Keep the websocket connected, reconnecting with a backoff."""
+        backoff = STREAM_BACKOFF_MIN
+        while True:
+            try:
+                if self._stream_key is None:
+                    self._stream_key = await self._subscribe()
+                await self._receive(self._stream_key)
+                backoff = STREAM_BACKOFF_MIN
+            except aiohttp.WSServerHandshakeError as err:
+                # The subscription expired or was removed, create a new one
+                _LOGGER.debug("Datastream of %s rejected: %s", self.device_dsn, err)
+                self._stream_key = None
+            except (aiohttp.ClientError, TimeoutError, ValueError) as err:
+                _LOGGER.debug("Datastream of %s failed: %s", self.device_dsn, err)
+            except Exception:
+                # ie: a malformed subscription or a login rejected by the account
+                _LOGGER.exception(
+                    "Unexpected error in the datastream of %s", self.device_dsn
+                )
+            self._set_connected(False)
+
+            # Spread the reconnections of the devices over time
+            delay = backoff * random.uniform(0.5, 1)
+            _LOGGER.debug(
+                "Reconnecting datastream of %s in %.0fs", self.device_dsn, delay
+            )
+            await asyncio.sleep(delay)
+            backoff = min(backoff * 2, STREAM_BACKOFF_MAX)
+
+    async def _subscribe(self) -> str:
+        """Create the subscription and return its stream key."""
+        response = await self._request(
+            "POST",
+            "api/v1/subscriptions.json",
+            {
+                "subscription": {
+                    "dsn": self.device_dsn,
+                    "name": f"homeassistant_{self.device_dsn}",
+                    "description": "Home Assistant",
+                    "property_name": "*",
+                    "client_type": "cloud",
+                    "subscription_type": "datapoint",
+                }
+            },
+        )
+        subscription = response["subscription"]
+        self._subscription_id = subscription["id"]
+        return subscription["stream_key"]
+
+    async def _receive(self, stream_key: str) -> None:
+        """Receive the datapoints until the websocket is closed."""
+        async with self.session.ws_connect(
+            f"{self.url}/stream", params={"stream_key": stream_key}, heartbeat=60
+        ) as websocket:
+            self._set_connected(True)
+            _LOGGER.debug("Datastream of %s connected", self.device_dsn)
+            async for message in websocket:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+
+                payload = parse_message(message.data)
+                if payload == STREAM_HEARTBEAT:
+                    await websocket.send_str(message.data)
+                    continue
+
+                self._handle_event(orjson.loads(payload))
+
+    def _set_connected(self, connected: bool) -> None:
+        """Update the connection state, notifying its changes."""
+        if connected != self.connected:
+            self.connected = connected
+            self._on_connection_change(self.device_dsn, connected)
+
+    def _handle_event(self, event: dict[str, Any]) -> None:
+        """Forward a datapoint event to the callback."""
+        metadata = event.get("metadata", {})
+        if metadata.get("event_type") != "datapoint":
+            return
+
+        datapoint = event.get("datapoint", {})
+        self._on_datapoint(
+            metadata.get("dsn", self.device_dsn),
+            {
+                "name": metadata.get("property_name"),
+                "value": datapoint.get("value"),
+                "data_updated_at": datapoint.get("updated_at"),
+            },
+        )
+
+    async def _request(
+        self, method: str, path: str, body: dict | None = None
+    ) -> dict[str, Any]:
+        """Send an authenticated request to the datastream service."""
+        access_token = await self._get_access_token()
+        response = await self.session.request(
+            method,
+            f"{self.url}/{path}",
+            headers={"Authorization": f"auth_token {access_token}"},
+            json=body,
+            timeout=REQUEST_TIMEOUT,
+        )
+        response.raise_for_status()
+        if method == "DELETE":
+            return {}
+        return orjson.loads(await response.read())
@@ -0,0 +1,96 @@
+"""Diagnostics support for the DeLonghi Dehumidifier integration."""
+
+from __future__ import annotations
+
+from dataclasses import fields
+from enum import Enum
+import time
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+
+from .client import PropertySnapshot
+from .coordinator import DeLonghiDehumidifierConfigEntry
+
+TO_REDACT = {CONF_EMAIL, CONF_PASSWORD, "access_token", "refresh_token"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: DeLonghiDehumidifierConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry.
+
+    Everything is read from the state kept in memory, no request is sent to the
+    cloud.
+    """
+    client = entry.runtime_data.client
+    now = time.time()
+    metrics = client.metrics
+
+    return {
+        "entry": async_redact_data(
+            {"data": dict(entry.data), "options": dict(entry.options)}, TO_REDACT
+        ),
+        "tokens": {
+            "has_access_token": client.access_token is not None,
+            "has_refresh_token": bool(client.refresh_token),
+            "access_token_expires_in": client.token_expiry - now,
+        },
+        "stats": client.stats(),
+        "recent_requests": [sample.as_dict() for sample in metrics.recent_requests],
+        "recent_errors": [sample.as_dict() for sample in metrics.recent_errors],
+        "scheduler": entry.runtime_data.scheduler.as_dict(),
+        "transports": {
+            "lan": client.lan is not None,
+            "batch_datapoints_supported": client.batch_datapoints_supported,
+            "properties_filter_supported": client.properties_filter_supported,
+        },
+        "circuit_breaker": client.breaker.as_dict(),
+        "devices": {
+            device_dsn: {
+                "last_update_success": coordinator.last_update_success,
+                "update_interval": (
+                    coordinator.update_interval.total_seconds()
+                    if coordinator.update_interval is not None
+                    else None
+                ),
+                "streaming": client.is_streaming(device_dsn),
+                "lan_connected": (
+                    client.lan is not None and client.lan.is_connected(device_dsn)
+                ),
+                "required_properties": sorted(
+                    client.required_properties.get(device_dsn, ())
+                ),
+                "properties_age": {
+                    tier.value: now - fetched_at
+                    for tier, fetched_at in client.device_properties_timestamp.get(
+                        device_dsn, {}
+                    ).items()
+                },
+                "properties": _snapshot_as_dict(
+                    client.device_properties.get(device_dsn)
+                ),
+            }
+            for device_dsn, coordinator in entry.runtime_data.coordinators.items()
+        },
+    }
+
+
+def _snapshot_as_dict(snapshot: PropertySnapshot | None) -> dict[str, Any] | None:
+    """Return the values of a snapshot as JSON-serializable values."""
+    if snapshot is None:
+        return None
+    values: dict[str, Any] = {}
+    for field in fields(snapshot):
+        value = getattr(snapshot, field.name)
+        if isinstance(value, Enum):
+            value = value.name
+        elif field.name == "data_updated_at":
+            value = {
+                name: updated_at.isoformat() if updated_at is not None else None
+                for name, updated_at in value.items()
+            }
+        values[field.name] = value
+    return values
@@ -0,0 +1,34 @@
+"""Base entity for the DeLonghi Dehumidifier integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+
+from .const import ATTR_FETCHED_AT
+from .coordinator import DeLonghiDehumidifierCoordinator
+
+
+class DeLonghiDehumidifierEntity(CoordinatorEntity[DeLonghiDehumidifierCoordinator]):
+    """Entity of a device, only fetching the properties it reads while enabled."""
+
+    _required_properties: tuple[str, ...] = ()
+
+    async def async_added_to_hass(self) -> None:
+        """Require the properties of the entity while it is added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_require_properties(self._required_properties)
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return when the properties were fetched, while showing restored ones."""
+        fetched_at = self.coordinator.client.restored_properties.get(
+            self.coordinator.device_dsn
+        )
+        if fetched_at is None:
+            return None
+        return {ATTR_FETCHED_AT: dt_util.utc_from_timestamp(fetched_at).isoformat()}
@@ -1,43 +1,74 @@
 """Adds dehumidifer entity for each dehumidifer appliance."""
 
-from datetime import timedelta
 import logging
 from typing import Any
 
+import voluptuous as vol
+
 from homeassistant.components.humidifier import HumidifierDeviceClass, HumidifierEntity
 from homeassistant.components.humidifier.const import HumidifierEntityFeature
-from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import EntityCategory
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .client import MODE_BY_NAME, APIClient, Mode, Status
-from .const import DOMAIN
-from .utils import fetch_device_info
+from .client import MODE_BY_NAME, Mode, OffOnStatus, Status
+from .const import (
+    ATTR_ECO,
+    ATTR_HUMIDITY,
+    ATTR_IS_ON,
+    ATTR_MODE,
+    ATTR_SWING,
+    DOMAIN,
+    SERVICE_SET_STATE,
+)
+from .coordinator import (
+    DeLonghiDehumidifierConfigEntry,
+    DeLonghiDehumidifierCoordinator,
+)
+from .entity import DeLonghiDehumidifierEntity
 
 _LOGGER = logging.getLogger(__name__)
 
-SCAN_INTERVAL = timedelta(minutes=1)
+SET_STATE_SCHEMA = vol.All(
+    cv.make_entity_service_schema(
+        {
+            vol.Optional(ATTR_IS_ON): cv.boolean,
+            vol.Optional(ATTR_MODE): vol.In(list(MODE_BY_NAME)),
+            vol.Optional(ATTR_HUMIDITY): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=100)
+            ),
+            vol.Optional(ATTR_ECO): cv.boolean,
+            vol.Optional(ATTR_SWING): cv.boolean,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_IS_ON, ATTR_MODE, ATTR_HUMIDITY, ATTR_ECO, ATTR_SWING),
+)
 
 
 async def async_setup_entry(
     hass: HomeAssistant,
-    config_entry: ConfigEntry[APIClient],
+    config_entry: DeLonghiDehumidifierConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up current environment dehumidifier entity."""
 
-    client = config_entry.runtime_data
-    device_info = await fetch_device_info(client)
-    device_dsn = await client.get_first_device()
-    async_add_entities([DehumidifierEntity(device_dsn, device_info, client)])
+    entities = []
+    for device_dsn, coordinator in config_entry.runtime_data.coordinators.items():
+        device_info = config_entry.runtime_data.device_infos[device_dsn]
+        entities.append(DehumidifierEntity(coordinator, device_info))
+    async_add_entities(entities)
+
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_SET_STATE, SET_STATE_SCHEMA, "async_set_state"
+    )
 
 
-class DehumidifierEntity(HumidifierEntity):
+class DehumidifierEntity(DeLonghiDehumidifierEntity, HumidifierEntity):
     """Dehumidifer entity for DeLonghi dehumidifier."""
 
-    _attr_should_poll = True
     _attr_has_entity_name = True
     _attr_entity_category = EntityCategory.CONFIG
     _attr_device_class = HumidifierDeviceClass.DEHUMIDIFIER
@@ -49,32 +80,42 @@ class DehumidifierEntity(HumidifierEntity):
         Mode.DRY_CLOTHES.name,
         Mode.PURIFIER.name,
     ]
+    _required_properties = (
+        "device_mode",
+        "humidity_setpoint",
+        "current_humidity",
+        "device_status",
+    )
 
     def __init__(
         self,
-        device_dsn: str,
+        coordinator: DeLonghiDehumidifierCoordinator,
         device_info: DeviceInfo,
-        client: APIClient,
     ) -> None:
         """Initialize."""
-        self.client = client
-        self._attr_unique_id = f"{DOMAIN}_{device_dsn}_dehumidifier"
+        super().__init__(coordinator)
+        self.client = coordinator.client
+        self.device_dsn = coordinator.device_dsn
+        self._attr_unique_id = f"{DOMAIN}_{coordinator.device_dsn}_dehumidifier"
         self._attr_name = "Unit"
         self._attr_device_info = device_info
+        self._update_attrs()
         _LOGGER.debug("Initialized %s", self._attr_unique_id)
 
-    async def async_added_to_hass(self) -> None:
-        await self.async_update()
-
-    async def async_update(self) -> None:
-        """Handle the event when the device status changes."""
-        _LOGGER.debug("Updating %s", self._attr_unique_id)
-        device_mode = await self.client.get_device_mode()
-        self._attr_mode = device_mode.name
-        self._attr_target_humidity = await self.client.get_humidity_setpoint()
-        self._attr_current_humidity = await self.client.get_current_humidity()
-        device_status = await self.client.get_device_status()
-        self._attr_is_on = device_status == Status.ON
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._update_attrs()
+        super()._handle_coordinator_update()
+
+    def _update_attrs(self) -> None:
+        """Update the entity attributes from the latest device properties."""
+        data = self.coordinator.data
+        device_mode = data.device_mode
+        self._attr_mode = device_mode.name if device_mode is not None else None
+        self._attr_target_humidity = data.humidity_setpoint
+        self._attr_current_humidity = data.current_humidity
+        self._attr_is_on = data.device_status == Status.ON
         _LOGGER.debug(
             "Updated %s with %s",
             self._attr_unique_id,
@@ -89,19 +130,36 @@ class DehumidifierEntity(HumidifierEntity):
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the entity on."""
         _LOGGER.debug("Turning on %s", self._attr_unique_id)
-        await self.client.set_status(Status.ON)
+        await self.client.set_status(self.device_dsn, Status.ON)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the entity off."""
         _LOGGER.debug("Turning off %s", self._attr_unique_id)
-        await self.client.set_status(Status.OFF)
+        await self.client.set_status(self.device_dsn, Status.OFF)
 
     async def async_set_mode(self, mode: str) -> None:
         """Set new target mode."""
         _LOGGER.debug("Setting mode %s mode to %s", self._attr_unique_id, mode)
-        await self.client.set_mode(MODE_BY_NAME.get(mode))
+        await self.client.set_mode(self.device_dsn, MODE_BY_NAME.get(mode))
 
     async def async_set_humidity(self, humidity: int) -> None:
         """Set new target humidity."""
         _LOGGER.debug("Setting humidity %s mode to %s", self._attr_unique_id, humidity)
-        await self.client.set_humidity(humidity)
+        await self.client.set_humidity(self.device_dsn, humidity)
+
+    async def async_set_state(self, **kwargs: Any) -> None:
+        """Apply multiple settings to the device in a single command."""
+        properties: dict[str, Any] = {}
+        if (is_on := kwargs.get(ATTR_IS_ON)) is not None:
+            properties["set_status"] = Status.ON if is_on else Status.OFF
+        if (mode := kwargs.get(ATTR_MODE)) is not None:
+            properties["device_mode"] = MODE_BY_NAME[mode]
+        if (humidity := kwargs.get(ATTR_HUMIDITY)) is not None:
+            properties["humidity_setpoint"] = humidity
+        if (eco := kwargs.get(ATTR_ECO)) is not None:
+            properties["set_eco"] = OffOnStatus.ON if eco else OffOnStatus.OFF
+        if (swing := kwargs.get(ATTR_SWING)) is not None:
+            properties["swing"] = OffOnStatus.ON if swing else OffOnStatus.OFF
+
+        _LOGGER.debug("Setting state %s to %s", self._attr_unique_id, properties)
+        await self.client.set_properties(self.device_dsn, properties)
@@ -0,0 +1,496 @@
+"""Module providing a local LAN mode transport for Ayla modules.
+
+In LAN mode the device connects to an HTTP server run by the client:
+
+1. The client registers with the device (local_reg.json) with its IP and port.
+2. The device performs a key exchange with the client, both sides then derive the
+   session keys from the exchanged randoms and the LAN key fetched from the cloud.
+3. When notified, the device fetches the pending commands (commands.json) and
+   posts the requested or changed property values (property/datapoint.json).
+
+Every message after the key exchange is encrypted with AES-CBC and signed with
+HMAC-SHA256 using the session keys.
+"""
+
+import asyncio
+import base64
+from collections import deque
+from collections.abc import Mapping
+from datetime import UTC, datetime
+import hmac
+import logging
+import secrets
+import socket
+import time
+from typing import Any
+
+import aiohttp
+from aiohttp import web
+import orjson
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+LAN_URI = "/local_lan"
+LAN_REQUEST_TIMEOUT = 5
+DEFAULT_KEEP_ALIVE = 30
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LanError(Exception):
+    """Error to indicate the device cannot be reached in LAN mode."""
+
+
+def _build_key(lanip_key: bytes, msg: bytes) -> bytes:
+    """Derive a session key from the LAN key."""
+    return hmac.digest(lanip_key, hmac.digest(lanip_key, msg, "sha256") + msg, "sha256")
+
+
+class LanCipher:
+    """Signing key and AES-CBC stream for one direction of a LAN session.
+
+    The CBC state is kept between messages, as the device chains the IV of every
+    message to the last block of the previous one.
+    """
+
+    def __init__(self, lanip_key: bytes, seed: bytes) -> None:
+        """Initialize."""
+        self.sign_key = _build_key(lanip_key, seed + b"0")
+        crypto_key = _build_key(lanip_key, seed + b"1")
+        iv = _build_key(lanip_key, seed + b"2")[:16]
+        cipher = Cipher(algorithms.AES(crypto_key), modes.CBC(iv))
+        self._encryptor = cipher.encryptor()
+        self._decryptor = cipher.decryptor()
+
+    def encrypt(self, payload: Mapping[str, Any]) -> dict[str, str]:
+        """Encrypt and sign a JSON payload.
+
+        Args:
+          payload (Mapping): The payload to encrypt.
+
+        Returns:
+          dict: The encrypted message.
+
+        """
+        text = orjson.dumps(payload)
+        sign = hmac.digest(self.sign_key, text, "sha256")
+        padded = text + b"\x00" * (-len(text) % 16)
+        return {
+            "enc": base64.b64encode(self._encryptor.update(padded)).decode(),
+            "sign": base64.b64encode(sign).decode(),
+        }
+
+    def decrypt(self, message: Mapping[str, str]) -> dict[str, Any]:
+        """Decrypt and verify a message.
+
+        Args:
+          message (Mapping): The encrypted message.
+
+        Returns:
+          dict: The decrypted JSON payload.
+
+        Raises:
+          LanError: The message is not signed, or its signature is invalid.
+
+        """
+        if "sign" not in message:
+            raise LanError("Unsigned message")
+        text = self._decryptor.update(base64.b64decode(message["enc"])).rstrip(b"\x00")
+        if not hmac.compare_digest(
+            base64.b64decode(message["sign"]),
+            hmac.digest(self.sign_key, text, "sha256"),
+        ):
+            raise LanError("Invalid message signature")
+        return orjson.loads(text)
+
+
+def session_ciphers(
+    lanip_key: str, random_1: str, random_2: str, time_1: int, time_2: int
+) -> tuple[LanCipher, LanCipher]:
+    """Derive the ciphers of a LAN session from the key exchange.
+
+    Args:
+      lanip_key (str): The LAN key of the device, as returned by the cloud.
+      random_1 (str): The random sent by the device.
+      random_2 (str): The random sent by the client.
+      time_1 (int): The time sent by the device.
+      time_2 (int): The time sent by the client.
+
+    Returns:
+      tuple: The cipher of the messages sent by the client and the cipher of the
+        messages sent by the device.
+
+    """
+    key = lanip_key.encode()
+    r1, r2 = random_1.encode(), random_2.encode()
+    t1, t2 = str(time_1).encode(), str(time_2).encode()
+    return LanCipher(key, r1 + r2 + t1 + t2), LanCipher(key, r2 + r1 + t2 + t1)
+
+
+def _base_type(value: Any) -> str:
+    """Return the Ayla base type of a property value."""
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    return "string"
+
+
+class LanDevice:
+    """State of the LAN session with a single device."""
+
+    def __init__(
+        self, dsn: str, address: str, lanip_key: str, lanip_key_id: int, keep_alive: int
+    ) -> None:
+        """Initialize."""
+        self.dsn = dsn
+        self.address = address
+        self.host = address.split(":")[0]
+        self.lanip_key = lanip_key
+        self.lanip_key_id = lanip_key_id
+        self.keep_alive = keep_alive
+        self.app_cipher: LanCipher | None = None
+        self.dev_cipher: LanCipher | None = None
+        self.seq_no = 0
+        self.last_seen = 0.0
+        self.commands: deque[tuple[dict[str, Any], asyncio.Future[None]]] = deque()
+        self.pending_reads: dict[int, asyncio.Future[None]] = {}
+        self.values: dict[str, tuple[Any, datetime]] = {}
+        self._next_cmd_id = 0
+
+    @property
+    def connected(self) -> bool:
+        """Return True if a session is established and the device is alive."""
+        return (
+            self.app_cipher is not None
+            and time.time() - self.last_seen < 2 * self.keep_alive
+        )
+
+    def establish(self, random_1: str, random_2: str, time_1: int, time_2: int):
+        """Establish a new session from the key exchange."""
+        self.app_cipher, self.dev_cipher = session_ciphers(
+            self.lanip_key, random_1, random_2, time_1, time_2
+        )
+        self.seq_no = 0
+        self.last_seen = time.time()
+
+    def reset(self) -> None:
+        """Drop the session, failing every pending command."""
+        self.app_cipher = None
+        self.dev_cipher = None
+        while self.commands:
+            _, delivered = self.commands.popleft()
+            if not delivered.done():
+                delivered.set_exception(LanError(f"Session with {self.dsn} lost"))
+
+    def next_cmd_id(self) -> int:
+        """Return a new command id."""
+        self._next_cmd_id += 1
+        return self._next_cmd_id
+
+
+class LanTransport:
+    """Read and write device properties over the local network."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        port: int,
+        host: str = "0.0.0.0",
+        local_ip: str | None = None,
+    ) -> None:
+        """Initialize."""
+        self.session = session
+        self.port = port
+        self.host = host
+        self.local_ip = local_ip
+        self.devices: dict[str, LanDevice] = {}
+        self._runner: web.AppRunner | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Start the HTTP server the devices connect to."""
+        app = web.Application()
+        app.add_routes(
+            [
+                web.post(f"{LAN_URI}/key_exchange.json", self._handle_key_exchange),
+                web.get(f"{LAN_URI}/commands.json", self._handle_commands),
+                web.post(f"{LAN_URI}/property/datapoint.json", self._handle_datapoint),
+                web.post(
+                    f"{LAN_URI}/property/datapoint/ack.json", self._handle_datapoint
+                ),
+            ]
+        )
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the actual port when binding to any free port
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        """Stop the keep-alive tasks and the HTTP server."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        for device in self.devices.values():
+            device.reset()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def add_device(self, dsn: str, address: str, lan_config: Mapping[str, Any]):
+        """Start a LAN session with a device.
+
+        Args:
+          dsn (str): The DSN of the device.
+          address (str): The IP address of the device, optionally with a port.
+          lan_config (Mapping): The "lanip" object of the device lan.json.
+
+        """
+        device = LanDevice(
+            dsn,
+            address,
+            lan_config["lanip_key"],
+            lan_config["lanip_key_id"],
+            int(lan_config.get("keep_alive") or DEFAULT_KEEP_ALIVE),
+        )
+        self.devices[dsn] = device
+        self._create_task(self._keep_alive(device))
+
+    def is_connected(self, dsn: str) -> bool:
+        """Return True if the device can currently be reached in LAN mode."""
+        device = self.devices.get(dsn)
+        return device is not None and device.connected
+
+    async def get_properties(self, dsn: str, names: list[str]) -> list[dict[str, Any]]:
+        """Request the current value of properties from the device.
+
+        Args:
+          dsn (str): The DSN of the device.
+          names (list): The names of the properties to read.
+
+        Returns:
+          list: The properties with their name, value and data_updated_at.
+
+        """
+        device = self._connected_device(dsn)
+        loop = asyncio.get_running_loop()
+        cmds = []
+        reads = []
+        for name in names:
+            cmd_id = device.next_cmd_id()
+            device.pending_reads[cmd_id] = loop.create_future()
+            reads.append(cmd_id)
+            cmds.append(
+                {
+                    "cmd": {
+                        "cmd_id": cmd_id,
+                        "method": "GET",
+                        "resource": f"property.json?name={name}",
+                        "uri": f"{LAN_URI}/property/datapoint.json",
+                        "data": "",
+                    }
+                }
+            )
+
+        try:
+            async with asyncio.timeout(LAN_REQUEST_TIMEOUT):
+                await self._send(device, {"cmds": cmds})
+                await asyncio.gather(
+                    *(device.pending_reads[cmd_id] for cmd_id in reads)
+                )
+        except TimeoutError as err:
+            raise LanError(f"Timeout reading properties of {dsn}") from err
+        finally:
+            for cmd_id in reads:
+                device.pending_reads.pop(cmd_id, None)
+
+        return [
+            {"name": name, "value": value, "data_updated_at": updated_at.isoformat()}
+            for name, (value, updated_at) in device.values.items()
+            if name in names
+        ]
+
+    async def set_properties(self, dsn: str, datapoints: list[tuple[str, Any]]):
+        """Write property values to the device.
+
+        Args:
+          dsn (str): The DSN of the device.
+          datapoints (list): The names and raw values of the properties to write.
+
+        """
+        device = self._connected_device(dsn)
+        properties = [
+            {
+                "property": {
+                    "base_type": _base_type(value),
+                    "value": value,
+                    "metadata": None,
+                    "name": name,
+                    "dsn": dsn,
+                }
+            }
+            for name, value in datapoints
+        ]
+        try:
+            async with asyncio.timeout(LAN_REQUEST_TIMEOUT):
+                await self._send(device, {"properties": properties})
+        except TimeoutError as err:
+            raise LanError(f"Timeout writing properties of {dsn}") from err
+
+    def _connected_device(self, dsn: str) -> LanDevice:
+        """Return the device if it can currently be reached in LAN mode."""
+        device = self.devices.get(dsn)
+        if device is None or not device.connected:
+            raise LanError(f"Device {dsn} is not connected in LAN mode")
+        return device
+
+    async def _send(self, device: LanDevice, command: dict[str, Any]) -> None:
+        """Queue a command and wait for the device to fetch it."""
+        delivered = asyncio.get_running_loop().create_future()
+        pending = (command, delivered)
+        device.commands.append(pending)
+        try:
+            try:
+                await self._register(device, notify=True)
+            except LanError:
+                # The device left the network, use the cloud until it comes back
+                device.reset()
+                raise
+            await delivered
+        finally:
+            if pending in device.commands:
+                # A command given up on must not be replayed to the device later
+                device.commands.remove(pending)
+
+    async def _keep_alive(self, device: LanDevice) -> None:
+        """Keep the registration with the device alive."""
+        while True:
+            try:
+                await self._register(device, notify=bool(device.commands))
+            except LanError as err:
+                _LOGGER.debug("LAN registration with %s failed: %s", device.dsn, err)
+                device.reset()
+            await asyncio.sleep(device.keep_alive)
+
+    async def _register(self, device: LanDevice, notify: bool) -> None:
+        """Register with the device, starting a new session if needed.
+
+        Raises:
+          LanError: The device cannot be reached or rejected the registration.
+
+        """
+        method = "PUT" if device.connected else "POST"
+        try:
+            if self.local_ip is None:
+                self.local_ip = _local_ip_for(device.host)
+            async with asyncio.timeout(LAN_REQUEST_TIMEOUT):
+                response = await self.session.request(
+                    method,
+                    f"http://{device.address}/local_reg.json",
+                    json={
+                        "local_reg": {
+                            "ip": self.local_ip,
+                            "notify": int(notify),
+                            "port": self.port,
+                            "uri": LAN_URI,
+                        }
+                    },
+                )
+        except (aiohttp.ClientError, OSError) as err:
+            # OSError includes the timeouts
+            raise LanError(f"Unable to reach {device.dsn}: {err!r}") from err
+        if response.status >= 400:
+            raise LanError(f"Registration rejected with status {response.status}")
+        if method == "PUT":
+            device.last_seen = time.time()
+
+    def _device_for(self, request: web.Request) -> LanDevice:
+        """Return the device that sent a request."""
+        for device in self.devices.values():
+            if device.host == request.remote:
+                return device
+        raise web.HTTPNotFound
+
+    async def _handle_key_exchange(self, request: web.Request) -> web.Response:
+        """Handle the key exchange started by the device."""
+        device = self._device_for(request)
+        key_exchange = (await request.json()).get("key_exchange", {})
+        if (
+            key_exchange.get("ver") != 1
+            or key_exchange.get("proto") != 1
+            or key_exchange.get("key_id") != device.lanip_key_id
+        ):
+            _LOGGER.debug("Unsupported LAN key exchange %s", key_exchange)
+            raise web.HTTPBadRequest
+
+        random_2 = secrets.token_urlsafe(12)
+        time_2 = time.monotonic_ns() % 2**40
+        device.establish(
+            key_exchange["random_1"], random_2, key_exchange["time_1"], time_2
+        )
+        _LOGGER.debug("LAN session established with %s", device.dsn)
+        return web.json_response({"random_2": random_2, "time_2": time_2})
+
+    async def _handle_commands(self, request: web.Request) -> web.Response:
+        """Hand the next pending command to the device."""
+        device = self._device_for(request)
+        if device.app_cipher is None:
+            raise web.HTTPUnauthorized
+
+        device.last_seen = time.time()
+        device.seq_no += 1
+        command: dict[str, Any] = {}
+        while device.commands:
+            pending_command, delivered = device.commands.popleft()
+            if not delivered.done():
+                # Skip the commands their sender gave up on
+                command = pending_command
+                delivered.set_result(None)
+                break
+
+        # 206 tells the device more commands are pending
+        return web.json_response(
+            device.app_cipher.encrypt({"seq_no": device.seq_no, "data": command}),
+            status=206 if device.commands else 200,
+        )
+
+    async def _handle_datapoint(self, request: web.Request) -> web.Response:
+        """Handle a property value posted by the device."""
+        device = self._device_for(request)
+        if device.dev_cipher is None:
+            raise web.HTTPUnauthorized
+
+        device.last_seen = time.time()
+        try:
+            data = device.dev_cipher.decrypt(await request.json()).get("data", {})
+            cmd_id = request.query.get("cmd_id")
+            if cmd_id is not None:
+                cmd_id = int(cmd_id)
+        except (LanError, ValueError, KeyError) as err:
+            _LOGGER.debug("Invalid LAN datapoint from %s: %s", device.dsn, err)
+            raise web.HTTPBadRequest from err
+
+        if "name" in data:
+            device.values[data["name"]] = (data.get("value"), datetime.now(UTC))
+
+        if cmd_id is not None:
+            read = device.pending_reads.get(cmd_id)
+            if read is not None and not read.done():
+                read.set_result(None)
+
+        return web.Response()
+
+    def _create_task(self, coro) -> None:
+        """Run a task owned by the transport."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+def _local_ip_for(host: str) -> str:
+    """Return the local IP address used to reach a host."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.connect((host, 80))
+        return sock.getsockname()[0]
@@ -0,0 +1,186 @@
+"""Module providing the request metrics of the API client."""
+
+import bisect
+from collections import Counter, deque
+from datetime import UTC, datetime
+import re
+import time
+from typing import Any, NamedTuple
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Number of the latest requests and errors kept for the diagnostics
+RECENT_REQUESTS = 50
+RECENT_ERRORS = 20
+
+_ENDPOINT_PATTERNS = (
+    (re.compile(r"/dsns/[^/]+/"), "/dsns/{dsn}/"),
+    (re.compile(r"/properties/[^/]+/datapoints"), "/properties/{name}/datapoints"),
+)
+
+
+def endpoint_name(path: str) -> str:
+    """Return the endpoint of a request path, without its query and identifiers.
+
+    Args:
+      path (str): The path of the request, ie: "apiv1/dsns/AC000/properties.json".
+
+    Returns:
+      str: The endpoint, ie: "apiv1/dsns/{dsn}/properties.json".
+
+    """
+    endpoint = path.split("?", 1)[0]
+    for pattern, replacement in _ENDPOINT_PATTERNS:
+        endpoint = pattern.sub(replacement, endpoint)
+    return endpoint
+
+
+class LatencyHistogram:
+    """Distribution of request latencies in fixed buckets."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Record the latency of a request.
+
+        Args:
+          seconds (float): The latency of the request.
+
+        """
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percentile: float) -> float | None:
+        """Estimate a latency percentile as the upper bound of its bucket.
+
+        Args:
+          percentile (float): The percentile, between 0 and 100.
+
+        Returns:
+          float: The estimated latency in seconds, None without requests.
+
+        """
+        if not self.count:
+            return None
+        rank = self.count * percentile / 100
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets, strict=False):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram as milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else None,
+            "max_ms": self.max * 1000,
+            "p50_ms": _milliseconds(self.percentile(50)),
+            "p95_ms": _milliseconds(self.percentile(95)),
+            "buckets": {
+                **{
+                    f"le_{bound * 1000:g}ms": count
+                    for bound, count in zip(LATENCY_BUCKETS, self.buckets, strict=False)
+                },
+                "le_inf": self.buckets[-1],
+            },
+        }
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    return seconds * 1000 if seconds is not None else None
+
+
+class RequestSample(NamedTuple):
+    """A request kept in the history of the latest requests."""
+
+    at: float
+    endpoint: str
+    seconds: float
+    error: int | str | None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the request as JSON-serializable values."""
+        return {
+            "at": datetime.fromtimestamp(self.at, UTC).isoformat(),
+            "endpoint": self.endpoint,
+            "latency_ms": self.seconds * 1000,
+            "error": self.error,
+        }
+
+
+class ClientMetrics:
+    """Counters and latency histograms of the requests sent by the client."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.requests: Counter[str] = Counter()
+        self.errors: dict[str, Counter[str]] = {}
+        self.latency: dict[str, LatencyHistogram] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.logins = 0
+        self.token_refreshes = 0
+        self.recent_requests: deque[RequestSample] = deque(maxlen=RECENT_REQUESTS)
+        self.recent_errors: deque[RequestSample] = deque(maxlen=RECENT_ERRORS)
+
+    def record_request(
+        self, endpoint: str, seconds: float, error: int | str | None = None
+    ) -> None:
+        """Record a request sent to the cloud.
+
+        Args:
+          endpoint (str): The endpoint of the request, see endpoint_name.
+          seconds (float): The time until the response or the failure.
+          error (int | str): The HTTP status of a failed response, or the name of
+            the exception raised by the request.
+
+        """
+        self.requests[endpoint] += 1
+        self.latency.setdefault(endpoint, LatencyHistogram()).observe(seconds)
+        sample = RequestSample(time.time(), endpoint, seconds, error)
+        self.recent_requests.append(sample)
+        if error is not None:
+            self.errors.setdefault(endpoint, Counter())[str(error)] += 1
+            self.recent_errors.append(sample)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return every metric as JSON-serializable values."""
+        overall = LatencyHistogram()
+        for histogram in self.latency.values():
+            for index, count in enumerate(histogram.buckets):
+                overall.buckets[index] += count
+            overall.count += histogram.count
+            overall.total += histogram.total
+            overall.max = max(overall.max, histogram.max)
+
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "requests": sum(self.requests.values()),
+            "errors": sum(sum(errors.values()) for errors in self.errors.values()),
+            "latency": overall.as_dict(),
+            "endpoints": {
+                endpoint: {
+                    "requests": count,
+                    "errors": dict(self.errors.get(endpoint, {})),
+                    "latency": self.latency[endpoint].as_dict(),
+                }
+                for endpoint, count in self.requests.items()
+            },
+            "cache": {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_ratio": self.cache_hits / lookups if lookups else None,
+            },
+            "logins": self.logins,
+            "token_refreshes": self.token_refreshes,
+        }
@@ -0,0 +1,149 @@
+"""Module providing the rate limiter of the requests of an account."""
+
+import asyncio
+from collections import deque
+from enum import IntEnum
+import time
+from typing import Any
+
+from .accounts import LowestSettingRegistry
+from .const import DEFAULT_RATE_LIMIT
+
+# Requests that can be sent at once after a quiet period
+RATE_LIMIT_BURST = 20
+
+
+class Priority(IntEnum):
+    """Enum representing the priority of a request, the lowest value first.
+
+    Attributes:
+      COMMAND (int): Writes requested by the user or an automation.
+      POLL (int): Background reads.
+
+    """
+
+    COMMAND = 0
+    POLL = 1
+
+
+class RateLimiter:
+    """Token bucket limiting the requests sent on behalf of an account.
+
+    Requests over the limit wait for a token, commands being served before polls.
+    """
+
+    def __init__(
+        self, rate: float = DEFAULT_RATE_LIMIT, burst: int = RATE_LIMIT_BURST
+    ) -> None:
+        """Initialize.
+
+        Args:
+          rate (float): The number of requests per minute.
+          burst (int): The number of requests that can be sent at once.
+
+        """
+        self.rate = rate
+        self.burst = burst
+        self.throttled = 0
+        self.wait_time = 0.0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters: dict[Priority, deque[asyncio.Future[None]]] = {
+            priority: deque() for priority in Priority
+        }
+        self._task: asyncio.Task | None = None
+
+    async def acquire(self, priority: Priority = Priority.POLL) -> None:
+        """Wait until a request may be sent.
+
+        Args:
+          priority (Priority): The priority of the request.
+
+        """
+        self._refill()
+        if self._tokens >= 1 and not any(
+            self._waiters[waiting] for waiting in Priority if waiting <= priority
+        ):
+            self._tokens -= 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        self.throttled += 1
+        if self._task is None:
+            self._task = asyncio.create_task(self._grant())
+
+        start = time.monotonic()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter in self._waiters[priority]:
+                self._waiters[priority].remove(waiter)
+            raise
+        finally:
+            self.wait_time += time.monotonic() - start
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the limiter as JSON-serializable values."""
+        self._refill()
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": self._tokens,
+            "waiting": {
+                priority.name.lower(): len(waiters)
+                for priority, waiters in self._waiters.items()
+            },
+            "throttled": self.throttled,
+            "wait_time": self.wait_time,
+        }
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self.rate / 60
+        )
+        self._updated = now
+
+    async def _grant(self) -> None:
+        """Hand out tokens to the waiting requests, by priority."""
+        try:
+            while waiters := next(
+                (waiters for waiters in self._waiters.values() if waiters), None
+            ):
+                self._refill()
+                if self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) * 60 / self.rate)
+                    continue
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    self._tokens -= 1
+                    waiter.set_result(None)
+        finally:
+            self._task = None
+
+
+class RateLimiters(LowestSettingRegistry[RateLimiter]):
+    """Rate limiters shared by the clients of the same account.
+
+    The limiter of an account enforces the lowest rate its entries are configured
+    with.
+    """
+
+    attribute = "rate"
+
+    def acquire(self, key: str, owner: str, rate: float) -> RateLimiter:
+        """Return the limiter of an account, creating it if needed.
+
+        Args:
+          key (str): The key of the account, see account_key.
+          owner (str): The identifier of the config entry using the limiter.
+          rate (float): The number of requests per minute the entry is configured
+            with.
+
+        Returns:
+          RateLimiter: The limiter of the account.
+
+        """
+        return self._acquire(key, owner, lambda: RateLimiter(rate), rate)
@@ -0,0 +1,112 @@
+"""Module providing the registry of the clients shared by the config entries."""
+
+from collections.abc import Callable
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util.hass_dict import HassKey
+
+from .accounts import AccountRegistry
+from .client import DEFAULT_ENDPOINTS, APIClient, Endpoints
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_CLIENTS: HassKey["ClientRegistry"] = HassKey(f"{DOMAIN}_clients")
+
+
+def account_key(email: str, endpoints: Endpoints | None = None) -> str:
+    """Return the key identifying an account.
+
+    Args:
+      email (str): The email of the account.
+      endpoints (Endpoints): The URLs of the cloud the account belongs to, the
+        default ones if omitted.
+
+    Returns:
+      str: The key of the account.
+
+    """
+    return f"{email.strip().casefold()}@{(endpoints or DEFAULT_ENDPOINTS).ads}"
+
+
+def async_get_clients(hass: HomeAssistant) -> "ClientRegistry":
+    """Return the registry of the clients, creating it if needed."""
+    return hass.data.setdefault(DATA_CLIENTS, ClientRegistry())
+
+
+class ClientRegistry(AccountRegistry[APIClient]):
+    """Clients shared by the config entries of the same account.
+
+    A client is created by the first entry of an account and closed once the last
+    one is unloaded. The config flow hands the client it authenticated to the entry
+    it creates, which then starts without logging in again.
+    """
+
+    def get(self, key: str, password: str) -> APIClient | None:
+        """Return the client of an account, if any.
+
+        Args:
+          key (str): The key of the account, see account_key.
+          password (str): The password the client must use.
+
+        Returns:
+          APIClient: The client of the account, None if there is none or it uses
+            another password.
+
+        """
+        client = self._shared.get(key)
+        if client is None or client.password != password:
+            return None
+        return client
+
+    def hand_off(self, key: str, client: APIClient) -> None:
+        """Keep a client for the entry about to be set up, unless one is in use.
+
+        Args:
+          key (str): The key of the account, see account_key.
+          client (APIClient): The authenticated client.
+
+        """
+        if not self._in_use(key):
+            self._shared[key] = client
+
+    def acquire(
+        self, key: str, owner: str, password: str, factory: Callable[[], APIClient]
+    ) -> APIClient:
+        """Return the client of an account, creating it if needed.
+
+        Args:
+          key (str): The key of the account, see account_key.
+          owner (str): The identifier of the config entry using the client.
+          password (str): The password the client must use.
+          factory (Callable): Creates the client.
+
+        Returns:
+          APIClient: The client of the account.
+
+        """
+        client = self._shared.get(key)
+        if client is not None and client.password != password:
+            if self._in_use(key):
+                # The password changed while other entries still use the account
+                _LOGGER.debug("Updating the password of the client of %s", key)
+                client.password = password
+            else:
+                del self._shared[key]
+        return self._acquire(key, owner, factory)
+
+    async def async_release(self, key: str, owner: str) -> None:
+        """Stop using the client of an account, closing it once unused.
+
+        Args:
+          key (str): The key of the account, see account_key.
+          owner (str): The identifier of the config entry using the client.
+
+        """
+        client = self._shared.get(key)
+        self.release(key, owner)
+        if client is not None and key not in self._shared:
+            await client.async_stop_lan()
+            await client.async_stop_datastream()
+            await client.async_stop_revalidations()
@@ -0,0 +1,164 @@
+"""Module providing the retry and circuit breaker policies of the cloud requests."""
+
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+import logging
+import random
+import time
+from typing import Any
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds a single request may take, from connecting to reading the response
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+# Attempts of a request that failed transiently, including the first one
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_MIN = 0.5
+RETRY_BACKOFF_MAX = 8
+# Longest Retry-After honored, a later retry fails the request instead
+RETRY_AFTER_MAX = 30
+
+# Statuses of the responses worth retrying
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Consecutive failed requests opening the breaker
+BREAKER_FAILURE_THRESHOLD = 5
+# Seconds the breaker stays open before letting a trial request through
+BREAKER_RESET_TIMEOUT = 60
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """Request not sent as the cloud is failing."""
+
+
+def retry_delay(attempt: int, retry_after: str | None = None) -> float | None:
+    """Return how long to wait before retrying a request.
+
+    Args:
+      attempt (int): The number of attempts already made.
+      retry_after (str): The Retry-After header of the response, in seconds or as
+        an HTTP date.
+
+    Returns:
+      float: The seconds to wait, None if the server asks to wait too long.
+
+    """
+    if retry_after is not None:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = (
+                    parsedate_to_datetime(retry_after) - datetime.now(UTC)
+                ).total_seconds()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return max(delay, 0) if delay <= RETRY_AFTER_MAX else None
+
+    backoff = min(RETRY_BACKOFF_MIN * 2 ** (attempt - 1), RETRY_BACKOFF_MAX)
+    return backoff * random.uniform(0.5, 1)
+
+
+def is_transient(err: Exception) -> bool:
+    """Return True if a failed request may succeed when retried."""
+    if isinstance(err, aiohttp.ClientResponseError):
+        return err.status in RETRY_STATUSES
+    return isinstance(err, (aiohttp.ClientConnectionError, TimeoutError))
+
+
+class CircuitBreaker:
+    """Stop sending requests to the cloud while it keeps failing.
+
+    The breaker opens after consecutive transient failures, failing the requests
+    right away. Once the reset timeout elapsed, a single trial request is let
+    through: its success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+    ) -> None:
+        """Initialize.
+
+        Args:
+          failure_threshold (int): The consecutive failures opening the breaker.
+          reset_timeout (float): The seconds the breaker stays open.
+
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def is_open(self) -> bool:
+        """Return True while requests are rejected without being sent."""
+        if self.opened_at is None:
+            return False
+        return self._trial or time.monotonic() - self.opened_at < self.reset_timeout
+
+    def before_request(self) -> bool:
+        """Check that a request may be sent.
+
+        Returns:
+          bool: True if the request is the trial request of the open breaker, which
+            must then end with record_success, record_failure or end_trial.
+
+        Raises:
+          CircuitOpenError: The breaker is open.
+
+        """
+        if self.is_open:
+            raise CircuitOpenError("Cloud requests suspended after repeated failures")
+        if self.opened_at is None:
+            return False
+        # Let a single trial request through
+        self._trial = True
+        return True
+
+    def end_trial(self) -> None:
+        """Let another trial request through, the trial ending without an outcome.
+
+        A trial failing before reaching the cloud, or cancelled, neither closes nor
+        opens the breaker again.
+        """
+        self._trial = False
+
+    def record_success(self) -> None:
+        """Record a request that succeeded, closing the breaker."""
+        if self.opened_at is not None:
+            _LOGGER.info("Cloud requests succeeding again, resuming")
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        """Record a request that failed transiently."""
+        self.failures += 1
+        self._trial = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                _LOGGER.warning(
+                    "Suspending cloud requests for %s seconds after %s failures",
+                    self.reset_timeout,
+                    self.failures,
+                )
+            self.opened_at = time.monotonic()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the breaker as JSON-serializable values."""
+        return {
+            "open": self.is_open,
+            "failures": self.failures,
+            "opened_ago": (
+                time.monotonic() - self.opened_at
+                if self.opened_at is not None
+                else None
+            ),
+        }
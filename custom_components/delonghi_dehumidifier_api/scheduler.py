@@ -0,0 +1,179 @@
+"""Module providing the adaptive poll interval of the devices."""
+
+from collections.abc import Callable
+from datetime import timedelta
+import time
+from typing import Any
+
+from .accounts import LowestSettingRegistry
+from .client import PropertySnapshot, Status
+from .const import DEFAULT_DAILY_REQUEST_BUDGET, SCAN_INTERVAL
+
+ACTIVE_INTERVAL = timedelta(seconds=20)
+IDLE_INTERVAL = timedelta(minutes=30)
+
+# A device is active while its humidity is this far from the setpoint
+ACTIVE_HUMIDITY_DELTA = 5
+# A device is active for this long after any of its values changed
+ACTIVE_PERIOD = 300
+
+BUDGET_PERIOD = 86400
+
+# The properties the activity of a device is tracked with
+SCHEDULER_PROPERTIES = frozenset(
+    {
+        "device_status",
+        "device_mode",
+        "current_humidity",
+        "humidity_setpoint",
+        "current_speed",
+    }
+)
+
+
+class PollScheduler:
+    """Choose how often to poll each device of an account.
+
+    Devices that are off are polled rarely, devices working toward their setpoint or
+    whose values recently changed are polled often. Whatever their activity, the
+    devices share the daily request budget of the account.
+    """
+
+    def __init__(
+        self,
+        request_count: Callable[[], int],
+        daily_budget: int = DEFAULT_DAILY_REQUEST_BUDGET,
+    ) -> None:
+        """Initialize.
+
+        Args:
+          request_count (Callable): Returns the number of requests sent to the cloud
+            by the account so far.
+          daily_budget (int): The number of requests the account may send per day.
+
+        """
+        self.daily_budget = daily_budget
+        self._request_count = request_count
+        self._values: dict[str, tuple] = {}
+        self._last_changed: dict[str, float] = {}
+        self._period_start = time.monotonic()
+        self._period_start_requests = request_count()
+
+    def observe(self, device_dsn: str, snapshot: PropertySnapshot) -> None:
+        """Record the latest properties of a device to track its activity.
+
+        Args:
+          device_dsn (str): The DSN of the device.
+          snapshot (PropertySnapshot): The latest properties of the device.
+
+        """
+        values = (
+            snapshot.device_status,
+            snapshot.device_mode,
+            snapshot.current_humidity,
+            snapshot.humidity_setpoint,
+            snapshot.current_speed,
+        )
+        if self._values.get(device_dsn) != values:
+            self._values[device_dsn] = values
+            self._last_changed[device_dsn] = time.monotonic()
+
+    def interval(self, device_dsn: str, snapshot: PropertySnapshot) -> timedelta:
+        """Return how long to wait before polling a device again.
+
+        Args:
+          device_dsn (str): The DSN of the device.
+          snapshot (PropertySnapshot): The latest properties of the device.
+
+        Returns:
+          timedelta: The poll interval of the device.
+
+        """
+        if snapshot.device_status == Status.OFF:
+            interval = IDLE_INTERVAL
+        elif self._is_active(device_dsn, snapshot):
+            interval = ACTIVE_INTERVAL
+        else:
+            interval = SCAN_INTERVAL
+
+        return max(interval, self._budget_interval())
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the scheduler as JSON-serializable values."""
+        self._roll_period()
+        now = time.monotonic()
+        return {
+            "daily_budget": self.daily_budget,
+            "period_elapsed": now - self._period_start,
+            "period_requests": self._request_count() - self._period_start_requests,
+            "budget_interval": self._budget_interval().total_seconds(),
+            "devices": {
+                device_dsn: {"last_changed_ago": now - last_changed}
+                for device_dsn, last_changed in self._last_changed.items()
+            },
+        }
+
+    def _is_active(self, device_dsn: str, snapshot: PropertySnapshot) -> bool:
+        """Return True if the device is working or its values recently changed."""
+        if time.monotonic() - self._last_changed.get(device_dsn, 0) < ACTIVE_PERIOD:
+            return True
+        if snapshot.current_humidity is None or snapshot.humidity_setpoint is None:
+            return False
+        return (
+            snapshot.current_humidity - snapshot.humidity_setpoint
+            >= ACTIVE_HUMIDITY_DELTA
+        )
+
+    def _budget_interval(self) -> timedelta:
+        """Return the shortest interval keeping every device within the budget."""
+        self._roll_period()
+        remaining_time = BUDGET_PERIOD - (time.monotonic() - self._period_start)
+        remaining_requests = self.daily_budget - (
+            self._request_count() - self._period_start_requests
+        )
+        devices = max(len(self._values), 1)
+        if remaining_requests < devices:
+            # Out of budget, wait for the next period
+            return timedelta(seconds=remaining_time)
+        return timedelta(seconds=remaining_time * devices / remaining_requests)
+
+    def _roll_period(self) -> None:
+        """Start a new budget period once the current one is over."""
+        if time.monotonic() - self._period_start >= BUDGET_PERIOD:
+            self._period_start = time.monotonic()
+            self._period_start_requests = self._request_count()
+
+
+class PollSchedulers(LowestSettingRegistry[PollScheduler]):
+    """Poll schedulers shared by the config entries of the same account.
+
+    The scheduler of an account enforces the lowest daily budget its entries are
+    configured with.
+    """
+
+    attribute = "daily_budget"
+
+    def acquire(
+        self,
+        key: str,
+        owner: str,
+        request_count: Callable[[], int],
+        daily_budget: int,
+    ) -> PollScheduler:
+        """Return the scheduler of an account, creating it if needed.
+
+        Args:
+          key (str): The key of the account, see account_key.
+          owner (str): The identifier of the config entry using the scheduler.
+          request_count (Callable): Returns the number of requests sent to the cloud
+            by the account so far.
+          daily_budget (int): The number of requests per day the entry is
+            configured with.
+
+        Returns:
+          PollScheduler: The scheduler of the account.
+
+        """
+        return self._acquire(
+            key, owner, lambda: PollScheduler(request_count, daily_budget), daily_budget
+        )
@@ -2,9 +2,7 @@
 
 from __future__ import annotations
 
-from collections.abc import Callable, Coroutine
-from datetime import timedelta
-from enum import Enum
+from collections.abc import Callable
 import logging
 import re
 from typing import Any
@@ -14,7 +12,6 @@ from homeassistant.components.sensor import (
     SensorEntity,
     SensorStateClass,
 )
-from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     PERCENTAGE,
     EntityCategory,
@@ -22,211 +19,281 @@ from homeassistant.const import (
     UnitOfTemperature,
     UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import StateType
 
 from .client import APIClient, FilterStatus, Mode, OffOnStatus, Status
 from .const import DOMAIN
-from .utils import fetch_device_info
+from .coordinator import (
+    DeLonghiDehumidifierConfigEntry,
+    DeLonghiDehumidifierCoordinator,
+)
+from .entity import DeLonghiDehumidifierEntity
+from .utils import account_device_info
 
 _LOGGER = logging.getLogger(__name__)
 
-SCAN_INTERVAL = timedelta(minutes=1)
-
 
 async def async_setup_entry(
     hass: HomeAssistant,
-    config_entry: ConfigEntry[APIClient],
+    config_entry: DeLonghiDehumidifierConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up current environment dehumidifier entity."""
 
-    client = config_entry.runtime_data
-    device_info = await fetch_device_info(client)
-    device_dsn = await client.get_first_device()
-    async_add_entities(
-        [
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Current Humidity",
-                client.get_current_humidity,
-                SensorDeviceClass.HUMIDITY,
-                state_class=SensorStateClass.MEASUREMENT,
-                unit_of_measurement=PERCENTAGE,
-            ),
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Target Humidity",
-                client.get_humidity_setpoint,
-                SensorDeviceClass.HUMIDITY,
-                state_class=SensorStateClass.MEASUREMENT,
-                unit_of_measurement=PERCENTAGE,
-            ),
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Current Speed",
-                client.get_current_speed,
-                SensorDeviceClass.SPEED,
-                state_class=SensorStateClass.MEASUREMENT,
-                unit_of_measurement=UnitOfSpeed.METERS_PER_SECOND,
-            ),
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Filter Status",
-                get_and_extract_enum_name(client.get_filter_status),
-                SensorDeviceClass.ENUM,
-                options=[status.name for status in FilterStatus],
-            ),
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Room Temperature",
-                client.get_room_temp,
-                SensorDeviceClass.TEMPERATURE,
-                state_class=SensorStateClass.MEASUREMENT,
-                unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
-            ),
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Heat Exchanger Temperature",
-                client.get_heat_exchanger_temp,
-                SensorDeviceClass.TEMPERATURE,
-                state_class=SensorStateClass.MEASUREMENT,
-                unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
-            ),
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Device Mode",
-                get_and_extract_enum_name(client.get_device_mode),
-                SensorDeviceClass.ENUM,
-                options=[mode.name for mode in Mode],
-            ),
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Device Status",
-                get_and_extract_enum_name(client.get_device_status),
-                SensorDeviceClass.ENUM,
-                options=[mode.name for mode in Status],
-            ),
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Eco Mode",
-                get_and_extract_enum_name(client.get_eco),
-                SensorDeviceClass.ENUM,
-                options=[status.name for status in OffOnStatus],
-            ),
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Swing Mode",
-                get_and_extract_enum_name(client.get_swing),
-                SensorDeviceClass.ENUM,
-                options=[status.name for status in OffOnStatus],
-            ),
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Filter Change Alarm",
-                get_and_extract_enum_name(client.get_filter_change_alarm),
-                SensorDeviceClass.ENUM,
-                options=[status.name for status in OffOnStatus],
-            ),
-            # TODO: Fix units
-            GenericSensor(
-                device_dsn,
-                device_info,
-                client,
-                "Filter Life",
-                client.get_filter_life,
-                SensorDeviceClass.DURATION,
-                state_class=SensorStateClass.MEASUREMENT,
-                unit_of_measurement=UnitOfTime.DAYS,
-            ),
-        ]
-    )
+    client = config_entry.runtime_data.client
+    entities = []
+    for device_dsn, coordinator in config_entry.runtime_data.coordinators.items():
+        device_info = config_entry.runtime_data.device_infos[device_dsn]
+        entities.extend(device_sensors(coordinator, device_info))
+    entities.extend(client_sensors(client, config_entry))
+    async_add_entities(entities)
 
 
-def get_and_extract_enum_name(
-    get_current_value: Callable[[], Coroutine[Any, Any, Enum]],
-) -> Callable[[], Coroutine[Any, Any, str]]:
-    """Wrap a Callable that returns an Awaitable[Enum], and returns a Callable returning an Awaitable[str] with the enum name."""
+def device_sensors(
+    coordinator: DeLonghiDehumidifierCoordinator, device_info: DeviceInfo
+) -> list[GenericSensor]:
+    """Create the sensors of a single device."""
+    return [
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Current Humidity",
+            "current_humidity",
+            SensorDeviceClass.HUMIDITY,
+            state_class=SensorStateClass.MEASUREMENT,
+            unit_of_measurement=PERCENTAGE,
+        ),
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Target Humidity",
+            "humidity_setpoint",
+            SensorDeviceClass.HUMIDITY,
+            state_class=SensorStateClass.MEASUREMENT,
+            unit_of_measurement=PERCENTAGE,
+        ),
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Current Speed",
+            "current_speed",
+            SensorDeviceClass.SPEED,
+            state_class=SensorStateClass.MEASUREMENT,
+            unit_of_measurement=UnitOfSpeed.METERS_PER_SECOND,
+        ),
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Filter Status",
+            "filter_status",
+            SensorDeviceClass.ENUM,
+            options=[status.name for status in FilterStatus],
+        ),
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Room Temperature",
+            "room_temp",
+            SensorDeviceClass.TEMPERATURE,
+            state_class=SensorStateClass.MEASUREMENT,
+            unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+        ),
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Heat Exchanger Temperature",
+            "heat_exchanger_temp",
+            SensorDeviceClass.TEMPERATURE,
+            state_class=SensorStateClass.MEASUREMENT,
+            unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+        ),
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Device Mode",
+            "device_mode",
+            SensorDeviceClass.ENUM,
+            options=[mode.name for mode in Mode],
+        ),
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Device Status",
+            "device_status",
+            SensorDeviceClass.ENUM,
+            options=[mode.name for mode in Status],
+        ),
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Eco Mode",
+            "set_eco",
+            SensorDeviceClass.ENUM,
+            options=[status.name for status in OffOnStatus],
+        ),
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Swing Mode",
+            "swing",
+            SensorDeviceClass.ENUM,
+            options=[status.name for status in OffOnStatus],
+        ),
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Filter Change Alarm",
+            "filter_change_alarm",
+            SensorDeviceClass.ENUM,
+            options=[status.name for status in OffOnStatus],
+        ),
+        # TODO: Fix units
+        GenericSensor(
+            coordinator,
+            device_info,
+            "Filter Life",
+            "filter_life",
+            SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            unit_of_measurement=UnitOfTime.DAYS,
+        ),
+    ]
 
-    async def wrapper() -> str:
-        mode = await get_current_value()
-        return mode.name
 
-    return wrapper
+def client_sensors(
+    client: APIClient, config_entry: DeLonghiDehumidifierConfigEntry
+) -> list[ClientSensor]:
+    """Create the sensors of the requests sent by the client of an account."""
+    device_info = account_device_info(config_entry)
+    return [
+        ClientSensor(
+            client,
+            config_entry.entry_id,
+            device_info,
+            "Cloud Requests",
+            lambda stats: stats["requests"],
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            get_attributes=lambda stats: {
+                endpoint: endpoint_stats["requests"]
+                for endpoint, endpoint_stats in stats["endpoints"].items()
+            },
+        ),
+        ClientSensor(
+            client,
+            config_entry.entry_id,
+            device_info,
+            "Cloud Errors",
+            lambda stats: stats["errors"],
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            get_attributes=lambda stats: {
+                endpoint: endpoint_stats["errors"]
+                for endpoint, endpoint_stats in stats["endpoints"].items()
+                if endpoint_stats["errors"]
+            },
+        ),
+        ClientSensor(
+            client,
+            config_entry.entry_id,
+            device_info,
+            "Cloud Latency",
+            lambda stats: stats["latency"]["mean_ms"],
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            unit_of_measurement=UnitOfTime.MILLISECONDS,
+            get_attributes=lambda stats: {
+                key: stats["latency"][key] for key in ("p50_ms", "p95_ms", "max_ms")
+            },
+        ),
+        ClientSensor(
+            client,
+            config_entry.entry_id,
+            device_info,
+            "Properties Cache Hit Ratio",
+            lambda stats: (
+                round(stats["cache"]["hit_ratio"] * 100, 1)
+                if stats["cache"]["hit_ratio"] is not None
+                else None
+            ),
+            state_class=SensorStateClass.MEASUREMENT,
+            unit_of_measurement=PERCENTAGE,
+        ),
+        ClientSensor(
+            client,
+            config_entry.entry_id,
+            device_info,
+            "Logins",
+            lambda stats: stats["logins"],
+            state_class=SensorStateClass.TOTAL_INCREASING,
+        ),
+        ClientSensor(
+            client,
+            config_entry.entry_id,
+            device_info,
+            "Token Refreshes",
+            lambda stats: stats["token_refreshes"],
+            state_class=SensorStateClass.TOTAL_INCREASING,
+        ),
+        ClientSensor(
+            client,
+            config_entry.entry_id,
+            device_info,
+            "Rate Limited Requests",
+            lambda stats: stats["rate_limit"]["throttled"],
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            get_attributes=lambda stats: {
+                key: stats["rate_limit"][key]
+                for key in ("rate", "waiting", "wait_time")
+            },
+        ),
+    ]
 
 
-class GenericSensor(SensorEntity):
+class GenericSensor(DeLonghiDehumidifierEntity, SensorEntity):
     """Current environment humidity sensor."""
 
-    _attr_should_poll = True
     _attr_has_entity_name = True
     _attr_entity_category = EntityCategory.DIAGNOSTIC
 
     def __init__(
         self,
-        device_dsn: str,
+        coordinator: DeLonghiDehumidifierCoordinator,
         device_info: DeviceInfo,
-        client: APIClient,
         type_name: str,
-        get_value: Callable[[], Coroutine[Any, Any, Any]],
+        property_name: str,
         device_class: SensorDeviceClass,
         state_class: SensorStateClass | None = None,
         unit_of_measurement: str | None = None,
         options: list[str] | None = None,
     ) -> None:
         """Initialize."""
-        self.client = client
-        self._attr_unique_id = (
-            f"{DOMAIN}_{device_dsn}_{re.sub(r'\s+', '_', type_name.lower())}_sensor"
-        )
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{DOMAIN}_{coordinator.device_dsn}_{re.sub(r'\s+', '_', type_name.lower())}_sensor"
         self._attr_name = type_name
         self._attr_device_info = device_info
-        self._get_value = get_value
+        self._property_name = property_name
+        self._required_properties = (property_name,)
         self._attr_device_class = device_class
         self._attr_state_class = state_class
         self._attr_native_unit_of_measurement = unit_of_measurement
         self._attr_options = options
+        self._update_attrs()
         _LOGGER.debug("Initialized %s", self._attr_unique_id)
 
-    async def async_added_to_hass(self) -> None:
-        """Call when the entity is added to Home Assistant."""
-        await self.async_update()
-
-    async def async_update(self):
-        """Update the sensor's state.
-
-        This method fetches the current humidity from the client and updates the
-        sensor's native value with the retrieved humidity. It also logs the current
-        humidity value for debugging purposes.
-
-        Returns:
-            None
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._update_attrs()
+        super()._handle_coordinator_update()
 
-        """
-        self._attr_native_value = await self._get_value()
+    def _update_attrs(self) -> None:
+        """Update the sensor's state from the latest device properties."""
+        value = getattr(self.coordinator.data, self._property_name)
+        if self._attr_device_class == SensorDeviceClass.ENUM and value is not None:
+            value = value.name
+        self._attr_native_value = value
         _LOGGER.debug(
             "Updated %s with %s",
             self._attr_unique_id,
@@ -234,3 +301,45 @@ class GenericSensor(SensorEntity):
                 "value": self._attr_native_value,
             },
         )
+
+
+class ClientSensor(SensorEntity):
+    """Metric of the requests sent to the cloud by the client of an account."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_should_poll = True
+
+    def __init__(
+        self,
+        client: APIClient,
+        account_id: str,
+        device_info: DeviceInfo,
+        type_name: str,
+        get_value: Callable[[dict[str, Any]], StateType],
+        device_class: SensorDeviceClass | None = None,
+        state_class: SensorStateClass | None = None,
+        unit_of_measurement: str | None = None,
+        get_attributes: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+    ) -> None:
+        """Initialize."""
+        self.client = client
+        self._attr_unique_id = (
+            f"{DOMAIN}_{account_id}_{re.sub(r'\s+', '_', type_name.lower())}_sensor"
+        )
+        self._attr_name = type_name
+        self._attr_device_info = device_info
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._attr_native_unit_of_measurement = unit_of_measurement
+        self._get_value = get_value
+        self._get_attributes = get_attributes
+        _LOGGER.debug("Initialized %s", self._attr_unique_id)
+
+    async def async_update(self) -> None:
+        """Update the sensor's state from the latest client metrics."""
+        stats = self.client.stats()
+        self._attr_native_value = self._get_value(stats)
+        if self._get_attributes is not None:
+            self._attr_extra_state_attributes = self._get_attributes(stats)
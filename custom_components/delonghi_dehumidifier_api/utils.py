@@ -1,21 +1,37 @@
-from homeassistant.helpers.device_registry import DeviceInfo
+from typing import Any
 
-from .client import APIClient
-from .const import DOMAIN
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_EMAIL
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 
+from .client import PROPERTY_TIERS, PropertySnapshot, PropertyTier
+from .const import DOMAIN
 
-async def fetch_device_info(client: APIClient) -> DeviceInfo:
-    device_name = await client.get_product_name()
-    device_model = await client.get_appliance_model()
-    firmware_version = await client.get_firmware_version()
-    hardware_version = await client.get_hardware_version()
-    device_dsn = await client.get_first_device()
 
+def build_device_info(device_dsn: str, snapshot: PropertySnapshot) -> DeviceInfo:
     return DeviceInfo(
         identifiers={(DOMAIN, device_dsn)},
-        name=f"{device_name} Dehumidifier",
+        name=f"{snapshot.product_name} Dehumidifier",
+        manufacturer="DeLonghi",
+        model=snapshot.appliance_model,
+        sw_version=snapshot.firmware_version,
+        hw_version=snapshot.hardware_version,
+    )
+
+
+def static_properties(snapshot: PropertySnapshot) -> dict[str, Any]:
+    """Return the properties of a snapshot that never change, ie: its device info."""
+    return {
+        name: getattr(snapshot, name)
+        for name, tier in PROPERTY_TIERS.items()
+        if tier is PropertyTier.STATIC
+    }
+
+
+def account_device_info(config_entry: ConfigEntry) -> DeviceInfo:
+    return DeviceInfo(
+        identifiers={(DOMAIN, config_entry.entry_id)},
+        name=f"DeLonghi Cloud {config_entry.data[CONF_EMAIL]}",
         manufacturer="DeLonghi",
-        model=device_model,
-        sw_version=firmware_version,
-        hw_version=hardware_version,
+        entry_type=DeviceEntryType.SERVICE,
     )
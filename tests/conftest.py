@@ -3,6 +3,7 @@
 """Global fixtures for integration."""
 
 from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 
@@ -37,11 +38,85 @@ def single_appliance():
     with patch.multiple(
         APIClient,
         get_access_token=AsyncMock(return_value="TEST-TOKEN"),
+        get_first_device=AsyncMock(return_value="TEST-DSN"),
         get_product_name=AsyncMock(return_value="TEST-PRODUCT-NAME"),
     ):
         yield
 
 
+MOCK_DEVICE_DSN = "AC000W000000001"
+
+MOCK_PROPERTIES = {
+    "appliance_model": "DDSX220WFA",
+    "firmware_version": "1.0.0",
+    "hardware_version": "1.0",
+    "current_humidity": 62,
+    "humidity_setpoint": 50,
+    "current_speed": 2,
+    "device_mode": 1,
+    "device_status": 1,
+    "filter_change_alarm": 0,
+    "filter_life": 120,
+    "filter_status": 1,
+    "heat_exchanger_temp": 70,
+    "room_temp": 68,
+    "rotation_speed": 1,
+    "set_eco": 0,
+    "swing": 1,
+}
+
+
+def mock_properties_response(properties: dict) -> list[dict]:
+    """Build a properties.json response payload for the given property values."""
+    return [
+        {
+            "property": {
+                "name": name,
+                "value": value,
+                "product_name": "TEST-PRODUCT-NAME",
+                "data_updated_at": "2025-01-01T00:00:00Z",
+            }
+        }
+        for name, value in properties.items()
+    ]
+
+
+@pytest.fixture(name="mock_devices")
+def mock_devices_fixture() -> list[str]:
+    """DSNs of the devices in the mocked account."""
+    return [MOCK_DEVICE_DSN]
+
+
+@pytest.fixture(name="mock_cloud")
+def mock_cloud(mock_devices: list[str]):
+    """Answer API requests with the mocked devices and their properties."""
+
+    async def get_request(path: str):
+        if path == "apiv1/devices.json":
+            return [
+                {"device": {"dsn": device_dsn, "product_name": "TEST-PRODUCT-NAME"}}
+                for device_dsn in mock_devices
+            ]
+        names = parse_qs(urlparse(path).query).get("names[]")
+        return mock_properties_response(
+            {
+                name: value
+                for name, value in MOCK_PROPERTIES.items()
+                if names is None or name in names
+            }
+        )
+
+    get_request_mock = AsyncMock(side_effect=get_request)
+    with patch.multiple(
+        APIClient,
+        get_access_token=AsyncMock(return_value="TEST-TOKEN"),
+        get_request=get_request_mock,
+        post_request=AsyncMock(return_value={}),
+        token_renewal_loop=AsyncMock(),
+    ):
+        yield get_request_mock
+
+
 # @pytest.fixture(name="midea_invalid_auth")
 # def midea_invalid_auth():
 #     """Skip calls to get data from API."""
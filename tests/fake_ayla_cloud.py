@@ -0,0 +1,252 @@
+"""Local stand-in for the Ayla and Gigya cloud services."""
+
+import asyncio
+from collections import Counter
+from dataclasses import fields
+from typing import Any
+
+from aiohttp import web
+
+from custom_components.delonghi_dehumidifier_api.client import API_KEY, Endpoints
+
+from .conftest import MOCK_PROPERTIES
+
+ACCESS_TOKEN_TTL = 86400
+
+
+class FakeAylaCloud:
+    """Cloud services serving the login flow and the device API on localhost.
+
+    Every service is served from the same address, as their paths do not overlap.
+    Requests are counted per route, can be slowed down by a fixed latency and can
+    be failed on demand.
+    """
+
+    def __init__(self, devices: int = 1, latency: float = 0.0) -> None:
+        """Initialize.
+
+        Args:
+          devices (int): The number of devices in the account.
+          latency (float): The seconds every request waits before being answered.
+
+        """
+        self.url = ""
+        self.latency = latency
+        self.requests: Counter[str] = Counter()
+        self.logins = 0
+        self.device_properties: dict[str, dict[str, Any]] = {
+            f"AC000W{index:09d}": dict(MOCK_PROPERTIES)
+            for index in range(1, devices + 1)
+        }
+        self._failures: list[list] = []
+        self._tokens = 0
+        self._access_tokens: set[str] = set()
+        self._refresh_tokens: set[str] = set()
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def endpoints(self) -> Endpoints:
+        """Return the endpoints pointing every service at this fake."""
+        return Endpoints(**{field.name: self.url for field in fields(Endpoints)})
+
+    async def start(self) -> None:
+        """Start serving."""
+        fidm = f"/oidc/op/v1.0/{API_KEY}"
+        app = web.Application(middlewares=[self._middleware])
+        app.add_routes(
+            [
+                web.get(f"{fidm}/authorize", self._handle_authorize),
+                web.get(f"{fidm}/authorize/continue", self._handle_continue),
+                web.post(f"{fidm}/token", self._handle_idp_token),
+                web.get("/socialize.getIDs", self._handle_get_ids),
+                web.post("/accounts.login", self._handle_login),
+                web.post("/socialize.getUserInfo", self._handle_user_info),
+                web.get("/OIDCConsentPage.php", self._handle_consent),
+                web.post("/api/v1/token_sign_in", self._handle_sign_in),
+                web.post("/users/refresh_token.json", self._handle_refresh),
+                web.get("/apiv1/devices.json", self._handle_devices),
+                web.get("/apiv1/dsns/{dsn}/properties.json", self._handle_properties),
+                web.get("/apiv1/dsns/{dsn}/lan.json", self._handle_lan),
+                web.post(
+                    "/apiv1/dsns/{dsn}/properties/{name}/datapoints.json",
+                    self._handle_datapoint,
+                ),
+                web.post("/apiv1/batch_datapoints.json", self._handle_batch),
+            ]
+        )
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        await self._runner.cleanup()
+
+    def fail(
+        self,
+        route: str,
+        status: int = 500,
+        times: int = 1,
+        headers: dict[str, str] | None = None,
+        delay: float = 0.0,
+    ) -> None:
+        """Answer the next requests to a route with an error.
+
+        Args:
+          route (str): The route to fail, as a path with its placeholders, ie:
+            "/apiv1/dsns/{dsn}/properties.json".
+          status (int): The HTTP status of the error.
+          times (int): The number of requests to fail.
+          headers (dict): The headers of the error, ie: Retry-After.
+          delay (float): The seconds to wait before answering, to cause timeouts.
+
+        """
+        self._failures.append([route, status, times, headers, delay])
+
+    def revoke_tokens(self) -> None:
+        """Reject every access and refresh token issued so far."""
+        self._access_tokens.clear()
+        self._refresh_tokens.clear()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        route = request.match_info.route.resource.canonical
+        self.requests[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for failure in self._failures:
+            if failure[0] == route and failure[2] > 0:
+                failure[2] -= 1
+                if failure[4]:
+                    await asyncio.sleep(failure[4])
+                return web.json_response(
+                    {"error": "injected"}, status=failure[1], headers=failure[3]
+                )
+        return await handler(request)
+
+    def _issue_tokens(self) -> dict[str, Any]:
+        self._tokens += 1
+        access_token = f"access-token-{self._tokens}"
+        refresh_token = f"refresh-token-{self._tokens}"
+        self._access_tokens.add(access_token)
+        self._refresh_tokens.add(refresh_token)
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "expires_in": ACCESS_TOKEN_TTL,
+        }
+
+    def _authorize(self, request: web.Request) -> None:
+        scheme, _, access_token = request.headers.get("Authorization", "").partition(
+            " "
+        )
+        if scheme != "auth_token" or access_token not in self._access_tokens:
+            raise web.HTTPUnauthorized
+
+    def _device(self, request: web.Request) -> dict[str, Any]:
+        self._authorize(request)
+        device_properties = self.device_properties.get(request.match_info["dsn"])
+        if device_properties is None:
+            raise web.HTTPNotFound
+        return device_properties
+
+    async def _handle_authorize(self, request: web.Request) -> web.Response:
+        raise web.HTTPFound("https://aylaopenid.delonghigroup.com/?context=CONTEXT")
+
+    async def _handle_get_ids(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"ucid": "UCID", "gmid": "GMID", "gmidTicket": "GMID-TICKET"}
+        )
+
+    async def _handle_login(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        if not data.get("loginID") or not data.get("password"):
+            return web.json_response({"errorCode": 403042})
+        self.logins += 1
+        return web.json_response({"sessionInfo": {"login_token": "LOGIN-TOKEN"}})
+
+    async def _handle_user_info(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"UID": "UID", "UIDSignature": "SIGNATURE", "signatureTimestamp": "0"}
+        )
+
+    async def _handle_consent(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text="<script>const consentObj2Sig = 'CONSENT-SIGNATURE';</script>",
+            content_type="text/html",
+        )
+
+    async def _handle_continue(self, request: web.Request) -> web.Response:
+        if request.query.get("sig") != "CONSENT-SIGNATURE":
+            raise web.HTTPForbidden
+        raise web.HTTPFound("https://google.it/?code=CODE")
+
+    async def _handle_idp_token(self, request: web.Request) -> web.Response:
+        if (await request.post()).get("code") != "CODE":
+            raise web.HTTPForbidden
+        return web.json_response({"access_token": "IDP-TOKEN"})
+
+    async def _handle_sign_in(self, request: web.Request) -> web.Response:
+        if (await request.post()).get("token") != "IDP-TOKEN":
+            raise web.HTTPUnauthorized
+        return web.json_response(self._issue_tokens())
+
+    async def _handle_refresh(self, request: web.Request) -> web.Response:
+        refresh_token = (await request.json())["user"]["refresh_token"]
+        if refresh_token not in self._refresh_tokens:
+            raise web.HTTPUnauthorized
+        self._refresh_tokens.discard(refresh_token)
+        return web.json_response(self._issue_tokens())
+
+    async def _handle_devices(self, request: web.Request) -> web.Response:
+        self._authorize(request)
+        return web.json_response(
+            [
+                {"device": {"dsn": device_dsn, "product_name": "TEST-PRODUCT-NAME"}}
+                for device_dsn in self.device_properties
+            ]
+        )
+
+    async def _handle_properties(self, request: web.Request) -> web.Response:
+        device_properties = self._device(request)
+        names = request.query.getall("names[]", None)
+        return web.json_response(
+            [
+                {
+                    "property": {
+                        "name": name,
+                        "value": value,
+                        "product_name": "TEST-PRODUCT-NAME",
+                        "data_updated_at": "2025-01-01T00:00:00Z",
+                    }
+                }
+                for name, value in device_properties.items()
+                if names is None or name in names
+            ]
+        )
+
+    async def _handle_lan(self, request: web.Request) -> web.Response:
+        self._device(request)
+        raise web.HTTPNotFound
+
+    async def _handle_datapoint(self, request: web.Request) -> web.Response:
+        device_properties = self._device(request)
+        datapoint = (await request.json())["datapoint"]
+        device_properties[request.match_info["name"]] = datapoint["value"]
+        return web.json_response({"datapoint": datapoint})
+
+    async def _handle_batch(self, request: web.Request) -> web.Response:
+        self._authorize(request)
+        responses = []
+        for datapoint in (await request.json())["batch_datapoints"]:
+            device_properties = self.device_properties.get(datapoint["dsn"])
+            if device_properties is None:
+                responses.append({"dsn": datapoint["dsn"], "status": 404})
+                continue
+            device_properties[datapoint["name"]] = datapoint["datapoint"]["value"]
+            responses.append(
+                {"dsn": datapoint["dsn"], "name": datapoint["name"], "status": 201}
+            )
+        return web.json_response(responses)
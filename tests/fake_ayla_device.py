@@ -0,0 +1,144 @@
+"""Local stand-in for an Ayla module in LAN mode."""
+
+import asyncio
+import secrets
+import time
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+from aiohttp import web
+
+from custom_components.delonghi_dehumidifier_api.lan import LanCipher, session_ciphers
+
+LANIP_KEY = "TEST-LANIP-KEY"
+LANIP_KEY_ID = 4242
+
+
+class FakeAylaDevice:
+    """Device side of the Ayla LAN protocol, serving local_reg.json on localhost."""
+
+    def __init__(self, dsn: str, properties: dict[str, Any]) -> None:
+        """Initialize."""
+        self.dsn = dsn
+        self.properties = dict(properties)
+        self.address = ""
+        self.key_exchanges = 0
+        self.commands_fetched = 0
+        # Seconds the device waits before fetching the commands once notified
+        self.fetch_delay = 0.0
+        self._app_url = ""
+        self._app_cipher: LanCipher | None = None
+        self._dev_cipher: LanCipher | None = None
+        self._seq_no = 0
+        self._runner: web.AppRunner | None = None
+        self._session: aiohttp.ClientSession | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+
+    @property
+    def lan_config(self) -> dict[str, Any]:
+        """Return the "lanip" object the cloud returns for the device."""
+        return {"lanip_key": LANIP_KEY, "lanip_key_id": LANIP_KEY_ID, "keep_alive": 30}
+
+    async def start(self) -> None:
+        """Start serving local_reg.json."""
+        self._session = aiohttp.ClientSession()
+        app = web.Application()
+        app.add_routes(
+            [
+                web.post("/local_reg.json", self._handle_local_reg),
+                web.put("/local_reg.json", self._handle_local_reg),
+            ]
+        )
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.address = f"127.0.0.1:{self._runner.addresses[0][1]}"
+
+    async def stop(self) -> None:
+        """Stop the device."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._session.close()
+        await self._runner.cleanup()
+
+    async def _handle_local_reg(self, request: web.Request) -> web.Response:
+        local_reg = (await request.json())["local_reg"]
+        self._app_url = (
+            f"http://{local_reg['ip']}:{local_reg['port']}{local_reg['uri']}"
+        )
+        if request.method == "POST" or self._app_cipher is None:
+            self._run(self._key_exchange())
+        elif local_reg["notify"]:
+            self._run(self._fetch_commands())
+        return web.Response(status=202)
+
+    async def _key_exchange(self) -> None:
+        async with self._lock:
+            random_1 = secrets.token_urlsafe(12)
+            time_1 = time.monotonic_ns() % 2**40
+            response = await self._session.post(
+                f"{self._app_url}/key_exchange.json",
+                json={
+                    "key_exchange": {
+                        "ver": 1,
+                        "proto": 1,
+                        "random_1": random_1,
+                        "time_1": time_1,
+                        "key_id": LANIP_KEY_ID,
+                    }
+                },
+            )
+            response.raise_for_status()
+            body = await response.json()
+            self._app_cipher, self._dev_cipher = session_ciphers(
+                LANIP_KEY, random_1, body["random_2"], time_1, body["time_2"]
+            )
+            self.key_exchanges += 1
+        await self._fetch_commands()
+
+    async def _fetch_commands(self) -> None:
+        await asyncio.sleep(self.fetch_delay)
+        async with self._lock:
+            status = 206
+            while status == 206:
+                response = await self._session.get(f"{self._app_url}/commands.json")
+                status = response.status
+                command = self._app_cipher.decrypt(await response.json())["data"]
+                self.commands_fetched += 1
+                for cmd in command.get("cmds", []):
+                    await self._handle_cmd(cmd["cmd"])
+                for device_property in command.get("properties", []):
+                    await self._set_property(device_property["property"])
+
+    async def _handle_cmd(self, cmd: dict[str, Any]) -> None:
+        name = parse_qs(urlparse(cmd["resource"]).query)["name"][0]
+        await self._post_datapoint(name, cmd["cmd_id"])
+
+    async def _set_property(self, device_property: dict[str, Any]) -> None:
+        self.properties[device_property["name"]] = device_property["value"]
+        await self._post_datapoint(device_property["name"])
+
+    async def _post_datapoint(self, name: str, cmd_id: int | None = None) -> None:
+        self._seq_no += 1
+        params = {"cmd_id": cmd_id} if cmd_id is not None else {}
+        data = {}
+        if name in self.properties:
+            data = {"name": name, "value": self.properties[name]}
+        else:
+            # Unknown properties are answered without data
+            params["status"] = 404
+        response = await self._session.post(
+            f"{self._app_url}/property/datapoint.json",
+            params=params,
+            json=self._dev_cipher.encrypt({"seq_no": self._seq_no, "data": data}),
+        )
+        response.raise_for_status()
+
+    def _run(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
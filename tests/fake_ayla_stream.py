@@ -0,0 +1,109 @@
+"""Local stand-in for the Ayla datastream service."""
+
+import itertools
+import json
+from typing import Any
+
+from aiohttp import WSMsgType, web
+
+
+def frame(payload: str) -> str:
+    """Frame a payload the way the datastream service does."""
+    return f"{len(payload)}|{payload}"
+
+
+class FakeAylaStream:
+    """Datastream service serving subscriptions and websockets on localhost."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.url = ""
+        self.subscriptions: dict[str, str] = {}
+        self.heartbeats = 0
+        self._ids = itertools.count(1)
+        self._websockets: dict[web.WebSocketResponse, str] = {}
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        """Start serving."""
+        app = web.Application()
+        app.add_routes(
+            [
+                web.post("/api/v1/subscriptions.json", self._handle_subscribe),
+                web.delete(
+                    "/api/v1/subscriptions/{subscription_id}.json",
+                    self._handle_unsubscribe,
+                ),
+                web.get("/stream", self._handle_stream),
+            ]
+        )
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        await self.disconnect()
+        await self._runner.cleanup()
+
+    @property
+    def connections(self) -> int:
+        """Return the number of open websockets."""
+        return len(self._websockets)
+
+    async def push(self, dsn: str, name: str, value: Any) -> None:
+        """Push a datapoint to the websockets subscribed to a device."""
+        event = {
+            "seq": "1",
+            "metadata": {
+                "dsn": dsn,
+                "property_name": name,
+                "event_type": "datapoint",
+            },
+            "datapoint": {"value": value, "updated_at": "2025-01-01T00:01:00Z"},
+        }
+        for websocket, websocket_dsn in list(self._websockets.items()):
+            if websocket_dsn == dsn:
+                await websocket.send_str(frame(json.dumps(event)))
+
+    async def heartbeat(self) -> None:
+        """Send a heartbeat to every websocket."""
+        for websocket in list(self._websockets):
+            await websocket.send_str(frame("Z"))
+
+    async def disconnect(self) -> None:
+        """Close every websocket."""
+        for websocket in list(self._websockets):
+            await websocket.close()
+
+    async def _handle_subscribe(self, request: web.Request) -> web.Response:
+        subscription = (await request.json())["subscription"]
+        subscription_id = next(self._ids)
+        stream_key = f"stream-key-{subscription_id}"
+        self.subscriptions[stream_key] = subscription["dsn"]
+        return web.json_response(
+            {"subscription": {"id": subscription_id, "stream_key": stream_key}}
+        )
+
+    async def _handle_unsubscribe(self, request: web.Request) -> web.Response:
+        stream_key = f"stream-key-{request.match_info['subscription_id']}"
+        self.subscriptions.pop(stream_key, None)
+        return web.Response()
+
+    async def _handle_stream(self, request: web.Request) -> web.StreamResponse:
+        dsn = self.subscriptions.get(request.query.get("stream_key", ""))
+        if dsn is None:
+            raise web.HTTPUnauthorized
+
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self._websockets[websocket] = dsn
+        try:
+            async for message in websocket:
+                if message.type == WSMsgType.TEXT and message.data == frame("Z"):
+                    self.heartbeats += 1
+        finally:
+            del self._websockets[websocket]
+        return websocket
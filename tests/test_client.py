@@ -0,0 +1,466 @@
+"""Test the DeLonghi API client"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+import orjson
+import pytest
+
+from custom_components.delonghi_dehumidifier_api.client import (
+    TOKEN_RENEWAL_MARGIN,
+    APIClient,
+    Mode,
+    OffOnStatus,
+    PropertyRecord,
+    PropertySnapshot,
+    PropertyTier,
+    Status,
+)
+
+from .conftest import MOCK_DEVICE_DSN, MOCK_PROPERTIES, mock_properties_response
+
+
+@pytest.fixture(name="client")
+def client_fixture() -> APIClient:
+    """Create a client whose requests are answered by a slow fake cloud."""
+    client = APIClient(MagicMock(), "en", "test_email@example.com", "test_password")
+
+    async def get_request(path: str):
+        await asyncio.sleep(0.01)
+        if path == "apiv1/devices.json":
+            return [
+                {
+                    "device": {
+                        "dsn": MOCK_DEVICE_DSN,
+                        "product_name": "TEST-PRODUCT-NAME",
+                    }
+                }
+            ]
+        names = parse_qs(urlparse(path).query).get("names[]")
+        return mock_properties_response(
+            {
+                name: value
+                for name, value in MOCK_PROPERTIES.items()
+                if names is None or name in names
+            }
+        )
+
+    client.get_request = AsyncMock(side_effect=get_request)
+    return client
+
+
+def last_properties_path(client: APIClient) -> str:
+    """Return the path of the last properties.json request."""
+    return [
+        call.args[0]
+        for call in client.get_request.call_args_list
+        if "/properties.json" in call.args[0]
+    ][-1]
+
+
+async def test_concurrent_get_properties_share_one_request(client: APIClient):
+    """Test that concurrent callers share a single in-flight properties fetch."""
+    results = await asyncio.gather(
+        *(client.get_properties(MOCK_DEVICE_DSN) for _ in range(10))
+    )
+
+    assert all(result is results[0] for result in results)
+    paths = [call.args[0] for call in client.get_request.call_args_list]
+    assert paths == [
+        f"apiv1/dsns/{MOCK_DEVICE_DSN}/properties.json",
+        "apiv1/devices.json",
+    ]
+
+
+async def test_concurrent_get_access_token_share_one_login(client: APIClient):
+    """Test that concurrent callers share a single login."""
+
+    async def login():
+        await asyncio.sleep(0.01)
+        return "TEST-TOKEN"
+
+    client.get_new_access_token = AsyncMock(side_effect=login)
+
+    tokens = await asyncio.gather(*(client.get_access_token() for _ in range(5)))
+
+    assert tokens == ["TEST-TOKEN"] * 5
+    client.get_new_access_token.assert_awaited_once()
+
+
+async def test_restored_tokens_skip_login(client: APIClient):
+    """Test that a restored, valid access token is used without logging in."""
+    client.get_new_access_token = AsyncMock()
+    client.restore_tokens(
+        {
+            "access_token": "STORED-ACCESS-TOKEN",
+            "refresh_token": "STORED-REFRESH-TOKEN",
+            "token_expiry": time.time() + 3600,
+        }
+    )
+
+    assert await client.get_access_token() == "STORED-ACCESS-TOKEN"
+    client.get_new_access_token.assert_not_awaited()
+    assert client.export_tokens()["refresh_token"] == "STORED-REFRESH-TOKEN"
+
+
+async def test_token_is_renewed_before_expiry(client: APIClient):
+    """Test that the background loop renews the token ahead of its expiry."""
+    client.restore_tokens(
+        {
+            "access_token": "OLD-ACCESS-TOKEN",
+            "refresh_token": "REFRESH-TOKEN",
+            "token_expiry": time.time() + TOKEN_RENEWAL_MARGIN + 0.01,
+        }
+    )
+
+    async def refresh():
+        client._set_tokens("NEW-ACCESS-TOKEN", "NEW-REFRESH-TOKEN", 3600)
+        return client.access_token
+
+    client.get_new_access_token = AsyncMock(side_effect=refresh)
+
+    renewal = asyncio.create_task(client.token_renewal_loop())
+    try:
+        assert await client.get_access_token() == "OLD-ACCESS-TOKEN"
+        await asyncio.sleep(0.05)
+    finally:
+        renewal.cancel()
+
+    client.get_new_access_token.assert_awaited_once()
+    assert await client.get_access_token() == "NEW-ACCESS-TOKEN"
+
+
+@pytest.mark.parametrize(
+    ("status", "logins"),
+    [(200, 0), (401, 1)],
+)
+async def test_refresh_token_falls_back_to_login_only_when_rejected(
+    client: APIClient, status: int, logins: int
+):
+    """Test that the full login only runs when the refresh token is rejected."""
+    response = MagicMock(status=status)
+    response.read = AsyncMock(
+        return_value=orjson.dumps(
+            {
+                "access_token": "NEW-ACCESS-TOKEN",
+                "refresh_token": "NEW-REFRESH-TOKEN",
+                "expires_in": 3600,
+            }
+        )
+    )
+    client.session.post = AsyncMock(return_value=response)
+    client.get_new_refresh_token = AsyncMock(return_value="LOGIN-ACCESS-TOKEN")
+    client.refresh_token = "REFRESH-TOKEN"
+
+    token = await client.get_access_token()
+
+    assert client.get_new_refresh_token.await_count == logins
+    assert token == ("LOGIN-ACCESS-TOKEN" if logins else "NEW-ACCESS-TOKEN")
+
+
+async def test_refresh_token_server_error_does_not_login(client: APIClient):
+    """Test that server errors while refreshing are raised instead of logging in."""
+    response = MagicMock(status=503)
+    response.raise_for_status = MagicMock(side_effect=RuntimeError("unavailable"))
+    client.session.post = AsyncMock(return_value=response)
+    client.get_new_refresh_token = AsyncMock()
+    client.refresh_token = "REFRESH-TOKEN"
+
+    with pytest.raises(RuntimeError):
+        await client.get_access_token()
+
+    client.get_new_refresh_token.assert_not_awaited()
+
+
+async def test_set_properties_uses_batch_datapoints(client: APIClient):
+    """Test that multiple properties are written in a single batch request."""
+    client.post_request = AsyncMock(return_value=[])
+
+    await client.set_properties(
+        MOCK_DEVICE_DSN,
+        {
+            "set_status": Status.ON,
+            "device_mode": Mode.REAL_FEEL,
+            "humidity_setpoint": 55,
+        },
+    )
+
+    client.post_request.assert_awaited_once_with(
+        "apiv1/batch_datapoints.json",
+        {
+            "batch_datapoints": [
+                {"dsn": MOCK_DEVICE_DSN, "name": name, "datapoint": {"value": value}}
+                for name, value in (
+                    ("set_status", 1),
+                    ("activate_realfeel", "AQIDChIXHEY8Mig="),
+                    ("humidity_setpoint", 55),
+                )
+            ]
+        },
+    )
+
+
+async def test_set_properties_falls_back_to_concurrent_datapoints(client: APIClient):
+    """Test that rejected batch requests fall back to one request per property."""
+
+    async def post_request(path: str, body: dict):
+        if path == "apiv1/batch_datapoints.json":
+            raise aiohttp.ClientResponseError(MagicMock(), (), status=404)
+        return {"datapoint": body["datapoint"]}
+
+    client.post_request = AsyncMock(side_effect=post_request)
+
+    responses = await client.set_properties(
+        MOCK_DEVICE_DSN, {"set_eco": OffOnStatus.ON, "swing": OffOnStatus.OFF}
+    )
+
+    assert responses == [{"datapoint": {"value": 1}}, {"datapoint": {"value": 0}}]
+    assert client.batch_datapoints_supported is False
+    paths = [call.args[0] for call in client.post_request.call_args_list]
+    assert paths == [
+        "apiv1/batch_datapoints.json",
+        f"apiv1/dsns/{MOCK_DEVICE_DSN}/properties/set_eco/datapoints.json",
+        f"apiv1/dsns/{MOCK_DEVICE_DSN}/properties/swing/datapoints.json",
+    ]
+
+
+async def test_failed_fetch_is_not_cached(client: APIClient):
+    """Test that a failed shared fetch is retried by the next caller."""
+    client.get_request.side_effect = [
+        RuntimeError("boom"),
+        [{"device": {"dsn": "X"}}, {"device": {"dsn": "Y"}}],
+    ]
+
+    with pytest.raises(RuntimeError):
+        await asyncio.gather(client.get_devices(), client.get_devices())
+
+    assert await client.get_devices() == ["X", "Y"]
+    assert await client.get_first_device() == "X"
+
+
+async def test_get_properties_returns_decoded_snapshot(client: APIClient):
+    """Test that properties are decoded once into an indexed snapshot."""
+    snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+
+    assert isinstance(snapshot, PropertySnapshot)
+    assert snapshot.product_name == "TEST-PRODUCT-NAME"
+    assert snapshot.current_humidity == 62
+    assert snapshot.device_mode is Mode.DEHUMIDIFY
+    assert snapshot.device_status is Status.ON
+    assert snapshot.swing is OffOnStatus.ON
+    assert snapshot.data_updated_at["current_humidity"].year == 2025
+    assert await client.get_device_mode(MOCK_DEVICE_DSN) is Mode.DEHUMIDIFY
+
+
+def test_snapshot_tolerates_missing_and_invalid_values():
+    """Test that undecodable or missing properties become None."""
+    snapshot = PropertySnapshot.from_properties(
+        [
+            PropertyRecord("device_mode", 42, None),
+            PropertyRecord("current_humidity", None, None),
+            PropertyRecord("unknown_property", "ignored", None),
+        ]
+    )
+
+    assert snapshot.device_mode is None
+    assert snapshot.current_humidity is None
+    assert snapshot.room_temp is None
+    assert snapshot.data_updated_at["device_mode"] is None
+    with pytest.raises(AttributeError):
+        snapshot.current_humidity = 10
+
+
+async def test_property_tiers_are_refreshed_independently(client: APIClient):
+    """Test that only the expired tiers of properties are fetched again."""
+    await client.get_properties(MOCK_DEVICE_DSN)
+    fetched_at = client.device_properties_timestamp[MOCK_DEVICE_DSN]
+
+    # Static metadata is served from the cache even once telemetry expired
+    fetched_at[PropertyTier.FAST] -= 10
+    assert await client.get_product_name(MOCK_DEVICE_DSN) == "TEST-PRODUCT-NAME"
+    assert client.get_request.await_count == 2
+
+    snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+    path = last_properties_path(client)
+    assert path.startswith(f"apiv1/dsns/{MOCK_DEVICE_DSN}/properties.json?")
+    assert "names%5B%5D=current_humidity" in path
+    assert "filter_life" not in path
+    assert "appliance_model" not in path
+    assert snapshot.appliance_model == "DDSX220WFA"
+
+    fetched_at[PropertyTier.SLOW] -= 3600
+    client.invalidate_properties(MOCK_DEVICE_DSN, [PropertyTier.FAST])
+    await client.get_properties(MOCK_DEVICE_DSN)
+    path = last_properties_path(client)
+    assert "filter_life" in path
+    assert "current_humidity" in path
+    assert client.get_request.await_count == 4
+
+
+async def test_expired_properties_are_served_while_refreshed(client: APIClient):
+    """Test that expired properties within the grace window do not wait."""
+    snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+    fetched_at = client.device_properties_timestamp[MOCK_DEVICE_DSN]
+    listener = MagicMock()
+    client.add_properties_listener(listener)
+    client.get_request.reset_mock()
+
+    fetched_at[PropertyTier.FAST] -= 30
+    results = [await client.get_properties(MOCK_DEVICE_DSN, grace=60) for _ in range(3)]
+
+    # The cached snapshot is returned before any request, then refreshed once
+    assert all(result is snapshot for result in results)
+    client.get_request.assert_not_awaited()
+    await asyncio.sleep(0.05)
+    assert client.get_request.await_count == 1
+    listener.assert_called_once_with(
+        MOCK_DEVICE_DSN, client.device_properties[MOCK_DEVICE_DSN]
+    )
+
+    # Past the grace window, the caller waits for the refresh
+    fetched_at[PropertyTier.FAST] -= 70
+    refreshed = await client.get_properties(MOCK_DEVICE_DSN, grace=60)
+    assert refreshed is not snapshot
+    assert client.get_request.await_count == 2
+    assert listener.call_count == 1
+
+
+async def test_failed_background_refresh_is_logged(
+    client: APIClient, caplog: pytest.LogCaptureFixture
+):
+    """Test that background refreshes failing or pending at release end cleanly."""
+    snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+    fetched_at = client.device_properties_timestamp[MOCK_DEVICE_DSN]
+    get_request = client.get_request.side_effect
+
+    fetched_at[PropertyTier.FAST] -= 30
+    client.get_request.side_effect = KeyError("sessionInfo")
+    assert await client.get_properties(MOCK_DEVICE_DSN, grace=60) is snapshot
+    await asyncio.sleep(0.01)
+    assert "Failed refreshing the properties" in caplog.text
+    assert not client._revalidations
+
+    client.get_request.side_effect = get_request
+    assert await client.get_properties(MOCK_DEVICE_DSN, grace=60) is snapshot
+    assert client._revalidations
+    await client.async_stop_revalidations()
+    assert not client._revalidations
+
+
+async def test_write_expires_telemetry(client: APIClient):
+    """Test that writing properties expires the cached telemetry only."""
+    client.post_request = AsyncMock(return_value={})
+    await client.get_properties(MOCK_DEVICE_DSN)
+
+    await client.set_humidity(MOCK_DEVICE_DSN, 40)
+
+    assert set(client.device_properties_timestamp[MOCK_DEVICE_DSN]) == {
+        PropertyTier.STATIC,
+        PropertyTier.SLOW,
+    }
+
+
+async def test_rapid_writes_are_coalesced(client: APIClient):
+    """Test that rapid writes send the latest value only, skipping known values."""
+    client.post_request = AsyncMock(return_value={})
+    await client.get_properties(MOCK_DEVICE_DSN)
+
+    await asyncio.gather(
+        *(client.set_humidity(MOCK_DEVICE_DSN, value) for value in (40, 42, 44))
+    )
+    await client.set_humidity(MOCK_DEVICE_DSN, 44)
+
+    client.post_request.assert_awaited_once_with(
+        f"apiv1/dsns/{MOCK_DEVICE_DSN}/properties/humidity_setpoint/datapoints.json",
+        {"datapoint": {"value": 44}},
+    )
+    assert client.device_properties[MOCK_DEVICE_DSN].humidity_setpoint == 44
+
+
+async def test_writes_are_not_skipped_against_stale_values(client: APIClient):
+    """Test that a write matching an expired cached value is still sent."""
+    client.post_request = AsyncMock(return_value={})
+    await client.get_properties(MOCK_DEVICE_DSN)
+    client.device_properties_timestamp[MOCK_DEVICE_DSN][PropertyTier.FAST] -= 30
+
+    # The device may have been turned off from its panel since
+    await client.set_status(MOCK_DEVICE_DSN, Status.ON)
+
+    client.post_request.assert_awaited_once()
+
+
+async def test_only_required_properties_are_fetched(client: APIClient):
+    """Test that only the required properties are requested and decoded."""
+    client.set_required_properties(MOCK_DEVICE_DSN, ["current_humidity", "swing"])
+
+    snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+
+    query = parse_qs(urlparse(last_properties_path(client)).query)
+    assert query == {"names[]": ["current_humidity", "swing"]}
+    assert snapshot.current_humidity == 62
+    assert snapshot.room_temp is None
+
+    # Newly required properties are fetched right away
+    client.set_required_properties(
+        MOCK_DEVICE_DSN, ["current_humidity", "swing", "filter_life"]
+    )
+    snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+    assert snapshot.filter_life == 120
+    requests = client.get_request.await_count
+
+    # Properties already cached are not fetched again
+    client.set_required_properties(MOCK_DEVICE_DSN, ["filter_life"])
+    client.set_required_properties(MOCK_DEVICE_DSN, ["filter_life", "swing"])
+    await client.get_properties(MOCK_DEVICE_DSN)
+    assert client.get_request.await_count == requests
+
+
+async def test_ignored_properties_filter_falls_back_to_full_list(client: APIClient):
+    """Test that the filter is dropped when the server ignores it."""
+    client.get_request = AsyncMock(
+        side_effect=lambda path: (
+            []
+            if path == "apiv1/devices.json"
+            else mock_properties_response(MOCK_PROPERTIES)
+        )
+    )
+    client.set_required_properties(MOCK_DEVICE_DSN, ["current_humidity"])
+
+    snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+    assert snapshot.current_humidity == 62
+    assert snapshot.room_temp is None
+    assert not client.properties_filter_supported
+
+    client.invalidate_properties(MOCK_DEVICE_DSN)
+    await client.get_properties(MOCK_DEVICE_DSN)
+    assert last_properties_path(client) == (
+        f"apiv1/dsns/{MOCK_DEVICE_DSN}/properties.json"
+    )
+
+
+async def test_restored_properties_are_served_but_refetched(client: APIClient):
+    """Test that exported properties restore the snapshot until the next fetch."""
+    snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+    exported = orjson.loads(orjson.dumps(client.export_properties()))
+
+    restored_client = APIClient(
+        MagicMock(), "en", "test_email@example.com", "test_password"
+    )
+    restored_client.get_request = client.get_request
+    restored_client.post_request = AsyncMock(return_value={})
+    restored_client.restore_properties(exported)
+
+    assert restored_client.device_properties[MOCK_DEVICE_DSN] == snapshot
+    assert MOCK_DEVICE_DSN in restored_client.restored_properties
+
+    # Writes are not elided against restored values
+    await restored_client.set_status(MOCK_DEVICE_DSN, Status.ON)
+    restored_client.post_request.assert_awaited_once()
+
+    client.get_request.reset_mock()
+    await restored_client.get_properties(MOCK_DEVICE_DSN)
+    assert last_properties_path(restored_client)
+    assert not restored_client.restored_properties
@@ -0,0 +1,222 @@
+"""Test the client end to end against a local fake of the cloud services"""
+
+# pylint: disable=unused-argument
+import time
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from homeassistant import config_entries, data_entry_flow
+from homeassistant.const import CONF_EMAIL
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.delonghi_dehumidifier_api.client import APIClient, Status
+from custom_components.delonghi_dehumidifier_api.const import DOMAIN
+from custom_components.delonghi_dehumidifier_api.registry import (
+    account_key,
+    async_get_clients,
+)
+
+from .conftest import MOCK_DEVICE_DSN
+from .fake_ayla_cloud import FakeAylaCloud
+from .test_config_flow import MOCK_BASIC_CONFIG_PAGE
+
+pytestmark = pytest.mark.usefixtures("socket_enabled")
+
+
+@pytest.fixture(name="cloud")
+async def cloud_fixture():
+    """Start a fake cloud on localhost."""
+    cloud = FakeAylaCloud()
+    await cloud.start()
+    yield cloud
+    await cloud.stop()
+
+
+async def test_login_refresh_and_fallback(cloud: FakeAylaCloud):
+    """Test the login flow, the token refresh and the fallback to a new login."""
+    async with aiohttp.ClientSession() as session:
+        client = APIClient(
+            session,
+            "en",
+            "test_email@example.com",
+            "test_password",
+            cloud.endpoints,
+        )
+
+        assert await client.get_access_token() == "access-token-1"
+        assert cloud.logins == 1
+        assert sum(cloud.requests.values()) == 8
+
+        client.token_expiry = time.time()
+        assert await client.get_access_token() == "access-token-2"
+        assert cloud.logins == 1
+        assert cloud.requests["/users/refresh_token.json"] == 1
+
+        cloud.revoke_tokens()
+        client.token_expiry = time.time()
+        assert await client.get_access_token() == "access-token-3"
+        assert cloud.logins == 2
+
+        assert await client.get_devices() == [MOCK_DEVICE_DSN]
+        snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+        assert snapshot.current_humidity == 62
+
+
+async def test_revoked_restored_token_is_renewed(cloud: FakeAylaCloud):
+    """Test that a restored access token rejected by the cloud is renewed."""
+    async with aiohttp.ClientSession() as session:
+        client = APIClient(
+            session,
+            "en",
+            "test_email@example.com",
+            "test_password",
+            cloud.endpoints,
+        )
+        await client.get_access_token()
+        tokens = client.export_tokens()
+        cloud.revoke_tokens()
+
+        restored_client = APIClient(
+            session,
+            "en",
+            "test_email@example.com",
+            "test_password",
+            cloud.endpoints,
+        )
+        restored_client.restore_tokens(tokens)
+
+        assert await restored_client.get_devices() == [MOCK_DEVICE_DSN]
+        assert restored_client.access_token == "access-token-2"
+        assert cloud.logins == 2
+        assert not restored_client.breaker.is_open
+
+
+async def test_batch_rejection_falls_back_to_datapoints(cloud: FakeAylaCloud):
+    """Test that writes fall back to individual datapoints when batches fail."""
+    cloud.fail("/apiv1/batch_datapoints.json", status=404)
+    async with aiohttp.ClientSession() as session:
+        client = APIClient(
+            session,
+            "en",
+            "test_email@example.com",
+            "test_password",
+            cloud.endpoints,
+        )
+
+        await client.set_properties(
+            MOCK_DEVICE_DSN, {"set_status": Status.OFF, "humidity_setpoint": 40}
+        )
+
+    assert not client.batch_datapoints_supported
+    assert cloud.requests["/apiv1/dsns/{dsn}/properties/{name}/datapoints.json"] == 2
+    assert cloud.device_properties[MOCK_DEVICE_DSN]["humidity_setpoint"] == 40
+
+
+async def test_setup_entry_against_cloud(hass: HomeAssistant, cloud: FakeAylaCloud):
+    """Test that the entry sets up its entities from the cloud."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.delonghi_dehumidifier_api.client.DEFAULT_ENDPOINTS",
+        cloud.endpoints,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    state = hass.states.get("humidifier.test_product_name_dehumidifier_unit")
+    assert state.attributes["current_humidity"] == 62
+    assert cloud.logins == 1
+    assert cloud.requests["/apiv1/dsns/{dsn}/properties.json"] == 1
+
+    # The platforms read the device info resolved during the setup
+    device_info = entry.runtime_data.device_infos[MOCK_DEVICE_DSN]
+    assert device_info["name"] == "TEST-PRODUCT-NAME Dehumidifier"
+
+    # The metrics of the client are diagnostic sensors, disabled by default
+    entity_registry = er.async_get(hass)
+    entity_id = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_{entry.entry_id}_cloud_requests_sensor"
+    )
+    assert entity_registry.async_get(entity_id).disabled
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_stats(cloud: FakeAylaCloud):
+    """Test the metrics of the requests sent by the client."""
+    cloud.fail("/apiv1/batch_datapoints.json", status=503)
+    async with aiohttp.ClientSession() as session:
+        client = APIClient(
+            session,
+            "en",
+            "test_email@example.com",
+            "test_password",
+            cloud.endpoints,
+        )
+
+        await client.get_properties(MOCK_DEVICE_DSN)
+        await client.get_properties(MOCK_DEVICE_DSN)
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.set_properties(
+                MOCK_DEVICE_DSN, {"set_status": Status.OFF, "humidity_setpoint": 40}
+            )
+
+    stats = client.stats()
+    assert stats["logins"] == 1
+    assert stats["token_refreshes"] == 0
+    assert stats["cache"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+    assert stats["requests"] == client.request_count == 3
+    assert stats["errors"] == 1
+    endpoints = stats["endpoints"]
+    assert endpoints["apiv1/dsns/{dsn}/properties.json"]["requests"] == 1
+    assert endpoints["apiv1/batch_datapoints.json"]["errors"] == {"503": 1}
+    assert endpoints["apiv1/devices.json"]["latency"]["count"] == 1
+
+
+async def test_entries_share_client(hass: HomeAssistant, cloud: FakeAylaCloud):
+    """Test that the config flow and the entries of an account share one login."""
+    with patch(
+        "custom_components.delonghi_dehumidifier_api.client.DEFAULT_ENDPOINTS",
+        cloud.endpoints,
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": config_entries.SOURCE_USER}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=MOCK_BASIC_CONFIG_PAGE
+        )
+        await hass.async_block_till_done()
+        assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+        first = result["result"]
+
+        # The entry starts with the client the flow logged in with
+        assert cloud.logins == 1
+        assert cloud.requests["/apiv1/devices.json"] == 1
+
+        second = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+        second.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(second.entry_id)
+        await hass.async_block_till_done()
+        assert second.runtime_data.client is first.runtime_data.client
+        assert cloud.requests["/apiv1/devices.json"] == 1
+
+        # Saving the options reuses the logged in client as well
+        result = await hass.config_entries.options.async_init(first.entry_id)
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"], user_input=MOCK_BASIC_CONFIG_PAGE
+        )
+        await hass.async_block_till_done()
+        assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+        assert first.runtime_data.client is second.runtime_data.client
+        assert cloud.logins == 1
+
+    assert await hass.config_entries.async_unload(first.entry_id)
+    assert await hass.config_entries.async_unload(second.entry_id)
+    # The client is closed with the last entry of the account
+    key = account_key(MOCK_BASIC_CONFIG_PAGE[CONF_EMAIL])
+    assert async_get_clients(hass).get(key, "test_password") is None
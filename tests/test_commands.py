@@ -0,0 +1,94 @@
+"""Test the per-device queue of the property writes"""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from custom_components.delonghi_dehumidifier_api.commands import CommandQueue
+
+
+class FakeDevice:
+    """Device recording the commands written to it."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.values: dict[str, Any] = {"humidity_setpoint": 50}
+        self.commands: list[dict[str, Any]] = []
+        self.error: Exception | None = None
+
+    async def write(self, properties: dict[str, Any]) -> list[dict]:
+        """Write a command."""
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        self.commands.append(properties)
+        self.values.update(properties)
+        return [{"written": list(properties)}]
+
+    def is_current(self, name: str, value: Any) -> bool:
+        """Return True if a property already has a value."""
+        return self.values.get(name) == value
+
+
+@pytest.fixture(name="device")
+def device_fixture() -> FakeDevice:
+    """Return a fake device."""
+    return FakeDevice()
+
+
+@pytest.fixture(name="queue")
+def queue_fixture(device: FakeDevice) -> CommandQueue:
+    """Return a queue writing to the fake device."""
+    return CommandQueue(device.write, device.is_current, delay=0.01)
+
+
+async def test_latest_write_wins(queue: CommandQueue, device: FakeDevice):
+    """Test that writes within the window are merged into one command."""
+    results = await asyncio.gather(
+        queue.submit({"humidity_setpoint": 40}),
+        queue.submit({"device_mode": 2}),
+        queue.submit({"humidity_setpoint": 45}),
+    )
+
+    # The property written again is applied last
+    assert device.commands == [{"device_mode": 2, "humidity_setpoint": 45}]
+    assert list(device.commands[0]) == ["device_mode", "humidity_setpoint"]
+    assert results[0] == results[1] == results[2]
+
+
+async def test_current_values_are_skipped(queue: CommandQueue, device: FakeDevice):
+    """Test that writes of the known value are not sent."""
+    assert await queue.submit({"humidity_setpoint": 50}) == []
+    await queue.submit({"humidity_setpoint": 50, "swing": 1})
+
+    assert device.commands == [{"swing": 1}]
+
+
+async def test_commands_are_sent_in_order(queue: CommandQueue, device: FakeDevice):
+    """Test that writes submitted while a command is sent follow it."""
+    first = asyncio.create_task(queue.submit({"humidity_setpoint": 40}))
+    while not device.commands:
+        await asyncio.sleep(0)
+    await queue.submit({"humidity_setpoint": 60})
+    await first
+
+    assert device.commands == [{"humidity_setpoint": 40}, {"humidity_setpoint": 60}]
+
+
+async def test_errors_are_raised_to_every_write(
+    queue: CommandQueue, device: FakeDevice
+):
+    """Test that a failed command fails every write it is made of."""
+    device.error = ValueError("rejected")
+    results = await asyncio.gather(
+        queue.submit({"humidity_setpoint": 40}),
+        queue.submit({"swing": 1}),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+    device.error = None
+    await queue.submit({"swing": 1})
+    assert device.commands == [{"swing": 1}]
@@ -0,0 +1,174 @@
+"""Test the push updates over the Ayla datastream"""
+
+# pylint: disable=unused-argument
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
+import pytest
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.delonghi_dehumidifier_api.client import APIClient, Endpoints
+from custom_components.delonghi_dehumidifier_api.const import (
+    CONF_DATASTREAM,
+    DOMAIN,
+    RECONCILE_INTERVAL,
+)
+from custom_components.delonghi_dehumidifier_api.datastream import (
+    DatastreamError,
+    parse_message,
+)
+
+from .conftest import MOCK_DEVICE_DSN, MOCK_PROPERTIES, mock_properties_response
+from .fake_ayla_stream import FakeAylaStream
+from .test_config_flow import MOCK_BASIC_CONFIG_PAGE
+
+pytestmark = pytest.mark.usefixtures("socket_enabled")
+
+
+@pytest.fixture(name="stream")
+async def stream_fixture():
+    """Start a fake datastream service on localhost."""
+    stream = FakeAylaStream()
+    await stream.start()
+    yield stream
+    await stream.stop()
+
+
+async def wait_for(condition) -> None:
+    """Wait until a condition is met."""
+    async with asyncio.timeout(5):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+def test_parse_message():
+    """Test that framed messages are validated."""
+    assert parse_message("1|Z") == "Z"
+    assert parse_message("2|{}") == "{}"
+    with pytest.raises(DatastreamError):
+        parse_message("3|Z")
+    with pytest.raises(DatastreamError):
+        parse_message("Z")
+
+
+@patch("custom_components.delonghi_dehumidifier_api.datastream.STREAM_BACKOFF_MIN", 0)
+async def test_datastream_updates_cache_and_reconnects(stream: FakeAylaStream):
+    """Test that pushed datapoints update the cache, across reconnections."""
+    async with aiohttp.ClientSession() as session:
+        client = APIClient(
+            session,
+            "en",
+            "test_email@example.com",
+            "test_password",
+            Endpoints(stream=stream.url),
+        )
+        client.get_access_token = AsyncMock(return_value="TEST-TOKEN")
+        client.get_request = AsyncMock(
+            side_effect=lambda path: (
+                [{"device": {"dsn": MOCK_DEVICE_DSN}}]
+                if path == "apiv1/devices.json"
+                else mock_properties_response(MOCK_PROPERTIES)
+            )
+        )
+        await client.get_properties(MOCK_DEVICE_DSN)
+
+        pushed = []
+        connections = []
+        client.add_properties_listener(lambda dsn, snapshot: pushed.append(snapshot))
+        client.add_datastream_listener(lambda dsn, state: connections.append(state))
+
+        await client.async_start_datastream()
+        try:
+            await wait_for(lambda: client.is_streaming(MOCK_DEVICE_DSN))
+
+            await stream.heartbeat()
+            await wait_for(lambda: stream.heartbeats == 1)
+
+            await stream.push(MOCK_DEVICE_DSN, "current_humidity", 45)
+            await wait_for(lambda: pushed)
+            assert pushed[-1].current_humidity == 45
+            assert pushed[-1].humidity_setpoint == 50
+            snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+            assert snapshot.current_humidity == 45
+
+            await stream.disconnect()
+            await wait_for(lambda: connections == [True, False, True])
+
+            await stream.push(MOCK_DEVICE_DSN, "device_status", 2)
+            await wait_for(lambda: len(pushed) == 2)
+            assert pushed[-1].device_status.name == "OFF"
+
+            # The subscription is reused when reconnecting
+            assert len(stream.subscriptions) == 1
+        finally:
+            await client.async_stop_datastream()
+
+        assert not stream.subscriptions
+        assert client.get_request.await_count == 2
+
+
+@patch("custom_components.delonghi_dehumidifier_api.datastream.STREAM_BACKOFF_MIN", 0)
+async def test_datastream_retries_after_unexpected_errors(
+    stream: FakeAylaStream, caplog: pytest.LogCaptureFixture
+):
+    """Test that the datastream keeps reconnecting after an unexpected error."""
+    async with aiohttp.ClientSession() as session:
+        client = APIClient(
+            session,
+            "en",
+            "test_email@example.com",
+            "test_password",
+            Endpoints(stream=stream.url),
+        )
+        client.get_access_token = AsyncMock(
+            side_effect=[RuntimeError("Login rejected"), "TEST-TOKEN", "TEST-TOKEN"]
+        )
+        client.get_request = AsyncMock(
+            return_value=[{"device": {"dsn": MOCK_DEVICE_DSN}}]
+        )
+
+        await client.async_start_datastream()
+        try:
+            await wait_for(lambda: client.is_streaming(MOCK_DEVICE_DSN))
+        finally:
+            await client.async_stop_datastream()
+
+    assert "Unexpected error in the datastream" in caplog.text
+
+
+async def test_setup_entry_with_datastream(
+    hass: HomeAssistant, mock_cloud, stream: FakeAylaStream
+):
+    """Test that pushed datapoints update the entities and slow down polling."""
+    entry = MockConfigEntry(
+        domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE, options={CONF_DATASTREAM: True}
+    )
+    entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.delonghi_dehumidifier_api.client.DEFAULT_ENDPOINTS",
+        Endpoints(stream=stream.url),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    coordinator = entry.runtime_data.coordinators[MOCK_DEVICE_DSN]
+    await wait_for(lambda: coordinator.update_interval == RECONCILE_INTERVAL)
+
+    await stream.push(MOCK_DEVICE_DSN, "humidity_setpoint", 40)
+    await wait_for(
+        lambda: (
+            hass.states.get(
+                "humidifier.test_product_name_dehumidifier_unit"
+            ).attributes["humidity"]
+            == 40
+        )
+    )
+
+    await stream.disconnect()
+    await wait_for(lambda: coordinator.update_interval != RECONCILE_INTERVAL)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
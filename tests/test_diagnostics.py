@@ -0,0 +1,41 @@
+"""Test the diagnostics of a config entry"""
+
+# pylint: disable=unused-argument
+from homeassistant.components.diagnostics import REDACTED
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.delonghi_dehumidifier_api.const import DOMAIN
+from custom_components.delonghi_dehumidifier_api.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+from .conftest import MOCK_DEVICE_DSN
+from .test_config_flow import MOCK_BASIC_CONFIG_PAGE
+
+
+async def test_diagnostics(hass: HomeAssistant, mock_cloud):
+    """Test that the diagnostics are redacted and read from memory only."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    requests = mock_cloud.await_count
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert mock_cloud.await_count == requests
+    assert diagnostics["entry"]["data"]["email"] == REDACTED
+    assert diagnostics["entry"]["data"]["password"] == REDACTED
+    assert "access_token" not in str(diagnostics["tokens"].values())
+    assert diagnostics["stats"]["cache"]["misses"] >= 1
+
+    device = diagnostics["devices"][MOCK_DEVICE_DSN]
+    assert device["last_update_success"]
+    assert device["properties"]["current_humidity"] == 62
+    assert device["properties"]["device_status"] == "ON"
+    assert device["properties"]["data_updated_at"]["current_humidity"] == (
+        "2025-01-01T00:00:00+00:00"
+    )
+    assert device["properties_age"]["static"] >= 0
+    assert diagnostics["scheduler"]["daily_budget"] == 5000
@@ -0,0 +1,79 @@
+"""Test the dehumidifier entity"""
+
+# pylint: disable=unused-argument
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.delonghi_dehumidifier_api.client import APIClient
+from custom_components.delonghi_dehumidifier_api.const import DOMAIN, SERVICE_SET_STATE
+
+from .conftest import MOCK_DEVICE_DSN
+from .test_config_flow import MOCK_BASIC_CONFIG_PAGE
+
+ENTITY_ID = "humidifier.test_product_name_dehumidifier_unit"
+
+
+async def test_set_state_service_sends_one_batch(hass: HomeAssistant, mock_cloud):
+    """Test that the set_state service writes every setting in one request."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SET_STATE,
+        {"entity_id": ENTITY_ID, "is_on": False, "mode": "DRY_CLOTHES", "humidity": 45},
+        blocking=True,
+    )
+
+    APIClient.post_request.assert_awaited_once_with(
+        "apiv1/batch_datapoints.json",
+        {
+            "batch_datapoints": [
+                {"dsn": MOCK_DEVICE_DSN, "name": name, "datapoint": {"value": value}}
+                for name, value in (
+                    ("set_status", 2),
+                    ("device_mode", 2),
+                    ("humidity_setpoint", 45),
+                )
+            ]
+        },
+    )
+
+
+async def test_written_values_update_entities(hass: HomeAssistant, mock_cloud):
+    """Test that written values update every entity without polling."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    requests = mock_cloud.await_count
+
+    await hass.services.async_call(
+        "humidifier",
+        "set_humidity",
+        {"entity_id": ENTITY_ID, "humidity": 40},
+        blocking=True,
+    )
+    await hass.services.async_call(
+        "humidifier", "turn_off", {"entity_id": ENTITY_ID}, blocking=True
+    )
+    await hass.services.async_call(
+        "switch",
+        "turn_on",
+        {"entity_id": "switch.test_product_name_dehumidifier_eco_mode"},
+        blocking=True,
+    )
+
+    state = hass.states.get(ENTITY_ID)
+    assert state.state == "off"
+    assert state.attributes["humidity"] == 40
+    assert (
+        hass.states.get("sensor.test_product_name_dehumidifier_target_humidity").state
+        == "40"
+    )
+    assert hass.states.get("switch.test_product_name_dehumidifier_eco_mode").state == (
+        "on"
+    )
+    assert mock_cloud.await_count == requests
@@ -0,0 +1,353 @@
+"""Test integration setup"""
+
+# pylint: disable=unused-argument
+import asyncio
+from datetime import timedelta
+import time
+from typing import Any
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.delonghi_dehumidifier_api.const import (
+    ATTR_FETCHED_AT,
+    DEVICES_STORAGE_KEY,
+    DOMAIN,
+    PROPERTIES_SAVE_INTERVAL,
+    PROPERTIES_STORAGE_KEY,
+    STORAGE_VERSION,
+    TOKENS_SAVE_DELAY,
+    TOKENS_STORAGE_KEY,
+)
+
+from .conftest import MOCK_DEVICE_DSN
+from .test_config_flow import MOCK_BASIC_CONFIG_PAGE
+
+
+def properties_requests(get_request_mock) -> int:
+    """Count the properties.json requests made through the client."""
+    return sum(
+        1
+        for call in get_request_mock.call_args_list
+        if "/properties.json" in call.args[0]
+    )
+
+
+async def test_setup_entry_fetches_properties_once(hass: HomeAssistant, mock_cloud):
+    """Test that all entities share a single properties fetch."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert properties_requests(mock_cloud) == 1
+
+    humidifier = hass.states.get("humidifier.test_product_name_dehumidifier_unit")
+    assert humidifier is not None
+    assert humidifier.state == "on"
+    assert humidifier.attributes["humidity"] == 50
+    assert humidifier.attributes["current_humidity"] == 62
+
+    eco = hass.states.get("switch.test_product_name_dehumidifier_eco_mode")
+    assert eco is not None
+    assert eco.state == "off"
+
+    assert list(entry.runtime_data.coordinators) == [MOCK_DEVICE_DSN]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.parametrize("mock_devices", [["AC000W000000001", "AC000W000000002"]])
+async def test_setup_entry_creates_entities_per_device(
+    hass: HomeAssistant, mock_cloud, mock_devices
+):
+    """Test that every device in the account gets its own entities."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert list(entry.runtime_data.coordinators) == mock_devices
+    assert properties_requests(mock_cloud) == len(mock_devices)
+    assert len(hass.states.async_entity_ids("humidifier")) == len(mock_devices)
+    assert len(hass.states.async_entity_ids("switch")) == 2 * len(mock_devices)
+
+
+async def test_setup_entry_restores_and_persists_tokens(
+    hass: HomeAssistant, hass_storage: dict[str, Any], mock_cloud
+):
+    """Test that tokens survive restarts through the entry storage."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+    storage_key = f"{TOKENS_STORAGE_KEY}.{entry.entry_id}"
+    hass_storage[storage_key] = {
+        "version": STORAGE_VERSION,
+        "key": storage_key,
+        "data": {
+            "access_token": "STORED-ACCESS-TOKEN",
+            "refresh_token": "STORED-REFRESH-TOKEN",
+            "token_expiry": time.time() + 3600,
+        },
+    }
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    client = entry.runtime_data.client
+    assert client.access_token == "STORED-ACCESS-TOKEN"
+    assert client.refresh_token == "STORED-REFRESH-TOKEN"
+
+    client._set_tokens("NEW-ACCESS-TOKEN", "NEW-REFRESH-TOKEN", 3600)
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=TOKENS_SAVE_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+
+    assert hass_storage[storage_key]["data"]["access_token"] == "NEW-ACCESS-TOKEN"
+    assert hass_storage[storage_key]["data"]["refresh_token"] == "NEW-REFRESH-TOKEN"
+
+
+async def test_disabled_entities_properties_are_not_fetched(
+    hass: HomeAssistant, mock_cloud, entity_registry: er.EntityRegistry
+):
+    """Test that the properties of disabled entities are not requested."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+    entity_registry.async_get_or_create(
+        "sensor",
+        DOMAIN,
+        f"{DOMAIN}_{MOCK_DEVICE_DSN}_heat_exchanger_temperature_sensor",
+        config_entry=entry,
+        disabled_by=er.RegistryEntryDisabler.USER,
+    )
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = entry.runtime_data.coordinators[MOCK_DEVICE_DSN]
+    coordinator.client.invalidate_properties(MOCK_DEVICE_DSN)
+    await coordinator.async_refresh()
+
+    path = mock_cloud.call_args.args[0]
+    assert "names%5B%5D=room_temp" in path
+    assert "heat_exchanger_temp" not in path
+    assert coordinator.data.room_temp == 68
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+def cache_devices(
+    hass_storage: dict[str, Any], entry: MockConfigEntry, device_dsns: list[str]
+) -> str:
+    """Store the devices of an entry as cached by a previous start."""
+    storage_key = f"{DEVICES_STORAGE_KEY}.{entry.entry_id}"
+    hass_storage[storage_key] = {
+        "version": STORAGE_VERSION,
+        "key": storage_key,
+        "data": {
+            device_dsn: {
+                "product_name": "TEST-PRODUCT-NAME",
+                "appliance_model": "DDSX220WFA",
+                "firmware_version": "0.9.0",
+                "hardware_version": "1.0",
+            }
+            for device_dsn in device_dsns
+        },
+    }
+    return storage_key
+
+
+async def test_setup_entry_from_cache_does_not_wait_for_cloud(
+    hass: HomeAssistant, hass_storage: dict[str, Any], mock_cloud
+):
+    """Test that cached devices get their entities before the cloud answers."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+    storage_key = cache_devices(hass_storage, entry, [MOCK_DEVICE_DSN])
+
+    cloud_answers = asyncio.Event()
+    get_request = mock_cloud.side_effect
+
+    async def slow_get_request(path: str):
+        await cloud_answers.wait()
+        return await get_request(path)
+
+    mock_cloud.side_effect = slow_get_request
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    humidifier = hass.states.get("humidifier.test_product_name_dehumidifier_unit")
+    assert humidifier.state == STATE_UNAVAILABLE
+
+    cloud_answers.set()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    humidifier = hass.states.get("humidifier.test_product_name_dehumidifier_unit")
+    assert humidifier.state == "on"
+    assert humidifier.attributes["current_humidity"] == 62
+
+    # The device info is updated from the cloud
+    device = dr.async_get(hass).async_get_device({(DOMAIN, MOCK_DEVICE_DSN)})
+    assert device.sw_version == "1.0.0"
+    assert hass_storage[storage_key]["data"][MOCK_DEVICE_DSN]["firmware_version"] == (
+        "1.0.0"
+    )
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_setup_entry_without_cache_retries_when_cloud_is_down(
+    hass: HomeAssistant, mock_cloud
+):
+    """Test that the setup is retried when there is nothing to start from."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+    mock_cloud.side_effect = aiohttp.ClientConnectionError
+
+    assert not await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+
+
+@pytest.mark.parametrize("mock_devices", [["AC000W000000001", "AC000W000000002"]])
+async def test_setup_entry_from_cache_reloads_on_new_devices(
+    hass: HomeAssistant, hass_storage: dict[str, Any], mock_cloud, mock_devices
+):
+    """Test that a device added since the last start gets its entities."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+    cache_devices(hass_storage, entry, mock_devices[:1])
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert list(entry.runtime_data.coordinators) == mock_devices
+    assert len(hass.states.async_entity_ids("humidifier")) == len(mock_devices)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_setup_entry_from_cache_restores_properties(
+    hass: HomeAssistant, hass_storage: dict[str, Any], mock_cloud
+):
+    """Test that cached devices show their last known properties until refreshed."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+    cache_devices(hass_storage, entry, [MOCK_DEVICE_DSN])
+    storage_key = f"{PROPERTIES_STORAGE_KEY}.{entry.entry_id}"
+    fetched_at = time.time() - 3600
+    hass_storage[storage_key] = {
+        "version": STORAGE_VERSION,
+        "key": storage_key,
+        "data": {
+            MOCK_DEVICE_DSN: {
+                "fetched_at": fetched_at,
+                "product_name": "TEST-PRODUCT-NAME",
+                "properties": [
+                    ["current_humidity", 70, "2025-01-01T00:00:00Z"],
+                    ["device_status", 2, "2025-01-01T00:00:00Z"],
+                ],
+            }
+        },
+    }
+
+    cloud_answers = asyncio.Event()
+    get_request = mock_cloud.side_effect
+
+    async def slow_get_request(path: str):
+        await cloud_answers.wait()
+        return await get_request(path)
+
+    mock_cloud.side_effect = slow_get_request
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    humidifier = hass.states.get("humidifier.test_product_name_dehumidifier_unit")
+    assert humidifier.state == "off"
+    assert humidifier.attributes["current_humidity"] == 70
+    assert humidifier.attributes[ATTR_FETCHED_AT] == (
+        dt_util.utc_from_timestamp(fetched_at).isoformat()
+    )
+
+    cloud_answers.set()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    humidifier = hass.states.get("humidifier.test_product_name_dehumidifier_unit")
+    assert humidifier.state == "on"
+    assert humidifier.attributes["current_humidity"] == 62
+    assert ATTR_FETCHED_AT not in humidifier.attributes
+
+    # The fetched properties are persisted once the save interval elapsed, the
+    # debounced save scheduling the write of the store
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=PROPERTIES_SAVE_INTERVAL + 1)
+    )
+    await hass.async_block_till_done()
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=PROPERTIES_SAVE_INTERVAL + 1)
+    )
+    await hass.async_block_till_done()
+
+    stored = hass_storage[storage_key]["data"][MOCK_DEVICE_DSN]
+    assert stored["fetched_at"] > fetched_at
+    assert ["current_humidity", 62, "2025-01-01T00:00:00+00:00"] in stored["properties"]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_setup_entry_from_cache_retries_unexpected_errors(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    mock_cloud,
+    caplog: pytest.LogCaptureFixture,
+):
+    """Test that the devices are fetched again after an unexpected error."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+    cache_devices(hass_storage, entry, [MOCK_DEVICE_DSN])
+
+    cloud_fails = True
+    get_request = mock_cloud.side_effect
+
+    async def failing_get_request(path: str):
+        if cloud_fails:
+            raise KeyError("sessionInfo")
+        return await get_request(path)
+
+    mock_cloud.side_effect = failing_get_request
+
+    with patch(
+        "custom_components.delonghi_dehumidifier_api.STARTUP_RETRY_INTERVAL",
+        timedelta(seconds=0.01),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        await asyncio.sleep(0.05)
+        assert "Unexpected error fetching the devices" in caplog.text
+
+        cloud_fails = False
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    device = dr.async_get(hass).async_get_device({(DOMAIN, MOCK_DEVICE_DSN)})
+    assert device.sw_version == "1.0.0"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,252 @@
+"""Test the local LAN mode transport"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
+import pytest
+
+from custom_components.delonghi_dehumidifier_api.client import APIClient, Mode
+from custom_components.delonghi_dehumidifier_api.lan import (
+    LanError,
+    LanTransport,
+    session_ciphers,
+)
+
+from .conftest import MOCK_DEVICE_DSN, MOCK_PROPERTIES, mock_properties_response
+from .fake_ayla_device import FakeAylaDevice
+
+pytestmark = pytest.mark.usefixtures("socket_enabled")
+
+
+@pytest.fixture(name="device")
+async def device_fixture():
+    """Start a fake device serving the LAN protocol on localhost."""
+    device = FakeAylaDevice(MOCK_DEVICE_DSN, MOCK_PROPERTIES)
+    await device.start()
+    yield device
+    await device.stop()
+
+
+@pytest.fixture(name="session")
+async def session_fixture():
+    """Create a client session."""
+    session = aiohttp.ClientSession()
+    yield session
+    await session.close()
+
+
+async def wait_for(condition) -> None:
+    """Wait until a condition is met."""
+    async with asyncio.timeout(5):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+async def test_lan_transport_reads_and_writes_properties(
+    device: FakeAylaDevice, session: aiohttp.ClientSession
+):
+    """Test that properties are read and written over an encrypted LAN session."""
+    transport = LanTransport(session, 0, host="127.0.0.1", local_ip="127.0.0.1")
+    await transport.start()
+    try:
+        transport.add_device(MOCK_DEVICE_DSN, device.address, device.lan_config)
+        await wait_for(lambda: transport.is_connected(MOCK_DEVICE_DSN))
+
+        properties = await transport.get_properties(
+            MOCK_DEVICE_DSN, ["current_humidity", "device_mode", "unknown"]
+        )
+        assert {p["name"]: p["value"] for p in properties} == {
+            "current_humidity": 62,
+            "device_mode": 1,
+        }
+
+        await transport.set_properties(MOCK_DEVICE_DSN, [("humidity_setpoint", 40)])
+        await wait_for(lambda: device.properties["humidity_setpoint"] == 40)
+
+        assert device.key_exchanges == 1
+    finally:
+        await transport.stop()
+
+
+async def test_client_prefers_lan_and_falls_back_to_cloud(
+    device: FakeAylaDevice, session: aiohttp.ClientSession
+):
+    """Test that the client uses the LAN when connected and the cloud otherwise."""
+    client = APIClient(session, "en", "test_email@example.com", "test_password")
+
+    async def get_request(path: str):
+        if path == "apiv1/devices.json":
+            return [
+                {
+                    "device": {
+                        "dsn": MOCK_DEVICE_DSN,
+                        "product_name": "TEST-PRODUCT-NAME",
+                        "lan_enabled": True,
+                        "lan_ip": device.address,
+                    }
+                }
+            ]
+        if path.endswith("/lan.json"):
+            return {"lanip": device.lan_config}
+        return mock_properties_response({**MOCK_PROPERTIES, "current_humidity": 70})
+
+    client.get_request = AsyncMock(side_effect=get_request)
+    client.post_request = AsyncMock(return_value={})
+
+    await client.async_start_lan(0)
+    try:
+        await wait_for(lambda: client.lan.is_connected(MOCK_DEVICE_DSN))
+
+        snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+        assert snapshot.current_humidity == 62
+        assert snapshot.product_name == "TEST-PRODUCT-NAME"
+        assert not any(
+            call.args[0].endswith("/properties.json")
+            for call in client.get_request.call_args_list
+        )
+
+        await client.set_mode(MOCK_DEVICE_DSN, Mode.PURIFIER)
+        await wait_for(lambda: device.properties["device_mode"] == 3)
+        client.post_request.assert_not_awaited()
+
+        client.lan.devices[MOCK_DEVICE_DSN].reset()
+        client.device_properties_timestamp.clear()
+
+        snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+        assert snapshot.current_humidity == 70
+    finally:
+        await client.async_stop_lan()
+
+
+async def test_timed_out_commands_are_not_replayed(
+    device: FakeAylaDevice, session: aiohttp.ClientSession
+):
+    """Test that a write given up on is not delivered when the device comes late."""
+    transport = LanTransport(session, 0, host="127.0.0.1", local_ip="127.0.0.1")
+    await transport.start()
+    try:
+        transport.add_device(MOCK_DEVICE_DSN, device.address, device.lan_config)
+        await wait_for(lambda: transport.is_connected(MOCK_DEVICE_DSN))
+        commands_fetched = device.commands_fetched
+
+        device.fetch_delay = 0.2
+        with (
+            patch(
+                "custom_components.delonghi_dehumidifier_api.lan.LAN_REQUEST_TIMEOUT",
+                0.05,
+            ),
+            pytest.raises(LanError),
+        ):
+            await transport.set_properties(MOCK_DEVICE_DSN, [("humidity_setpoint", 40)])
+        assert not transport.devices[MOCK_DEVICE_DSN].commands
+
+        await wait_for(lambda: device.commands_fetched > commands_fetched)
+        assert device.properties["humidity_setpoint"] == 50
+    finally:
+        await transport.stop()
+
+
+async def test_client_falls_back_to_cloud_when_device_leaves(
+    device: FakeAylaDevice, session: aiohttp.ClientSession
+):
+    """Test that reads and writes use the cloud once the device is unreachable."""
+    client = APIClient(session, "en", "test_email@example.com", "test_password")
+
+    async def get_request(path: str):
+        if path == "apiv1/devices.json":
+            return [
+                {
+                    "device": {
+                        "dsn": MOCK_DEVICE_DSN,
+                        "product_name": "TEST-PRODUCT-NAME",
+                        "lan_enabled": True,
+                        "lan_ip": device.address,
+                    }
+                }
+            ]
+        if path.endswith("/lan.json"):
+            return {"lanip": device.lan_config}
+        return mock_properties_response({**MOCK_PROPERTIES, "current_humidity": 70})
+
+    client.get_request = AsyncMock(side_effect=get_request)
+    client.post_request = AsyncMock(return_value={})
+
+    await client.async_start_lan(0)
+    try:
+        await wait_for(lambda: client.lan.is_connected(MOCK_DEVICE_DSN))
+        await device.stop()
+
+        await client.set_mode(MOCK_DEVICE_DSN, Mode.PURIFIER)
+        client.post_request.assert_awaited_once()
+        assert not client.lan.is_connected(MOCK_DEVICE_DSN)
+
+        snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+        assert snapshot.current_humidity == 70
+    finally:
+        await client.async_stop_lan()
+
+
+async def test_device_without_lan_keys_uses_cloud(session: aiohttp.ClientSession):
+    """Test that a device whose LAN keys cannot be fetched is skipped."""
+    client = APIClient(session, "en", "test_email@example.com", "test_password")
+
+    async def get_request(path: str):
+        if path == "apiv1/devices.json":
+            return [
+                {
+                    "device": {
+                        "dsn": MOCK_DEVICE_DSN,
+                        "lan_enabled": True,
+                        "lan_ip": "127.0.0.1",
+                    }
+                }
+            ]
+        raise aiohttp.ClientResponseError(None, (), status=404)
+
+    client.get_request = AsyncMock(side_effect=get_request)
+
+    await client.async_start_lan(0)
+    try:
+        assert MOCK_DEVICE_DSN not in client.lan.devices
+    finally:
+        await client.async_stop_lan()
+
+
+def test_unsigned_messages_are_rejected():
+    """Test that only messages signed with the session key are accepted."""
+    app_cipher, _ = session_ciphers("KEY", "random_1", "random_2", 1, 2)
+    _, dev_cipher = session_ciphers("KEY", "random_1", "random_2", 1, 2)
+    message = dev_cipher.encrypt({"data": {"name": "current_humidity"}})
+
+    with pytest.raises(LanError):
+        app_cipher.decrypt({"enc": message["enc"]})
+
+
+async def test_invalid_datapoints_are_rejected(
+    device: FakeAylaDevice, session: aiohttp.ClientSession
+):
+    """Test that datapoints with an invalid signature or command id are rejected."""
+    transport = LanTransport(session, 0, host="127.0.0.1", local_ip="127.0.0.1")
+    await transport.start()
+    try:
+        transport.add_device(MOCK_DEVICE_DSN, device.address, device.lan_config)
+        await wait_for(lambda: transport.is_connected(MOCK_DEVICE_DSN))
+        url = f"http://127.0.0.1:{transport.port}/local_lan/property/datapoint.json"
+
+        values = transport.devices[MOCK_DEVICE_DSN].values
+        message = device._dev_cipher.encrypt(
+            {"seq_no": 1, "data": {"name": "current_humidity", "value": 10}}
+        )
+        response = await session.post(url, json=message, params={"cmd_id": "x"})
+        assert response.status == 400
+        assert "current_humidity" not in values
+
+        message = device._dev_cipher.encrypt(
+            {"seq_no": 2, "data": {"name": "current_humidity", "value": 20}}
+        )
+        response = await session.post(url, json={"enc": message["enc"]})
+        assert response.status == 400
+        assert "current_humidity" not in values
+    finally:
+        await transport.stop()
@@ -0,0 +1,53 @@
+"""Test the request metrics of the client"""
+
+from custom_components.delonghi_dehumidifier_api.metrics import (
+    ClientMetrics,
+    LatencyHistogram,
+    endpoint_name,
+)
+
+
+def test_endpoint_name():
+    """Test that identifiers and queries are removed from the endpoints."""
+    assert endpoint_name("apiv1/devices.json") == "apiv1/devices.json"
+    assert (
+        endpoint_name("apiv1/dsns/AC000W000000001/properties.json?names[]=swing")
+        == "apiv1/dsns/{dsn}/properties.json"
+    )
+    assert (
+        endpoint_name("apiv1/dsns/AC000W000000001/properties/swing/datapoints.json")
+        == "apiv1/dsns/{dsn}/properties/{name}/datapoints.json"
+    )
+
+
+def test_latency_histogram():
+    """Test that percentiles are estimated from the buckets."""
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+
+    for seconds in (0.01, 0.02, 0.03, 0.2, 3.0):
+        histogram.observe(seconds)
+
+    assert histogram.percentile(50) == 0.05
+    assert histogram.percentile(80) == 0.25
+    assert histogram.percentile(95) == 3.0
+    assert histogram.as_dict()["buckets"]["le_50ms"] == 3
+
+
+def test_client_metrics():
+    """Test that requests and errors are aggregated per endpoint and overall."""
+    metrics = ClientMetrics()
+    metrics.record_request("apiv1/devices.json", 0.1)
+    metrics.record_request("apiv1/devices.json", 0.3, 503)
+    metrics.record_request("apiv1/batch_datapoints.json", 0.2, "ClientConnectorError")
+    metrics.cache_hits = 3
+    metrics.cache_misses = 1
+
+    stats = metrics.as_dict()
+
+    assert stats["requests"] == 3
+    assert stats["errors"] == 2
+    assert stats["latency"]["count"] == 3
+    assert stats["endpoints"]["apiv1/devices.json"]["requests"] == 2
+    assert stats["endpoints"]["apiv1/devices.json"]["errors"] == {"503": 1}
+    assert stats["cache"]["hit_ratio"] == 0.75
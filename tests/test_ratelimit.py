@@ -0,0 +1,125 @@
+"""Test the rate limiter of the requests of an account"""
+
+# pylint: disable=unused-argument
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.delonghi_dehumidifier_api import DATA_RATE_LIMITERS
+from custom_components.delonghi_dehumidifier_api.const import CONF_RATE_LIMIT, DOMAIN
+from custom_components.delonghi_dehumidifier_api.ratelimit import (
+    Priority,
+    RateLimiter,
+    RateLimiters,
+)
+
+from .fake_ayla_cloud import FakeAylaCloud
+from .test_config_flow import MOCK_BASIC_CONFIG_PAGE
+
+
+async def test_burst_then_throttle():
+    """Test that requests over the burst wait for a token."""
+    limiter = RateLimiter(rate=6000, burst=2)
+
+    await limiter.acquire()
+    await limiter.acquire()
+    assert limiter.throttled == 0
+
+    await limiter.acquire()
+    assert limiter.throttled == 1
+    assert limiter.wait_time > 0
+    assert limiter.as_dict()["waiting"] == {"command": 0, "poll": 0}
+
+
+async def test_commands_before_polls():
+    """Test that waiting commands are granted before the polls queued earlier."""
+    limiter = RateLimiter(rate=6000, burst=1)
+    await limiter.acquire()
+
+    granted: list[str] = []
+
+    async def _acquire(name: str, priority: Priority) -> None:
+        await limiter.acquire(priority)
+        granted.append(name)
+
+    polls = [
+        asyncio.create_task(_acquire(f"poll{index}", Priority.POLL))
+        for index in range(2)
+    ]
+    await asyncio.sleep(0)
+    command = asyncio.create_task(_acquire("command", Priority.COMMAND))
+    await asyncio.gather(*polls, command)
+
+    assert granted == ["command", "poll0", "poll1"]
+
+
+async def test_cancelled_waiter():
+    """Test that a cancelled request gives up its place in the queue."""
+    limiter = RateLimiter(rate=60, burst=1)
+    await limiter.acquire()
+
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.as_dict()["waiting"]["poll"] == 1
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.as_dict()["waiting"]["poll"] == 0
+
+
+def test_registry_enforces_lowest_rate():
+    """Test that an account is limited to the lowest rate of its entries."""
+    limiters = RateLimiters()
+    key = "user@example.com@https://ads"
+
+    first = limiters.acquire(key, "entry1", 120)
+    second = limiters.acquire(key, "entry2", 60)
+    assert first is second
+    assert first.rate == 60
+
+    limiters.release(key, "entry2")
+    assert first.rate == 120
+
+    limiters.release(key, "entry1")
+    assert limiters.acquire(key, "entry1", 120) is not first
+
+
+@pytest.mark.usefixtures("socket_enabled")
+async def test_entries_share_limiter(hass: HomeAssistant):
+    """Test that the entries of the same account share a rate limiter."""
+    cloud = FakeAylaCloud()
+    await cloud.start()
+    entries = [
+        MockConfigEntry(
+            domain=DOMAIN,
+            data=MOCK_BASIC_CONFIG_PAGE,
+            options={CONF_RATE_LIMIT: rate},
+        )
+        for rate in (300, 200)
+    ]
+    try:
+        with patch(
+            "custom_components.delonghi_dehumidifier_api.client.DEFAULT_ENDPOINTS",
+            cloud.endpoints,
+        ):
+            for entry in entries:
+                entry.add_to_hass(hass)
+                assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+
+        first, second = (entry.runtime_data.client for entry in entries)
+        assert first.rate_limiter is second.rate_limiter
+        assert first.rate_limiter.rate == 200
+        assert first.stats()["rate_limit"]["rate"] == 200
+
+        assert await hass.config_entries.async_unload(entries[1].entry_id)
+        assert first.rate_limiter.rate == 300
+        assert await hass.config_entries.async_unload(entries[0].entry_id)
+        assert not hass.data[DATA_RATE_LIMITERS]._shared
+    finally:
+        await cloud.stop()
@@ -0,0 +1,235 @@
+"""Test the retries and the circuit breaker of the cloud requests"""
+
+# pylint: disable=unused-argument
+import asyncio
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.delonghi_dehumidifier_api.client import APIClient, PropertyTier
+from custom_components.delonghi_dehumidifier_api.const import DOMAIN
+from custom_components.delonghi_dehumidifier_api.resilience import (
+    BREAKER_FAILURE_THRESHOLD,
+    RETRY_ATTEMPTS,
+    CircuitBreaker,
+    CircuitOpenError,
+    retry_delay,
+)
+
+from .conftest import MOCK_DEVICE_DSN
+from .fake_ayla_cloud import FakeAylaCloud
+from .test_config_flow import MOCK_BASIC_CONFIG_PAGE
+
+pytestmark = pytest.mark.usefixtures("socket_enabled")
+
+PROPERTIES_ROUTE = "/apiv1/dsns/{dsn}/properties.json"
+
+
+@pytest.fixture(name="no_backoff")
+def no_backoff_fixture():
+    """Retry right away."""
+    with patch(
+        "custom_components.delonghi_dehumidifier_api.resilience.RETRY_BACKOFF_MIN", 0
+    ):
+        yield
+
+
+@pytest.fixture(name="cloud")
+async def cloud_fixture():
+    """Start a fake cloud on localhost."""
+    cloud = FakeAylaCloud()
+    await cloud.start()
+    yield cloud
+    await cloud.stop()
+
+
+@pytest.fixture(name="client")
+async def client_fixture(cloud: FakeAylaCloud, no_backoff):
+    """Return a client of the fake cloud, retrying right away."""
+    async with aiohttp.ClientSession() as session:
+        yield APIClient(
+            session,
+            "en",
+            "test_email@example.com",
+            "test_password",
+            cloud.endpoints,
+        )
+
+
+def test_retry_delay():
+    """Test the backoff and the Retry-After delays."""
+    assert 0.25 <= retry_delay(1) <= 0.5
+    assert 1 <= retry_delay(3) <= 2
+    assert retry_delay(1, "2") == 2
+    assert retry_delay(1, "3600") is None
+    assert retry_delay(1, "Thu, 01 Jan 2015 00:00:00 GMT") == 0
+
+
+def test_circuit_breaker():
+    """Test that the breaker opens, lets a trial through and closes."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+
+    breaker.reset_timeout = 60
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    breaker.reset_timeout = 0
+    breaker.before_request()
+    # Only the trial request is let through
+    assert breaker.is_open
+    breaker.record_success()
+    assert not breaker.is_open
+
+
+async def test_reads_are_retried(client: APIClient, cloud: FakeAylaCloud):
+    """Test that reads failing transiently are retried."""
+    await client.get_devices()
+    cloud.fail(PROPERTIES_ROUTE, status=503)
+    cloud.fail(PROPERTIES_ROUTE, status=429, headers={"Retry-After": "0"})
+
+    snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+
+    assert snapshot.current_humidity == 62
+    assert cloud.requests[PROPERTIES_ROUTE] == 3
+    assert client.stats()["endpoints"]["apiv1/dsns/{dsn}/properties.json"][
+        "errors"
+    ] == {"503": 1, "429": 1}
+
+
+async def test_slow_reads_time_out(client: APIClient, cloud: FakeAylaCloud):
+    """Test that slow reads time out and give up after the last attempt."""
+    await client.get_devices()
+    cloud.fail(PROPERTIES_ROUTE, status=200, times=RETRY_ATTEMPTS, delay=1)
+
+    with (
+        patch(
+            "custom_components.delonghi_dehumidifier_api.client.REQUEST_TIMEOUT",
+            aiohttp.ClientTimeout(total=0.05),
+        ),
+        pytest.raises(TimeoutError),
+    ):
+        await client.get_properties(MOCK_DEVICE_DSN)
+
+    assert cloud.requests[PROPERTIES_ROUTE] == RETRY_ATTEMPTS
+
+
+async def test_writes_are_not_retried(client: APIClient, cloud: FakeAylaCloud):
+    """Test that failed writes are only retried when rate limited."""
+    route = "/apiv1/dsns/{dsn}/properties/{name}/datapoints.json"
+    cloud.fail(route, status=500)
+    with pytest.raises(aiohttp.ClientResponseError):
+        await client.set_humidity(MOCK_DEVICE_DSN, 40)
+    assert cloud.requests[route] == 1
+
+    cloud.fail(route, status=429, headers={"Retry-After": "0"})
+    await client.set_humidity(MOCK_DEVICE_DSN, 40)
+    assert cloud.requests[route] == 3
+
+
+async def test_open_breaker_serves_cached_values(
+    client: APIClient, cloud: FakeAylaCloud
+):
+    """Test that the cached values are served while the cloud is failing."""
+    await client.get_properties(MOCK_DEVICE_DSN)
+    cloud.fail(PROPERTIES_ROUTE, status=503, times=BREAKER_FAILURE_THRESHOLD)
+
+    client.invalidate_properties(MOCK_DEVICE_DSN, [PropertyTier.FAST])
+    with pytest.raises(aiohttp.ClientResponseError):
+        await client.get_properties(MOCK_DEVICE_DSN)
+    client.invalidate_properties(MOCK_DEVICE_DSN, [PropertyTier.FAST])
+    with pytest.raises(aiohttp.ClientResponseError):
+        await client.get_properties(MOCK_DEVICE_DSN)
+    assert client.breaker.is_open
+    requests = cloud.requests[PROPERTIES_ROUTE]
+
+    snapshot = await client.get_properties(MOCK_DEVICE_DSN)
+    assert snapshot.current_humidity == 62
+    assert cloud.requests[PROPERTIES_ROUTE] == requests
+
+    with pytest.raises(CircuitOpenError):
+        await client.set_humidity(MOCK_DEVICE_DSN, 40)
+
+
+async def test_entities_stay_available_while_breaker_open(
+    hass: HomeAssistant, cloud: FakeAylaCloud
+):
+    """Test that the entities keep their last values while the cloud is failing."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.delonghi_dehumidifier_api.client.DEFAULT_ENDPOINTS",
+        cloud.endpoints,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    client = entry.runtime_data.client
+    coordinator = entry.runtime_data.coordinators[MOCK_DEVICE_DSN]
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        client.breaker.record_failure()
+
+    client.invalidate_properties(MOCK_DEVICE_DSN, [PropertyTier.FAST])
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    state = hass.states.get("humidifier.test_product_name_dehumidifier_unit")
+    assert state.state == "on"
+    assert state.attributes["current_humidity"] == 62
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_trial_failing_on_authentication_frees_breaker(
+    client: APIClient, cloud: FakeAylaCloud
+):
+    """Test that a trial failing before reaching the cloud lets another through."""
+    await client.get_properties(MOCK_DEVICE_DSN)
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        client.breaker.record_failure()
+    client.breaker.reset_timeout = 0
+
+    client.invalidate_properties(MOCK_DEVICE_DSN, [PropertyTier.FAST])
+    with (
+        patch.object(
+            client,
+            "get_access_token",
+            side_effect=aiohttp.ClientResponseError(None, (), status=500),
+        ),
+        pytest.raises(aiohttp.ClientResponseError),
+    ):
+        await client.get_properties(MOCK_DEVICE_DSN)
+    assert not client.breaker.is_open
+
+    await client.get_properties(MOCK_DEVICE_DSN)
+    assert client.breaker.as_dict()["failures"] == 0
+
+
+async def test_cancelled_trial_frees_breaker(client: APIClient, cloud: FakeAylaCloud):
+    """Test that a cancelled trial lets another through."""
+    await client.get_properties(MOCK_DEVICE_DSN)
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        client.breaker.record_failure()
+    client.breaker.reset_timeout = 0
+
+    cloud.fail(PROPERTIES_ROUTE, status=200, delay=1)
+    task = asyncio.create_task(
+        client.get_request(f"apiv1/dsns/{MOCK_DEVICE_DSN}/properties.json")
+    )
+    while not cloud.requests[PROPERTIES_ROUTE] > 1:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert not client.breaker.is_open
+
+    client.invalidate_properties(MOCK_DEVICE_DSN, [PropertyTier.FAST])
+    await client.get_properties(MOCK_DEVICE_DSN)
+    assert client.breaker.as_dict()["failures"] == 0
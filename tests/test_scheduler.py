@@ -0,0 +1,131 @@
+"""Test the adaptive poll interval"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.delonghi_dehumidifier_api.client import (
+    PropertySnapshot,
+    Status,
+)
+from custom_components.delonghi_dehumidifier_api.const import (
+    CONF_DAILY_REQUEST_BUDGET,
+    DOMAIN,
+    SCAN_INTERVAL,
+)
+from custom_components.delonghi_dehumidifier_api.scheduler import (
+    ACTIVE_INTERVAL,
+    ACTIVE_PERIOD,
+    IDLE_INTERVAL,
+    PollScheduler,
+    PollSchedulers,
+)
+
+from .conftest import MOCK_DEVICE_DSN, MOCK_PROPERTIES
+from .test_config_flow import MOCK_BASIC_CONFIG_PAGE
+
+OFF = PropertySnapshot(device_status=Status.OFF, current_humidity=60)
+DRY = PropertySnapshot(
+    device_status=Status.ON, current_humidity=62, humidity_setpoint=50
+)
+AT_SETPOINT = PropertySnapshot(
+    device_status=Status.ON, current_humidity=51, humidity_setpoint=50
+)
+
+
+def test_interval_follows_device_activity():
+    """Test that idle devices are polled rarely and active ones often."""
+    scheduler = PollScheduler(lambda: 0)
+    with patch(
+        "custom_components.delonghi_dehumidifier_api.scheduler.time.monotonic",
+        return_value=1000.0,
+    ) as monotonic:
+        scheduler.observe(MOCK_DEVICE_DSN, OFF)
+        assert scheduler.interval(MOCK_DEVICE_DSN, OFF) == IDLE_INTERVAL
+
+        # Recently changed values keep the device active
+        scheduler.observe(MOCK_DEVICE_DSN, AT_SETPOINT)
+        assert scheduler.interval(MOCK_DEVICE_DSN, AT_SETPOINT) == ACTIVE_INTERVAL
+
+        monotonic.return_value += ACTIVE_PERIOD
+        scheduler.observe(MOCK_DEVICE_DSN, AT_SETPOINT)
+        assert scheduler.interval(MOCK_DEVICE_DSN, AT_SETPOINT) == SCAN_INTERVAL
+
+        # Far above the setpoint the device is dehumidifying
+        assert scheduler.interval(MOCK_DEVICE_DSN, DRY) == ACTIVE_INTERVAL
+
+
+def test_interval_respects_daily_budget():
+    """Test that the devices share the daily request budget of the account."""
+    requests = 0
+    with patch(
+        "custom_components.delonghi_dehumidifier_api.scheduler.time.monotonic",
+        return_value=1000.0,
+    ):
+        scheduler = PollScheduler(lambda: requests, daily_budget=1440)
+        scheduler.observe("AC000W000000001", DRY)
+        scheduler.observe("AC000W000000002", DRY)
+
+        # 1440 requests a day for two devices allow one poll every two minutes
+        assert scheduler.interval("AC000W000000001", DRY) == timedelta(minutes=2)
+
+        # Once the budget is spent, polling waits for the next day
+        requests = 1440
+        assert scheduler.interval("AC000W000000001", DRY) == timedelta(days=1)
+
+
+def test_registry_enforces_lowest_budget():
+    """Test that an account is held to the lowest daily budget of its entries."""
+    schedulers = PollSchedulers()
+    key = "user@example.com@https://ads"
+
+    first = schedulers.acquire(key, "entry1", lambda: 0, 5000)
+    second = schedulers.acquire(key, "entry2", lambda: 0, 1000)
+    assert first is second
+    assert first.daily_budget == 1000
+
+    schedulers.release(key, "entry2")
+    assert first.daily_budget == 5000
+
+    schedulers.release(key, "entry1")
+    assert schedulers.acquire(key, "entry1", lambda: 0, 5000) is not first
+
+
+async def test_entries_share_scheduler(hass: HomeAssistant, mock_cloud):
+    """Test that the entries of the same account share a poll scheduler."""
+    entries = [
+        MockConfigEntry(
+            domain=DOMAIN,
+            data=MOCK_BASIC_CONFIG_PAGE,
+            options={CONF_DAILY_REQUEST_BUDGET: budget},
+        )
+        for budget in (5000, 1000)
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    first, second = (entry.runtime_data.scheduler for entry in entries)
+    assert first is second
+    assert first.daily_budget == 1000
+
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_coordinator_polls_idle_device_rarely(hass: HomeAssistant, mock_cloud):
+    """Test that the coordinator of a device that is off polls rarely."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_BASIC_CONFIG_PAGE)
+    entry.add_to_hass(hass)
+
+    with patch.dict(MOCK_PROPERTIES, {"device_status": Status.OFF.value}):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    coordinator = entry.runtime_data.coordinators[MOCK_DEVICE_DSN]
+    assert coordinator.update_interval == IDLE_INTERVAL
+
+    assert await hass.config_entries.async_unload(entry.entry_id)